@@ -0,0 +1,12 @@
+"""
+    Package that contains a AssetPipeline class that can be used to
+    build static assets (like CSS and JavaScript files) into files
+    with a content hash in the name and precompressed variants, and to
+    find the best variant to serve for a request. The ImageVariants
+    class creates resized variants of images in modern formats.
+"""
+# ---------------------------------------------------------------------
+# Imports
+from asset_pipeline.asset_pipeline import AssetPipeline
+from asset_pipeline.image_variants import ImageVariants
+# ---------------------------------------------------------------------
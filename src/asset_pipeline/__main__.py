@@ -0,0 +1,47 @@
+"""
+    Command line interface for the 'asset_pipeline' package. Examples:
+
+    python -m asset_pipeline build --output res/dist res/css/style.css
+    python -m asset_pipeline images --source res/img boss-baby.png
+"""
+# ---------------------------------------------------------------------
+# Imports
+import logging
+import click
+from asset_pipeline import AssetPipeline, ImageVariants
+# ---------------------------------------------------------------------
+
+
+@click.group()
+def cli() -> None:
+    """ Builds static assets. """
+    logging.basicConfig(level=logging.INFO, format='%(name)s: %(message)s')
+
+
+@cli.command()
+@click.option('--output', default='res/dist', show_default=True,
+              help='Directory to write the built assets to.')
+@click.argument('sources', nargs=-1, required=True,
+                type=click.Path(exists=True, dir_okay=False))
+def build(output: str, sources: tuple) -> None:
+    """ Builds the given assets. """
+    AssetPipeline(output).build(sources)
+
+
+@cli.command()
+@click.option('--source', default='res/img', show_default=True,
+              help='Directory with the original images.')
+@click.option('--output', default='res/dist/img', show_default=True,
+              help='Directory to write the image variants to.')
+@click.option('--width', 'widths', type=int, multiple=True,
+              default=(200, 400, 800), show_default=True,
+              help='Width to create variants for.')
+@click.argument('names', nargs=-1, required=True)
+def images(source: str, output: str, widths: tuple, names: tuple) -> None:
+    """ Creates all variants of the given images. """
+    ImageVariants(source, output, widths).build(names)
+
+
+if __name__ == '__main__':
+    cli()
+# ---------------------------------------------------------------------
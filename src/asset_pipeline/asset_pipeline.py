@@ -0,0 +1,206 @@
+"""
+    Module that contains the 'AssetPipeline' class.
+"""
+# ---------------------------------------------------------------------
+# Imports
+import gzip
+import hashlib
+import json
+import os
+from logging import getLogger
+from typing import Dict, Iterable, List, Optional, Tuple
+from asset_pipeline.exceptions import AssetNotFoundError
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+# ---------------------------------------------------------------------
+
+# The file extension for every supported encoding
+ENCODING_EXTENSIONS = {
+    'br': '.br',
+    'gzip': '.gz'
+}
+
+
+class AssetPipeline:
+    """ Class that builds and resolves static assets. A build writes
+        every asset with a content hash in the filename (for example
+        'style.1a2b3c4d5e6f.css'), precompressed variants of it and a
+        manifest that maps the original name to the built files. """
+
+    def __init__(self, output_dir: str) -> None:
+        """ Sets the default values.
+
+            Parameters
+            ----------
+            output_dir : str
+                The directory with the built assets.
+
+            Returns
+            -------
+            None
+        """
+        self.output_dir = os.path.abspath(output_dir)
+        self.manifest_file = os.path.join(self.output_dir, 'manifest.json')
+        self.manifest: Dict[str, dict] = dict()
+        self.files: Dict[str, dict] = dict()
+        self.logger = getLogger('asset_pipeline')
+
+    @property
+    def is_built(self) -> bool:
+        """ Returns True if there is a loaded manifest. """
+        return len(self.manifest) > 0
+
+    def build(self, sources: Iterable[str]) -> Dict[str, dict]:
+        """ Method to build the given assets and write the manifest.
+
+            Parameters
+            ----------
+            sources : Iterable[str]
+                The paths of the files to build. The basename of the
+                file is used as the name of the asset.
+
+            Returns
+            -------
+            Dict[str, dict]
+                The manifest.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        manifest = dict()
+        for source in sources:
+            with open(source, 'rb') as file_stream:
+                content = file_stream.read()
+
+            # Create the filename with the content hash
+            name = os.path.basename(source)
+            base, extension = os.path.splitext(name)
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            filename = f'{base}.{digest}{extension}'
+            self._write(filename, content)
+
+            # Create the precompressed variants. A variant is only kept
+            # when it is smaller than the original file.
+            encodings: List[str] = []
+            for encoding, compressed in self._compress(content):
+                if len(compressed) < len(content):
+                    self._write(
+                        filename + ENCODING_EXTENSIONS[encoding],
+                        compressed)
+                    encodings.append(encoding)
+
+            manifest[name] = {
+                'file': filename,
+                'encodings': encodings
+            }
+            self.logger.info(f'Built {name} as {filename} ({encodings})')
+
+        # Write the manifest
+        self._write('manifest.json', json.dumps(
+            manifest, indent=2).encode('utf-8'))
+        self._set_manifest(manifest)
+        return manifest
+
+    def load_manifest(self) -> bool:
+        """ Method to load the manifest of a previous build.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            bool
+                True if the manifest is loaded, False if there is no
+                manifest.
+        """
+        try:
+            with open(self.manifest_file) as file_stream:
+                self._set_manifest(json.load(file_stream))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def url_for(self, name: str, prefix: str = '/assets/') -> Optional[str]:
+        """ Method that returns the URL for the built version of an
+            asset.
+
+            Parameters
+            ----------
+            name : str
+                The name of the asset, for example 'style.css'.
+
+            prefix : str
+                The URL prefix under which the assets are served.
+
+            Returns
+            -------
+            Optional[str]
+                The URL, or None if the asset is not built.
+        """
+        asset = self.manifest.get(name)
+        if asset is None:
+            return None
+        return prefix + asset['file']
+
+    def resolve(self,
+                filename: str,
+                encodings: Iterable[str]) -> Tuple[str, Optional[str]]:
+        """ Method that returns the path of the best variant of a built
+            file for the given accepted encodings.
+
+            Parameters
+            ----------
+            filename : str
+                The name of the built file, for example
+                'style.1a2b3c4d5e6f.css'.
+
+            encodings : Iterable[str]
+                The encodings the client accepts.
+
+            Returns
+            -------
+            Tuple[str, Optional[str]]
+                The path of the file to serve and the encoding of this
+                file (None if the file is not encoded).
+        """
+        asset = self.files.get(filename)
+        if asset is None:
+            raise AssetNotFoundError(f'Asset "{filename}" is not built')
+
+        # Pick the first available encoding, in order of our preference
+        encodings = set(encodings)
+        for encoding in ENCODING_EXTENSIONS.keys():
+            if encoding in encodings and encoding in asset['encodings']:
+                return (
+                    os.path.join(
+                        self.output_dir,
+                        filename + ENCODING_EXTENSIONS[encoding]),
+                    encoding
+                )
+        return (os.path.join(self.output_dir, filename), None)
+
+    def _set_manifest(self, manifest: Dict[str, dict]) -> None:
+        """ Sets the manifest and the lookup table for built files. """
+        self.manifest = manifest
+        self.files = {asset['file']: asset for asset in manifest.values()}
+
+    def _compress(self, content: bytes) -> List[Tuple[str, bytes]]:
+        """ Returns the compressed variants of the content. """
+        variants = [('gzip', gzip.compress(content, compresslevel=9))]
+        if brotli is not None:
+            variants.append(('br', brotli.compress(content, quality=11)))
+        else:
+            self.logger.warning('brotli is not installed; skipping .br')
+        return variants
+
+    def _write(self, filename: str, content: bytes) -> None:
+        """ Writes a file to the output directory. The file is written
+            to a temporary file first, so a running application never
+            sees a half written file. """
+        path = os.path.join(self.output_dir, filename)
+        with open(path + '.tmp', 'wb') as file_stream:
+            file_stream.write(content)
+        os.replace(path + '.tmp', path)
+# ---------------------------------------------------------------------
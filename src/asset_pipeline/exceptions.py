@@ -0,0 +1,16 @@
+"""
+    Exceptions for the 'asset_pipeline' package.
+"""
+# ---------------------------------------------------------------------
+
+
+class AssetPipelineError(Exception):
+    """ Base exception for AssetPipeline-exceptions. """
+    pass
+
+
+class AssetNotFoundError(AssetPipelineError):
+    """ Exception that occurs when a requested asset is not part of
+        the build. """
+    pass
+# ---------------------------------------------------------------------
@@ -0,0 +1,192 @@
+"""
+    Module that contains the 'ImageVariants' class.
+"""
+# ---------------------------------------------------------------------
+# Imports
+import os
+import threading
+from logging import getLogger
+from typing import Dict, Iterable, List, Optional, Tuple
+from PIL import Image
+from asset_pipeline.exceptions import AssetNotFoundError
+# ---------------------------------------------------------------------
+
+# The supported output formats, in order of preference. The values are
+# the Pillow format, the file extension and the save options.
+FORMATS = {
+    'image/webp': ('WEBP', '.webp', {'quality': 80, 'method': 6}),
+    'image/png': ('PNG', '.png', {'optimize': True})
+}
+
+
+class ImageVariants:
+    """ Class that creates resized variants of images in modern image
+        formats. The variants are created when they are requested for
+        the first time and stored in a cache directory, so they only
+        have to be created once. """
+
+    def __init__(self,
+                 source_dir: str,
+                 cache_dir: str,
+                 widths: Iterable[int] = (200, 400, 800)) -> None:
+        """ Sets the default values.
+
+            Parameters
+            ----------
+            source_dir : str
+                The directory with the original images.
+
+            cache_dir : str
+                The directory to store the variants in.
+
+            widths : Iterable[int]
+                The widths for which variants can be created.
+
+            Returns
+            -------
+            None
+        """
+        self.source_dir = os.path.abspath(source_dir)
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.widths: List[int] = sorted(widths)
+
+        # Only use the formats that this Pillow installation can write
+        Image.init()
+        self.formats: Dict[str, tuple] = {
+            mimetype: settings for mimetype, settings in FORMATS.items()
+            if settings[0] in Image.SAVE
+        }
+        self.logger = getLogger('asset_pipeline')
+        self._lock = threading.Lock()
+
+    def negotiate(self, accepted: Iterable[str]) -> str:
+        """ Method that returns the best supported format for the
+            given accepted mimetypes. PNG is always supported.
+
+            Parameters
+            ----------
+            accepted : Iterable[str]
+                The mimetypes the client accepts.
+
+            Returns
+            -------
+            str
+                The mimetype of the format to use.
+        """
+        accepted = set(accepted)
+        for mimetype in self.formats.keys():
+            if mimetype in accepted:
+                return mimetype
+        return 'image/png'
+
+    def snap_width(self, width: Optional[int]) -> Optional[int]:
+        """ Method that returns the smallest configured width that is
+            at least as wide as the requested width.
+
+            Parameters
+            ----------
+            width : Optional[int]
+                The requested width. If None, the original width is
+                used.
+
+            Returns
+            -------
+            Optional[int]
+                The width to use, or None for the original width.
+        """
+        if width is None:
+            return None
+        for configured_width in self.widths:
+            if configured_width >= width:
+                return configured_width
+        return self.widths[-1]
+
+    def get(self,
+            name: str,
+            width: Optional[int],
+            mimetype: str) -> Tuple[str, str]:
+        """ Method that returns the path to a variant of an image. The
+            variant is created if it doesn't exist yet.
+
+            Parameters
+            ----------
+            name : str
+                The filename of the original image.
+
+            width : Optional[int]
+                The requested width. Snapped to a configured width.
+
+            mimetype : str
+                The mimetype of the requested format.
+
+            Returns
+            -------
+            Tuple[str, str]
+                The path of the variant and the mimetype.
+        """
+        source = os.path.join(self.source_dir, os.path.basename(name))
+        try:
+            mtime = int(os.path.getmtime(source))
+        except FileNotFoundError:
+            raise AssetNotFoundError(f'Image "{name}" does not exist')
+
+        if mimetype not in self.formats:
+            mimetype = 'image/png'
+        width = self.snap_width(width)
+
+        # The modification time of the original is part of the name, so
+        # a changed image results in new variants
+        base = os.path.splitext(os.path.basename(name))[0]
+        path = os.path.join(
+            self.cache_dir,
+            f'{base}.{width or "original"}.{mtime}'
+            f'{self.formats[mimetype][1]}'
+        )
+
+        if not os.path.exists(path):
+            with self._lock:
+                if not os.path.exists(path):
+                    self._create(source, path, width, mimetype)
+        return (path, mimetype)
+
+    def build(self, names: Iterable[str]) -> None:
+        """ Method that creates all variants of the given images, so
+            they don't have to be created on request.
+
+            Parameters
+            ----------
+            names : Iterable[str]
+                The filenames of the images.
+
+            Returns
+            -------
+            None
+        """
+        for name in names:
+            for width in self.widths + [None]:
+                for mimetype in self.formats.keys():
+                    path, _ = self.get(name, width, mimetype)
+                    self.logger.info(f'Built {path}')
+
+    def _create(self,
+                source: str,
+                path: str,
+                width: Optional[int],
+                mimetype: str) -> None:
+        """ Creates a variant of an image. The variant is written to a
+            temporary file first, so other processes never see a half
+            written file. """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        image_format, _, options = self.formats[mimetype]
+
+        with Image.open(source) as image:
+            # Resize the image; images are never enlarged
+            if width is not None and width < image.width:
+                height = round(image.height * width / image.width)
+                image = image.resize((width, height), Image.LANCZOS)
+
+            temporary_path = f'{path}.{os.getpid()}.tmp'
+            image.save(temporary_path, format=image_format, **options)
+        os.replace(temporary_path, path)
+        self.logger.debug(f'Created image variant {path}')
+# ---------------------------------------------------------------------
@@ -0,0 +1,4 @@
+"""
+    Benchmarks for the 'Jantje' application. Every module can be run
+    with `python -m benchmarks.<module>` from the 'src' directory.
+"""
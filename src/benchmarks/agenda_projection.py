@@ -0,0 +1,107 @@
+"""
+    Microbenchmark that compares retrieving the agendaitems as ORM
+    objects (`get_agenda_items`) with retrieving only some columns as
+    named tuples (`get_agenda_rows`). An in-memory SQLite database is
+    used, so the database itself takes as little time as possible and
+    the difference is the overhead of the ORM. The caches are bypassed.
+
+    python -m benchmarks.agenda_projection --rows 20000 --repeat 5
+"""
+# ---------------------------------------------------------------------
+# Imports
+import gc
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable
+import click
+from database import Database
+from jantje_database import logger
+from jantje_database.agendaitems import (_query_agenda_items,
+                                         _query_agenda_rows,
+                                         _validate_columns,
+                                         _validate_filters)
+from jantje_database.bulk import bulk_insert
+# ---------------------------------------------------------------------
+
+
+def measure(load: Callable[[], list], repeat: int) -> dict:
+    """ Runs the query several times and returns the median duration
+        and the memory that is used by the result. """
+    durations = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        load()
+        durations.append(time.perf_counter() - start)
+
+    # Measure the memory that the result keeps in use
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = load()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    return {
+        'rows': len(result),
+        'median (ms)': statistics.median(durations) * 1000,
+        'min (ms)': min(durations) * 1000,
+        'memory (KiB)': used / 1024
+    }
+
+
+@click.command()
+@click.option('--rows', default=20000, show_default=True,
+              help='The amount of agendaitems in the database.')
+@click.option('--repeat', default=5, show_default=True)
+@click.option('--columns', default='datetime,description',
+              show_default=True,
+              help='The columns for the projection, comma separated.')
+def benchmark(rows: int, repeat: int, columns: str) -> None:
+    """ Compares the ORM objects with the projection. """
+    logger.setLevel('WARNING')
+
+    # One connection, so every checkout uses the same in-memory
+    # database
+    Database.connect(
+        connection='sqlite:///:memory:',
+        pool_pre_ping=False,
+        pool_size=1,
+        pool_overflow=0,
+        create_tables=True
+    )
+    bulk_insert(
+        {
+            'datetime': datetime(2021, 4, 17) + timedelta(minutes=number),
+            'all_day': number % 7 == 0,
+            'description': f'Afspraak {number}'
+        }
+        for number in range(rows)
+    )
+
+    filters = _validate_filters(
+        flt_id=None, flt_from=None, flt_until=None, upcoming=False,
+        limit=None, after=None, ascending=False)
+    columns = _validate_columns(columns.split(','))
+
+    results = {
+        'orm': measure(lambda: _query_agenda_items(filters), repeat),
+        'rows': measure(lambda: _query_agenda_rows(filters, columns),
+                        repeat)
+    }
+    for name, result in results.items():
+        click.echo(f'{name:>5}: ' + ', '.join(
+            f'{key} {value:.1f}' for key, value in result.items()))
+    click.echo(
+        'speedup {:.1f}x, memory {:.1f}x'.format(
+            results['orm']['median (ms)'] / results['rows']['median (ms)'],
+            results['orm']['memory (KiB)']
+            / results['rows']['memory (KiB)']))
+
+
+if __name__ == '__main__':
+    benchmark()
+# ---------------------------------------------------------------------
@@ -0,0 +1,111 @@
+"""
+    Benchmark that compares the sync (WSGI) serving mode with the async
+    (ASGI) serving mode of the dashboard. Both servers are started one
+    after the other with the same amount of workers and get the same
+    load. The configuration and database from the environment are
+    used.
+
+    To measure the database instead of the caches, use an environment
+    in which `cache.agenda.ttl` is 0.
+
+    python -m benchmarks.serving --requests 2000 --concurrency 100
+"""
+# ---------------------------------------------------------------------
+# Imports
+import statistics
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+import click
+# ---------------------------------------------------------------------
+
+# The commands to start the servers; the bind address is added
+SERVERS = {
+    'sync': ['gunicorn', 'dashboard:create_app()', '--preload', '-w', '2',
+             '--threads', '2'],
+    'async': ['gunicorn', 'dashboard.asgi:create_asgi_app()', '--preload',
+              '-w', '2', '-k', 'uvicorn.workers.UvicornWorker']
+}
+
+
+def wait_for_server(url: str, timeout: float = 30) -> None:
+    """ Waits until the server responds. """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise TimeoutError(f'Server at {url} did not start')
+
+
+def request(url: str) -> float:
+    """ Does one request and returns the duration in seconds. """
+    start = time.perf_counter()
+    urllib.request.urlopen(url, timeout=30).read()
+    return time.perf_counter() - start
+
+
+def run_load(url: str, requests: int, concurrency: int) -> dict:
+    """ Sends the requests to the server and returns the results. """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        durations: List[float] = sorted(
+            executor.map(lambda _: request(url), range(requests)))
+    elapsed = time.perf_counter() - start
+
+    def percentile(value: float) -> float:
+        return durations[min(len(durations) - 1,
+                             int(len(durations) * value))] * 1000
+
+    return {
+        'requests/s': requests / elapsed,
+        'mean (ms)': statistics.mean(durations) * 1000,
+        'p50 (ms)': percentile(0.50),
+        'p95 (ms)': percentile(0.95),
+        'p99 (ms)': percentile(0.99)
+    }
+
+
+@click.command()
+@click.option('--path', default='/api/agenda', show_default=True,
+              help='The path to request.')
+@click.option('--requests', default=2000, show_default=True)
+@click.option('--concurrency', default=100, show_default=True)
+@click.option('--port', default=8123, show_default=True)
+@click.option('--mode', 'modes', multiple=True,
+              type=click.Choice(list(SERVERS.keys())),
+              default=list(SERVERS.keys()), show_default=True)
+def benchmark(path: str,
+              requests: int,
+              concurrency: int,
+              port: int,
+              modes: tuple) -> None:
+    """ Compares the serving modes of the dashboard. """
+    url = f'http://127.0.0.1:{port}{path}'
+    for mode in modes:
+        server = subprocess.Popen(
+            SERVERS[mode] + ['-b', f'127.0.0.1:{port}'],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL)
+        try:
+            wait_for_server(url)
+
+            # Warm up the workers before measuring
+            run_load(url, concurrency, concurrency)
+            results = run_load(url, requests, concurrency)
+        finally:
+            server.terminate()
+            server.wait()
+
+        click.echo(f'{mode:>6}: ' + ', '.join(
+            f'{name} {value:.1f}' for name, value in results.items()))
+
+
+if __name__ == '__main__':
+    benchmark()
+# ---------------------------------------------------------------------
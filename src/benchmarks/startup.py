@@ -0,0 +1,113 @@
+"""
+    Benchmark for the cold start of the dashboard. Every run starts a
+    new interpreter and measures the time to import the `dashboard`
+    package, to create the application and to handle the first
+    request. The first request creates the database engine, but the
+    default path doesn't use the database.
+
+    With the maximum options, the benchmark fails when the median is
+    slower, so it can be used to catch regressions:
+
+    python -m benchmarks.startup --runs 5 --max-import 1.0 --max-total 2.5
+"""
+# ---------------------------------------------------------------------
+# Imports
+import json
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional
+import click
+# ---------------------------------------------------------------------
+
+# The script that is run in a new interpreter; the last line of the
+# output contains the measurements
+SCRIPT = '''
+import json, time
+start = time.perf_counter()
+import dashboard
+imported = time.perf_counter()
+app = dashboard.create_app()
+created = time.perf_counter()
+app.test_client().get({path!r})
+requested = time.perf_counter()
+print(json.dumps({{
+    'import': imported - start,
+    'create_app': created - imported,
+    'first_request': requested - created,
+    'total': requested - start
+}}))
+'''
+
+# The line format of `python -X importtime`
+IMPORT_TIME = re.compile(r'^import time:\s+(\d+) \|\s+\d+ \|\s+(\S+)')
+
+
+def run(path: str) -> dict:
+    """ Starts one interpreter and returns the measurements. """
+    process = subprocess.run(
+        [sys.executable, '-c', SCRIPT.format(path=path)],
+        capture_output=True, text=True, check=True)
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(count: int) -> List[tuple]:
+    """ Returns the packages that take the most time to import, with
+        the import time of all their modules in seconds. """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import dashboard'],
+        capture_output=True, text=True, check=True)
+    packages: Dict[str, float] = defaultdict(float)
+    for line in process.stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+        if match:
+            package = match.group(2).split('.')[0]
+            packages[package] += int(match.group(1)) / 1e6
+    return sorted(packages.items(), key=lambda item: -item[1])[:count]
+
+
+@click.command()
+@click.option('--path', default='/api/status', show_default=True,
+              help='The path of the first request.')
+@click.option('--runs', default=5, show_default=True)
+@click.option('--imports', default=10, show_default=True,
+              help='The amount of slowest imports to show.')
+@click.option('--max-import', type=float,
+              help='The maximum median import time in seconds.')
+@click.option('--max-total', type=float,
+              help='The maximum median startup time in seconds.')
+def benchmark(path: str,
+              runs: int,
+              imports: int,
+              max_import: Optional[float],
+              max_total: Optional[float]) -> None:
+    """ Measures the cold start of the dashboard. """
+    results = [run(path) for _ in range(runs)]
+    medians = {
+        name: statistics.median(result[name] for result in results)
+        for name in results[0]
+    }
+    click.echo(', '.join(
+        f'{name} {value * 1000:.1f} ms' for name, value in medians.items()))
+
+    if imports:
+        click.echo('Slowest imports:')
+        for package, seconds in slowest_imports(imports):
+            click.echo(f'  {package:<24} {seconds * 1000:8.1f} ms')
+
+    # Fail when the startup is slower than allowed
+    failures = [
+        f'{name} {medians[name]:.3f}s > {maximum:.3f}s'
+        for name, maximum in (('import', max_import), ('total', max_total))
+        if maximum is not None and medians[name] > maximum
+    ]
+    if failures:
+        raise click.ClickException(
+            'Startup is too slow: ' + ', '.join(failures))
+
+
+if __name__ == '__main__':
+    benchmark()
+# ---------------------------------------------------------------------
@@ -0,0 +1,9 @@
+"""
+    Package that contains a TTLCache class that can be used to cache
+    the results of expensive operations (like database queries) in
+    memory for a limited amount of time.
+"""
+# ---------------------------------------------------------------------
+# Imports
+from cache.ttl_cache import TTLCache
+# ---------------------------------------------------------------------
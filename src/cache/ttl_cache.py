@@ -0,0 +1,201 @@
+"""
+    Module that contains the 'TTLCache' class. This is a thread safe,
+    size limited, in-memory cache in which every entry expires after a
+    configured amount of seconds.
+"""
+# ---------------------------------------------------------------------
+# Imports
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+# ---------------------------------------------------------------------
+
+
+class TTLCache:
+    """ Class that represents a cache with a time-to-live and a maximum
+        size. When the cache is full, the least recently used entry is
+        removed. """
+
+    def __init__(self,
+                 ttl: float = 60,
+                 max_size: int = 128,
+                 observer: Optional[Callable[[bool], None]] = None
+                 ) -> None:
+        """ Sets the default values.
+
+            Parameters
+            ----------
+            ttl : float
+                The amount of seconds an entry stays valid.
+
+            max_size : int
+                The maximum amount of entries in the cache.
+
+            observer : Optional[Callable[[bool], None]]
+                Callable that is called for every lookup with True for
+                a hit and False for a miss. Can be used to export the
+                hit ratio.
+
+            Returns
+            -------
+            None
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.observer = observer
+        self.hits = 0
+        self.misses = 0
+        self.version = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """ Method to retrieve a value from the cache.
+
+            Parameters
+            ----------
+            key : Hashable
+                The key of the entry.
+
+            Returns
+            -------
+            Tuple[bool, Any]
+                A tuple with a boolean that indicates if the value was
+                found and the value itself (None when not found).
+        """
+        with self._lock:
+            found, value = False, None
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    found = True
+                else:
+                    # The entry is expired; remove it
+                    del self._entries[key]
+                    value = None
+
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if self.observer is not None:
+            self.observer(found)
+        return (found, value)
+
+    def set(self,
+            key: Hashable,
+            value: Any,
+            version: Optional[int] = None) -> bool:
+        """ Method to add or replace a value in the cache.
+
+            Parameters
+            ----------
+            key : Hashable
+                The key of the entry.
+
+            value : Any
+                The value to cache.
+
+            version : Optional[int]
+                The version of the cache when the value was loaded.
+                When the cache was invalidated since then, the value
+                is outdated and it is not stored.
+
+            Returns
+            -------
+            bool
+                True when the value is stored.
+        """
+        with self._lock:
+            if version is not None and version != self.version:
+                return False
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+            # Remove the least recently used entries if the cache is
+            # too big
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return True
+
+    def get_or_load(self,
+                    key: Hashable,
+                    loader: Callable[[], Any]) -> Any:
+        """ Method to retrieve a value from the cache. If the value is
+            not in the cache (or expired), the 'loader' is called to
+            retrieve the value and the result is cached, unless the
+            cache was invalidated while the value was loaded.
+
+            Parameters
+            ----------
+            key : Hashable
+                The key of the entry.
+
+            loader : Callable[[], Any]
+                Callable that returns the value to cache.
+
+            Returns
+            -------
+            Any
+                The cached or loaded value.
+        """
+        version = self.version
+        found, value = self.get(key)
+        if found:
+            return value
+
+        # Not found; load it outside of the lock so other threads can
+        # still use the cache
+        value = loader()
+        self.set(key, value, version)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """ Method to remove one, or all, entries from the cache. The
+            version of the cache is raised, so users of the cache can
+            see that the content has changed.
+
+            Parameters
+            ----------
+            key : Optional[Hashable]
+                The key to remove. If not given, the complete cache is
+                cleared.
+
+            Returns
+            -------
+            None
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self.version += 1
+
+    def statistics(self) -> dict:
+        """ Method that returns statistics for the cache, like the
+            amount of hits and misses.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            dict
+                The requested statistics
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'version': self.version
+            }
+# ---------------------------------------------------------------------
@@ -2,22 +2,36 @@
     Module that contains the static 'ConfigLoader' class. This is a
     class with only class-methods.
 """
-import collections
+import collections.abc
+import glob
+import hashlib
+import json
 import os
 import re
+import stat
+import tempfile
+import threading
 from logging import getLogger
 # ---------------------------------------------------------------------
 # Imports
 from os import environ
-from typing import Dict, Optional
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Union
 import yaml
-from yaml.scanner import ScannerError
 from config_loader.exceptions import (ConfigFileNotFoundError,
                                       ConfigFileNotValidError,
                                       EnvironmentAlreadySetError,
                                       EnvironmentNotSetError)
 # ---------------------------------------------------------------------
 
+# Use the YAML parser of libyaml, if it is installed
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# The pattern for environment variables in values
+ENVIRONMENT_VARIABLE = re.compile(r"\$\{env:([a-zA-Z0-9_]+)\}")
+ENVIRONMENT_VARIABLE_PREFIX = '${env:'
+# ---------------------------------------------------------------------
+
 
 class ConfigLoader:
     """ The ConfigLoader class enables the user to load configuration
@@ -29,12 +43,32 @@ class ConfigLoader:
     # Class variable for the file that is going to be used
     yaml_file: Optional[str] = None
 
-    # The actual config
-    config: dict = dict()
+    # The actual config. This is an immutable mapping that is replaced
+    # as a whole when the configuration is reloaded.
+    config: Mapping = MappingProxyType({})
 
     # Boolean that keeps track if the config is loaded
     is_loaded: bool = False
 
+    # The directory for the compiled configurations. The merged
+    # configuration is stored per file content and environment, so
+    # other processes don't have to parse the YAML file again. The
+    # cache is disabled unless a directory is given; it should be a
+    # private directory, because the configuration can contain
+    # secrets.
+    cache_directory: Optional[str] = environ.get('CONFIG_CACHE_DIR')
+
+    # The callables that validate a new configuration before it is
+    # used and the callables that are notified when it is used
+    validators: List[Callable[[Mapping], None]] = []
+    subscribers: List[Callable[[Mapping, Mapping], None]] = []
+
+    # The thread that watches the file for changes
+    _watcher: Optional[threading.Thread] = None
+    _watch_interval: Optional[float] = None
+    _watch_stop = threading.Event()
+    _reload_lock = threading.Lock()
+
     @classmethod
     def set_file(cls, yaml_file: str) -> None:
         """
@@ -106,49 +140,7 @@ class ConfigLoader:
                 else:
                     cls.environment = 'production'
 
-            try:
-                # Try to load the file
-                with open(cls.yaml_file) as file_stream:
-                    data = file_stream.read()
-                cls.data = yaml.safe_load(data)
-
-                # We can now merge the configurations. In the configuration
-                # file should be a 'default' key. This key should contain
-                # three settings:
-                #
-                # - environments: a list containing the possible
-                #                 environments
-                # - config: a object with the different settings
-                #
-                # Besides the 'default' key, a key for each environment can
-                # exists. The settings in the object with the key that
-                # matches the 'selected-environment'  will be used to
-                # override the 'default' settings.
-
-                selected_environment = cls.environment
-                if cls.environment is None:
-                    raise EnvironmentNotSetError('Environment is not set')
-
-                cls.config = cls.data['default']['config']
-
-                # Merge the selected environment (if this is defined)
-                if selected_environment in cls.data.keys():
-                    cls.merge_environment(
-                        config=cls.config,
-                        environment=cls.data[selected_environment]
-                    )
-
-                # Loop through the settings and replace all values that
-                # contain a environment variable.
-                cls.set_environment_variables(cls.config)
-            except FileNotFoundError:
-                # File does not exists
-                raise ConfigFileNotFoundError(
-                    f'File {cls.yaml_file} does not exist!')
-            except (ScannerError, KeyError) as err:
-                # File could not be decoded
-                raise ConfigFileNotValidError(
-                    f'Error while loading configfile "{cls.yaml_file}": {err}')
+            cls.config = cls.freeze(cls.read_config())
 
             # Everything went fine
             cls.is_loaded = True
@@ -156,6 +148,424 @@ class ConfigLoader:
         else:
             return True
 
+    @classmethod
+    def read_config(cls) -> dict:
+        """
+            Method to read the configuration for the selected
+            environment from the file.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            dict
+                The configuration.
+        """
+
+        try:
+            # Try to load the file
+            with open(cls.yaml_file, 'rb') as file_stream:
+                data = file_stream.read()
+
+            selected_environment = cls.environment
+            if cls.environment is None:
+                raise EnvironmentNotSetError('Environment is not set')
+
+            # Use the compiled configuration, if this file was
+            # already parsed for this environment. Otherwise, parse
+            # the file and store the compiled configuration. The key
+            # starts with the file and environment, so older versions
+            # can be removed.
+            source = f'{os.path.abspath(cls.yaml_file)}\0' \
+                f'{selected_environment}'.encode()
+            cache_key = hashlib.sha256(source).hexdigest()[:16] + '-' + \
+                hashlib.sha256(data + b'\0' + source).hexdigest()
+            config = cls.load_compiled(cache_key)
+            if config is None:
+                config = cls.compile(data, selected_environment)
+                cls.save_compiled(cache_key, config)
+
+            # Loop through the settings and replace all values that
+            # contain a environment variable. This is done after
+            # the cache, because the environment can differ between
+            # processes.
+            cls.set_environment_variables(config)
+        except FileNotFoundError:
+            # File does not exists
+            raise ConfigFileNotFoundError(
+                f'File {cls.yaml_file} does not exist!')
+        except (yaml.YAMLError, KeyError) as err:
+            # File could not be decoded
+            raise ConfigFileNotValidError(
+                f'Error while loading configfile "{cls.yaml_file}": {err}')
+
+        return config
+
+    @classmethod
+    def freeze(cls, value: Any) -> Any:
+        """
+            Method to create an immutable copy of a configuration.
+            Dicts are converted to read-only mappings and lists to
+            tuples.
+
+            Parameters
+            ----------
+            value : Any
+                The configuration, or a value in it.
+
+            Returns
+            -------
+            Any
+                The immutable copy.
+        """
+
+        if isinstance(value, dict):
+            return MappingProxyType(
+                {key: cls.freeze(item) for key, item in value.items()})
+        if isinstance(value, list):
+            return tuple(cls.freeze(item) for item in value)
+        return value
+
+    @classmethod
+    def reload(cls) -> bool:
+        """
+            Method to load the configuration file again. The new
+            configuration is validated by the registered validators;
+            when it is valid, it replaces the current configuration
+            and the subscribers are notified. When it is not valid,
+            the current configuration stays in use.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            bool
+                True if the new configuration is used, False if it
+                isn't.
+        """
+
+        logger = getLogger('config_loader')
+        with cls._reload_lock:
+            try:
+                config = cls.freeze(cls.read_config())
+                for validator in cls.validators:
+                    validator(config)
+            except Exception as err:
+                logger.error(f'Configuration is not reloaded: {err}')
+                return False
+
+            if config == cls.config:
+                return False
+
+            # Replace the configuration and notify the subscribers
+            previous, cls.config = cls.config, config
+            logger.info(f'Reloaded configuration from "{cls.yaml_file}"')
+            for subscriber in list(cls.subscribers):
+                try:
+                    subscriber(previous, config)
+                except Exception:
+                    logger.exception(
+                        f'Subscriber {subscriber!r} failed to apply the '
+                        'new configuration')
+            return True
+
+    @classmethod
+    def add_validator(cls, validator: Callable[[Mapping], None]) -> None:
+        """
+            Method to register a validator. The validator gets a new
+            configuration before it is used and should raise an
+            exception when the configuration is not valid. A validator
+            is only registered once.
+
+            Parameters
+            ----------
+            validator : Callable[[Mapping], None]
+                The validator.
+
+            Returns
+            -------
+            None
+        """
+
+        if validator not in cls.validators:
+            cls.validators.append(validator)
+
+    @classmethod
+    def subscribe(cls, subscriber: Callable[[Mapping, Mapping], None]
+                  ) -> None:
+        """
+            Method to register a subscriber. The subscriber is called
+            with the previous and the new configuration after the
+            configuration is reloaded. Use `changed` to find out which
+            parts of the configuration changed. A subscriber is only
+            registered once.
+
+            Parameters
+            ----------
+            subscriber : Callable[[Mapping, Mapping], None]
+                The subscriber.
+
+            Returns
+            -------
+            None
+        """
+
+        if subscriber not in cls.subscribers:
+            cls.subscribers.append(subscriber)
+
+    @classmethod
+    def unsubscribe(cls, subscriber: Callable[[Mapping, Mapping], None]
+                    ) -> None:
+        """
+            Method to remove a subscriber.
+
+            Parameters
+            ----------
+            subscriber : Callable[[Mapping, Mapping], None]
+                The subscriber.
+
+            Returns
+            -------
+            None
+        """
+
+        if subscriber in cls.subscribers:
+            cls.subscribers.remove(subscriber)
+
+    @staticmethod
+    def changed(previous: Mapping, config: Mapping, *path: str) -> bool:
+        """
+            Method to check if a part of the configuration changed.
+
+            Parameters
+            ----------
+            previous : Mapping
+                The previous configuration.
+
+            config : Mapping
+                The new configuration.
+
+            *path : str
+                The keys of the part to check, for example 'database'
+                and 'pool'.
+
+            Returns
+            -------
+            bool
+                True if the part changed.
+        """
+
+        for key in path:
+            previous = previous.get(key) if previous is not None else None
+            config = config.get(key) if config is not None else None
+        return previous != config
+
+    @classmethod
+    def start_watching(cls, interval: float = 5.0) -> None:
+        """
+            Method to start a background thread that reloads the
+            configuration when the file changes. The modification
+            time, size and inode of the file are polled, so changes
+            are also noticed when the file is replaced by a symlink
+            swap (like a Kubernetes ConfigMap). The thread is started
+            again in forked child processes.
+
+            Parameters
+            ----------
+            interval : float
+                The amount of seconds between the checks.
+
+            Returns
+            -------
+            None
+        """
+
+        if cls._watch_interval is None:
+            os.register_at_fork(after_in_child=cls._restart_watching)
+        cls._watch_interval = interval
+        if cls._watcher is not None and cls._watcher.is_alive():
+            return
+
+        cls._watch_stop.clear()
+        cls._watcher = threading.Thread(
+            target=cls._watch, name='config-watcher', daemon=True)
+        cls._watcher.start()
+
+    @classmethod
+    def stop_watching(cls) -> None:
+        """
+            Method to stop the thread that watches the file.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+
+        cls._watch_stop.set()
+        if cls._watcher is not None:
+            cls._watcher.join()
+            cls._watcher = None
+
+    @classmethod
+    def _restart_watching(cls) -> None:
+        """ Starts the watcher in a forked child process, because
+            threads don't survive a fork. """
+        cls._reload_lock = threading.Lock()
+        if cls._watcher is not None and not cls._watch_stop.is_set():
+            cls._watcher = None
+            cls.start_watching(cls._watch_interval)
+
+    @classmethod
+    def _watch(cls) -> None:
+        """ Polls the file and reloads the configuration when it
+            changes. """
+
+        def signature() -> Optional[tuple]:
+            try:
+                stat = os.stat(cls.yaml_file)
+            except OSError:
+                return None
+            return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+        last = signature()
+        while not cls._watch_stop.wait(cls._watch_interval):
+            current = signature()
+            if current is not None and current != last:
+                last = current
+                cls.reload()
+
+    @classmethod
+    def compile(cls, data: bytes, environment: str) -> dict:
+        """
+            Method to parse the YAML data and merge the configuration
+            of the environment into the default configuration.
+
+            Parameters
+            ----------
+            data : bytes
+                The contents of the YAML file.
+
+            environment : str
+                The environment to use.
+
+            Returns
+            -------
+            dict
+                The merged configuration.
+        """
+
+        # In the configuration file should be a 'default' key. This key
+        # should contain three settings:
+        #
+        # - environments: a list containing the possible
+        #                 environments
+        # - config: a object with the different settings
+        #
+        # Besides the 'default' key, a key for each environment can
+        # exists. The settings in the object with the key that matches
+        # the 'selected-environment'  will be used to override the
+        # 'default' settings.
+        parsed = yaml.load(data, Loader=SafeLoader)
+        config = parsed['default']['config']
+
+        # Merge the selected environment (if this is defined)
+        if environment in parsed.keys():
+            cls.merge_environment(
+                config=config,
+                environment=parsed[environment]
+            )
+        return config
+
+    @classmethod
+    def load_compiled(cls, cache_key: str) -> Optional[dict]:
+        """
+            Method to load a compiled configuration from the cache.
+
+            Parameters
+            ----------
+            cache_key : str
+                The key of the configuration.
+
+            Returns
+            -------
+            Optional[dict]
+                The configuration, or None if it is not in the cache.
+        """
+
+        if cls.cache_directory is None:
+            return None
+        try:
+            # Only use a cache that is owned by this user and that
+            # can't be changed by others
+            path = os.path.join(cls.cache_directory, f'{cache_key}.json')
+            for checked in (cls.cache_directory, path):
+                status = os.stat(checked)
+                if status.st_uid != os.getuid() or \
+                        status.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+                    return None
+            with open(path, 'r', encoding='utf-8') as cache:
+                config = json.load(cache)
+        except (OSError, ValueError):
+            return None
+        return config if isinstance(config, dict) else None
+
+    @classmethod
+    def save_compiled(cls, cache_key: str, config: dict) -> None:
+        """
+            Method to store a compiled configuration in the cache. The
+            file is replaced atomically, so other processes never read
+            a partial file. Older versions for the same file and
+            environment are removed. Configurations that can't be
+            stored as JSON (like unquoted dates) are not cached.
+
+            Parameters
+            ----------
+            cache_key : str
+                The key of the configuration.
+
+            config : dict
+                The compiled configuration.
+
+            Returns
+            -------
+            None
+        """
+
+        if cls.cache_directory is None:
+            return
+        temporary = None
+        try:
+            data = json.dumps(config)
+            os.makedirs(cls.cache_directory, mode=0o700, exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(
+                dir=cls.cache_directory, suffix='.tmp')
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as cache:
+                cache.write(data)
+            path = os.path.join(cls.cache_directory, f'{cache_key}.json')
+            os.replace(temporary, path)
+            temporary = None
+
+            # Remove the older versions
+            prefix = cache_key.split('-')[0]
+            for stale in glob.glob(os.path.join(
+                    cls.cache_directory, f'{prefix}-*.json')):
+                if stale != path:
+                    os.remove(stale)
+        except (OSError, TypeError, ValueError) as err:
+            getLogger('config_loader').warning(
+                f'Could not store the compiled configuration: {err}')
+        finally:
+            if temporary is not None and os.path.exists(temporary):
+                os.remove(temporary)
+
     @classmethod
     def merge_environment(cls, config: dict, environment: dict) -> None:
         """
@@ -179,7 +589,7 @@ class ConfigLoader:
         for key in environment.keys():
             if key in config \
                     and isinstance(config[key], dict) \
-                    and isinstance(environment[key], collections.Mapping):
+                    and isinstance(environment[key], collections.abc.Mapping):
                 # Recursivly merge
                 cls.merge_environment(config[key], environment[key])
             else:
@@ -187,15 +597,16 @@ class ConfigLoader:
                 config[key] = environment[key]
 
     @classmethod
-    def set_environment_variables(cls, config: dict) -> None:
+    def set_environment_variables(cls, config: Union[dict, list]) -> None:
         """
             Method to replace all values that should be a environment
-            variable.
+            variable. Dicts and lists are walked through recursively;
+            tuples are replaced by a tuple with the replaced values.
 
             Parameters
             ----------
-            config : dict
-                The dict with the variables to replace.
+            config : Union[dict, list]
+                The dict or list with the variables to replace.
 
             Returns
             -------
@@ -207,15 +618,17 @@ class ConfigLoader:
                 variable. """
             return environ[value.groups()[0]]
 
-        for key, value in config.items():
-            if type(value) is dict:
-                # We recursively walk through the dict
+        items = config.items() if type(config) is dict else enumerate(config)
+        for key, value in list(items):
+            if type(value) in (dict, list):
+                # We recursively walk through the dict or list
                 cls.set_environment_variables(value)
-            elif type(value) is str:
+            elif type(value) is tuple:
+                # Tuples can't be changed, so they are replaced
+                values = list(value)
+                cls.set_environment_variables(values)
+                config[key] = tuple(values)
+            elif type(value) is str and ENVIRONMENT_VARIABLE_PREFIX in value:
                 # Not a dict anymore, let's process the value
-                config[key] = re.sub(
-                    r"\$\{env:([a-zA-Z0-9_]+)\}",
-                    parse,
-                    value
-                )
+                config[key] = ENVIRONMENT_VARIABLE.sub(parse, value)
 # ---------------------------------------------------------------------
@@ -1,45 +1,74 @@
 """
     The dashboard application is 'the webserver' for the application.
+    The Flask application is created with `create_app`:
+
+    gunicorn 'dashboard:create_app()' --preload
 """
 # ---------------------------------------------------------------------
 # Imports
-from flask import Flask, Response, render_template
-from typing import Union, Optional
+from flask import (Blueprint, Flask, Response, abort, g, render_template,
+                   request)
+from typing import Any, Mapping, Tuple, Union, Optional
 from rich.logging import RichHandler
 from config_loader import ConfigLoader
 import logging
 import jinja2
-from pregnancy import Pregnancy
-from datetime import date
+from pregnancy import Pregnancy, PregnancySnapshot
+from datetime import date, datetime
+import hashlib
+import mimetypes
+import os
 import random
-from jantje_database.agendaitems import get_agenda_items
+import time
+import jantje_database
+from jantje_database.agendaitems import (get_agenda_rows,
+                                         get_agenda_rows_async,
+                                         get_agenda_version)
+from jantje_database.cache import configure_agenda_cache
+from database import AsyncDatabase, Database, DatabaseSession
+from database.pool_statistics import PoolStatistics
+from dashboard.calendar_feed import CalendarFeed, FeedVersion
+from dashboard.exceptions import ServiceUnavailableError
+from dashboard.profiling import RequestProfiler
+from dashboard.resilience import CircuitBreaker, StaleWhileRevalidate
+from dashboard.response_cache import CachedResponse, ResponseCache
+from dashboard.serialization import agenda_to_list, dumps
+from dashboard.static_files import configure as configure_static_files
+from dashboard.static_files import send_static
+from asset_pipeline import AssetPipeline, ImageVariants
+from asset_pipeline.exceptions import AssetNotFoundError
+from metrics import (RENDER_TIME, REQUEST_LATENCY, cache_observer,
+                     circuit_breaker_observer, export_metrics,
+                     observe_pool_event, stale_observer,
+                     update_pool_metrics)
 # ---------------------------------------------------------------------
-# Load the settings
-if not ConfigLoader.load_settings():
-    raise TypeError(
-        f'Configuration was not yet loaded.')
-
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(name)s: %(message)s',
-    datefmt="[%X]",
-    handlers=[RichHandler()]
-)
-
-# Create a Pregnancy object to track the pregnancy
-preg = Pregnancy(
-    conception_date=ConfigLoader.config['baby']['conception_date'])
-preg.name = ConfigLoader.config['baby']['name']
-
-# Create a logger for the My REST API package
-logger = logging.getLogger(preg.name)
-
-# Create a Flask object
-logger.debug('Creating Flask object')
-flask_app = Flask(__name__, static_folder='../res/img/')
-
-# Configure Jinja2
+
+# Create a logger for the dashboard
+logger = logging.getLogger('dashboard')
+
+# The blueprint with the pages of the dashboard. It is registered on
+# the application by `create_app`.
+blueprint = Blueprint('dashboard', __name__)
+
+# The objects that depend on the configuration. These are set by
+# `create_app`, so importing this module doesn't load the
+# configuration.
+preg: Optional[Pregnancy] = None
+agenda_settings: dict = {}
+agenda_results: Optional[StaleWhileRevalidate] = None
+assets: Optional[AssetPipeline] = None
+images: Optional[ImageVariants] = None
+request_profiler: Optional[RequestProfiler] = None
+calendar_feed: Optional[CalendarFeed] = None
+
+# The subscriber that applies a reloaded configuration to the last
+# created application
+config_subscriber: Optional[Any] = None
+
+# Configure Jinja2. In production, the templates are not reloaded when
+# they change and the compiled templates can be stored in a bytecode
+# cache that is shared between the workers. These settings are set by
+# `create_app`.
 jinja_loader = jinja2.FileSystemLoader(searchpath="./")
 jinja_env = jinja2.Environment(loader=jinja_loader)
 
@@ -61,71 +90,654 @@ def filter_display_date(value: date, show_year: bool = False) -> str:
     return rv
 
 
-# Add filters to Jinja2
+def asset_url(name: str) -> str:
+    """ Jinja function that returns the URL for an asset. """
+    return assets.url_for(name) or name
+
+
+# Add filters and functions to Jinja2
 jinja_env.filters['display_date'] = filter_display_date
+jinja_env.globals['asset_url'] = asset_url
 
 
-# Add the handlers
-@flask_app.route('/', methods=['GET'])
-def index() -> Optional[Union[str, Response]]:
-    """ Main page of the application """
+def precompile_templates() -> None:
+    """ Compiles all HTML templates in the 'res' directory, so the first
+        request of a worker doesn't have to do this. """
+    templates = jinja_env.list_templates(
+        filter_func=lambda name: (
+            name.startswith('res/') and name.endswith('.html')))
+    for template in templates:
+        jinja_env.get_template(template)
+    logger.debug(f'Precompiled {len(templates)} templates')
+
+
+# When the templates are not reloaded, the modification time of the
+# index template doesn't have to be checked on every request. The
+# modification time is read by `create_app`.
+index_template = 'res/html/index.html'
+index_mtime = 0.0
+
+
+def get_index_mtime() -> float:
+    """ Returns the modification time of the index template. """
+    if jinja_env.auto_reload:
+        return os.path.getmtime(index_template)
+    return index_mtime
+
+
+def validate_config(config: Mapping) -> None:
+    """ Validates a reloaded configuration before it is used. Raises a
+        ValueError when a required setting is missing or not valid. """
+    for section, key in (('baby', 'name'), ('baby', 'conception_date'),
+                         ('database', 'server'), ('database', 'username'),
+                         ('database', 'password'), ('database', 'database')):
+        if config.get(section, {}).get(key) is None:
+            raise ValueError(f'Setting "{section}.{key}" is missing')
+    try:
+        datetime.strptime(config['baby']['conception_date'], '%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise ValueError('Setting "baby.conception_date" should be '
+                         'formatted as YYYY-MM-DD')
+
+
+def configure(app: Flask,
+              config: Mapping,
+              previous: Optional[Mapping] = None) -> None:
+    """ Applies the configuration to the application. When the previous
+        configuration is given (after the configuration is reloaded),
+        only the parts that changed are applied, so the caches, the
+        compiled templates and the connections stay warm.
+
+        After a reload, this runs on the thread that watches the
+        configuration while requests are handled. When the database
+        settings change, the engine is replaced: new sessions use the
+        new engine, while the sessions that are in use keep their
+        connection until they are closed; the old pool is closed
+        without closing the connections that are checked out. The
+        async engine of the ASGI application is replaced on its event
+        loop (see `dashboard.asgi.apply_config`).
+
+        Parameters
+        ----------
+        app : Flask
+            The Flask application.
+
+        config : Mapping
+            The configuration.
+
+        previous : Optional[Mapping]
+            The previous configuration, if there is one.
+
+        Returns
+        -------
+        None
+    """
+    global preg, agenda_settings, agenda_results, assets, images
+    global request_profiler
+    global calendar_feed, index_mtime
+
+    def changed(*path: str) -> bool:
+        return previous is None or \
+            ConfigLoader.changed(previous, config, *path)
+
+    dashboard_settings = config.get('dashboard', {})
+
+    # Configure the database (with the agenda cache and mirror), or
+    # only the agenda cache when just that changed
+    if changed('database'):
+        jantje_database.connect()
+        if previous is not None:
+            jantje_database.prewarm()
+    elif changed('cache'):
+        configure_agenda_cache(config.get('cache', {}).get('agenda', {}))
+
+    # Create a Pregnancy object to track the pregnancy
+    if changed('baby'):
+        preg = Pregnancy(conception_date=config['baby']['conception_date'])
+        preg.name = config['baby']['name']
+        page_cache.invalidate()
+        api_cache.invalidate()
+
+    # Get the settings for the agenda on the dashboard. The agenda is
+    # retrieved through a circuit breaker, and the last known good
+    # agenda is served while it is refreshed.
+    if changed('dashboard', 'agenda'):
+        agenda_settings = dashboard_settings.get('agenda', {})
+        breaker_settings = agenda_settings.get('circuit_breaker', {})
+        agenda_results = StaleWhileRevalidate(
+            max_age=agenda_settings.get('refresh_after', 5.0),
+            breaker=CircuitBreaker(
+                'agenda',
+                failure_threshold=breaker_settings.get(
+                    'failure_threshold', 5),
+                latency_budget=breaker_settings.get('latency_budget'),
+                reset_timeout=breaker_settings.get('reset_timeout', 30.0),
+                observer=circuit_breaker_observer('agenda')
+            ),
+            observer=stale_observer('agenda'),
+            load_timeout=agenda_settings.get('load_timeout')
+        )
+        page_cache.invalidate()
+        api_cache.invalidate()
+
+    # Configure Jinja2
+    if changed('dashboard', 'templates'):
+        template_settings = dashboard_settings.get('templates', {})
+        jinja_env.auto_reload = template_settings.get('auto_reload', True)
+        jinja_env.bytecode_cache = None
+        if template_settings.get('bytecode_cache'):
+            os.makedirs(template_settings['bytecode_cache'], exist_ok=True)
+            jinja_env.bytecode_cache = jinja2.FileSystemBytecodeCache(
+                template_settings['bytecode_cache'])
+
+        # Compile the templates when the application is created
+        if template_settings.get('precompile', False):
+            precompile_templates()
+        index_mtime = os.path.getmtime(index_template)
+
+    # Load the built assets. When the assets are not built (for example
+    # during development), the unbuilt files are used.
+    if changed('dashboard', 'assets'):
+        assets = AssetPipeline(
+            dashboard_settings.get('assets', {}).get('directory',
+                                                     'res/dist'))
+        if not assets.load_manifest():
+            logger.warning('Assets are not built; serving unbuilt assets')
+        page_cache.invalidate()
+
+    # Create the object that creates the variants of the images
+    if changed('dashboard', 'images'):
+        image_settings = dashboard_settings.get('images', {})
+        images = ImageVariants(
+            source_dir='res/img',
+            cache_dir=image_settings.get('directory', 'res/dist/img'),
+            widths=image_settings.get('widths', (200, 400, 800))
+        )
+
+    # Create the profiler for single requests
+    if changed('dashboard', 'profiling'):
+        request_profiler = RequestProfiler(
+            dashboard_settings.get('profiling', {}))
+
+    # Create the iCalendar feed of the agenda
+    if changed('dashboard', 'calendar'):
+        calendar_feed = CalendarFeed(
+            domain=dashboard_settings.get('calendar', {}).get(
+                'domain', 'jantje'),
+            observer=cache_observer('calendar')
+        )
+
+    # Configure the serving of static files
+    if changed('dashboard', 'static'):
+        configure_static_files(app, dashboard_settings.get('static', {}))
+
+
+def create_app() -> Flask:
+    """ Creates the Flask application. Loads the configuration and
+        configures the objects that depend on it. The database engine
+        is created when it is first used, so the application can be
+        created before the worker processes are forked. When
+        'config_reload.enabled' is set, the configuration file is
+        watched and changes are applied without a restart.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        Flask
+            The Flask application.
+    """
+
+    global config_subscriber
+
+    # Load the settings
+    if not ConfigLoader.load_settings():
+        raise TypeError(
+            f'Configuration was not yet loaded.')
+
+    # Configure logging
+    logging.basicConfig(
+        level=logging.DEBUG,
+        format='%(name)s: %(message)s',
+        datefmt="[%X]",
+        handlers=[RichHandler()]
+    )
+
+    # Export the events of the connection pools
+    PoolStatistics.add_observer(observe_pool_event)
+
+    # Create a Flask object
+    logger.debug('Creating Flask object')
+    app = Flask(__name__, static_folder='../res/img/')
+    configure(app, ConfigLoader.config)
+
+    # Apply changes of the configuration file. Only the last created
+    # application is subscribed, because the configured objects are
+    # shared.
+    reload_settings = ConfigLoader.config.get('config_reload', {})
+    if reload_settings.get('enabled', False):
+        def apply_config(previous: Mapping, config: Mapping) -> None:
+            configure(app, config, previous)
+
+        ConfigLoader.add_validator(validate_config)
+        if config_subscriber is not None:
+            ConfigLoader.unsubscribe(config_subscriber)
+        config_subscriber = apply_config
+        ConfigLoader.subscribe(config_subscriber)
+        ConfigLoader.start_watching(reload_settings.get('interval', 5.0))
+
+    # Add the pages
+    app.register_blueprint(blueprint)
+    app.teardown_appcontext(end_session_scope)
+    return app
+
+
+def __getattr__(name: str) -> Any:
+    """ Creates the application when `flask_app` is first used, so
+        `dashboard:flask_app` can still be used to run the application.
+    """
+    if name == 'flask_app':
+        global flask_app
+        flask_app = create_app()
+        return flask_app
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+# Create caches for the rendered pages and the API responses
+page_cache = ResponseCache(observer=cache_observer('page'))
+api_cache = ResponseCache(max_size=64, observer=cache_observer('api'))
+
+# The columns of the agendaitems that are used by the main page and by
+# the API and the iCalendar feed
+PAGE_COLUMNS = ('datetime', 'description')
+API_COLUMNS = ('id', 'datetime', 'all_day', 'description')
+
+# The maximum amount of days for the timeline API
+MAX_TIMELINE_DAYS = 3660
+
+
+def get_status(snapshot: PregnancySnapshot) -> dict:
+    """ Returns the status of the pregnancy as it is shown on the main
+        page. """
+    return {
+        'name': preg.name,
+        'weeks': snapshot.age_in_weeks,
+        'days': snapshot.age_in_days % 7,
+        'due': snapshot.due_date,
+        'trimester': snapshot.trimester,
+        'pregnancy_week': snapshot.week,
+        'progress': {
+            'trimester': snapshot.trimester_percentage,
+            'pregnancy': int(round(snapshot.percentage, 0))
+        }
+    }
+
+
+def get_dashboard_agenda_filters() -> dict:
+    """ Returns the filters for the agendaitems on the dashboard. """
+    return {
+        'upcoming': agenda_settings.get('upcoming', False),
+        'limit': agenda_settings.get('limit'),
+        'ascending': agenda_settings.get('ascending', False)
+    }
+
+
+def get_agenda_digest(rows: list) -> str:
+    """ Returns a digest of the agendaitems. Unlike the version of the
+        agenda, the digest also changes when the agendaitems are
+        changed by another process, so it is used to key everything
+        that is rendered from the agendaitems. """
+    return hashlib.sha1(repr(rows).encode()).hexdigest()
+
+
+def get_agenda(columns: tuple = API_COLUMNS,
+               **filters: Any) -> Tuple[str, list]:
+    """ Returns the digest and the requested columns of the agendaitems
+        that match the filters. All agenda consumers
+        should use this, or `get_agenda_async`: the last known good
+        agenda is returned while it is refreshed in the background and
+        while the circuit breaker is open, so a slow database doesn't
+        slow down the dashboard. """
+
+    def load() -> Tuple[str, list]:
+        rows = get_agenda_rows(columns, **filters)
+        return get_agenda_digest(rows), rows
+
+    return agenda_results.get(
+        (columns, ) + tuple(sorted(filters.items())), load,
+        get_agenda_version())
+
+
+async def get_agenda_async(columns: tuple = API_COLUMNS,
+                           **filters: Any) -> Tuple[str, list]:
+    """ The asyncio variant of `get_agenda`; the agendaitems are
+        retrieved with the `AsyncDatabase`. """
+
+    async def load() -> Tuple[str, list]:
+        rows = await get_agenda_rows_async(columns, **filters)
+        return get_agenda_digest(rows), rows
+
+    return await agenda_results.get_async(
+        (columns, ) + tuple(sorted(filters.items())), load,
+        get_agenda_version())
+
+
+def get_dashboard_agenda(columns: tuple = API_COLUMNS) -> Tuple[str, list]:
+    """ Returns the digest and the requested columns of the agendaitems
+        for the dashboard. """
+    return get_agenda(columns, **get_dashboard_agenda_filters())
+
+
+async def get_dashboard_agenda_async(
+        columns: tuple = API_COLUMNS) -> Tuple[str, list]:
+    """ The asyncio variant of `get_dashboard_agenda`. """
+    return await get_agenda_async(columns, **get_dashboard_agenda_filters())
+
+
+def render_index(snapshot: PregnancySnapshot,
+                 dates: list,
+                 show_random: bool) -> str:
+    """ Renders the main page of the application """
 
     # Set a object for the template
     data = {
-        'baby': {
-            'name': preg.name,
-            'weeks': preg.age_in_weeks,
-            'days': preg.age_in_days % 7,
-            'due': preg.due_date,
-            'trimester': preg.trimester,
-            'pregnancy_week': preg.week,
-            'progress': {
-                'trimester':
-                    int((preg.trimester_days[0] /
-                        preg.trimester_days[1]) * 100),
-                'pregnancy': int(round((preg.age_in_days / 280) * 100, 0))
-            }
-        },
-        'dates': get_agenda_items(),
-        'random': random.randint(1, 100) % 2 == 0
+        'baby': get_status(snapshot),
+        'dates': dates,
+        'random': show_random
     }
 
     # Render the template
-    template = jinja_env.get_template('res/html/index.html')
+    template = jinja_env.get_template(index_template)
+    with RENDER_TIME.labels('index.html').time():
+        return template.render(data)
+
+
+def get_index_page(dates: list,
+                   digest: Optional[str] = None) -> CachedResponse:
+    """ Returns the main page of the application. The page only changes
+        when the day, the agendaitems or the template changes, so the
+        rendered page is cached on these values. The 'random' flag has
+        only two values, so both variants are cached. The digest of
+        the agendaitems is calculated when it is not given. """
+    show_random = random.randint(1, 100) % 2 == 0
+    snapshot = preg.snapshot()
+
+    # Get the rendered page from the cache, or render it
+    key = (
+        snapshot.date,
+        get_agenda_digest(dates) if digest is None else digest,
+        get_index_mtime(),
+        show_random
+    )
+    return page_cache.get_or_render(
+        key, lambda: render_index(snapshot, dates, show_random))
+
+
+def get_status_document() -> CachedResponse:
+    """ Returns the status of the pregnancy as JSON. The status only
+        changes once a day, so the serialized status is cached per
+        day. """
+    snapshot = preg.snapshot()
+    return api_cache.get_or_render(
+        ('status', snapshot.date, preg.name),
+        lambda: dumps(get_status(snapshot))
+    )
+
+
+def get_agenda_document(dates: list,
+                        digest: Optional[str] = None) -> CachedResponse:
+    """ Returns the agendaitems as JSON. The serialized agenda is cached
+        per digest of the agendaitems; the digest is calculated when it
+        is not given. """
+    return api_cache.get_or_render(
+        ('agenda', get_agenda_digest(dates) if digest is None else digest),
+        lambda: dumps(agenda_to_list(dates))
+    )
+
+
+def refresh_pool_metrics() -> None:
+    """ Updates the metrics with the connections in the pools of the
+        database and, when it is used, the async database. """
+    update_pool_metrics(Database.get_pool_statistics())
+    if AsyncDatabase._engine is not None:
+        update_pool_metrics(AsyncDatabase.get_pool_statistics(), 'async')
+
+
+def parse_date(value: Optional[str]) -> Optional[date]:
+    """ Converts a YYYY-MM-DD string to a date. """
+    if value is None:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+@blueprint.before_app_request
+def start_request_timer() -> None:
+    """ Saves the start time of the request for the metrics, starts a
+        scope for the query profiler and starts the sampling profiler
+        if this request should be profiled. Also starts the scope in
+        which the read-only database sessions share one connection. """
+    g.request_start = time.perf_counter()
+    g.session_scope = DatabaseSession.start_scope()
+    if Database.profiler is not None:
+        g.query_scope = Database.profiler.start_scope(
+            f'{request.method} {request.path}')
+    if request_profiler.enabled and \
+            request_profiler.should_profile(request):
+        g.profiler = request_profiler.start()
+
+
+@blueprint.after_app_request
+def observe_request(response: Response) -> Response:
+    """ Adds the duration of the request to the metrics. """
+    if 'request_start' in g:
+        REQUEST_LATENCY.labels(
+            request.url_rule.rule if request.url_rule else 'unmatched',
+            request.method,
+            response.status_code
+        ).observe(time.perf_counter() - g.request_start)
+    refresh_pool_metrics()
+
+    # Add the amount of statements of this request to the response
+    if Database.profiler is not None:
+        scope = Database.profiler.get_scope()
+        if scope is not None:
+            response.headers['X-Query-Count'] = str(scope.count)
+    return response
+
+
+@blueprint.teardown_app_request
+def end_query_scope(exception: Optional[BaseException]) -> None:
+    """ Ends the scope of the query profiler and the sampling profiler
+        for this request. """
+    if 'query_scope' in g:
+        Database.profiler.end_scope(g.pop('query_scope'))
+    if 'profiler' in g:
+        request_profiler.finish(
+            g.pop('profiler'), f'{request.method} {request.path}')
+
+
+def end_session_scope(exception: Optional[BaseException]) -> None:
+    """ Closes the shared database session of the request. Registered
+        on the application context by `create_app`. """
+    if 'session_scope' in g:
+        DatabaseSession.end_scope(g.pop('session_scope'))
+
+
+@blueprint.app_errorhandler(ServiceUnavailableError)
+def service_unavailable(error: ServiceUnavailableError) -> Response:
+    """ Responds with '503 Service Unavailable' when there is no known
+        good result while the circuit breaker is open, or when it takes
+        too long to load it. """
     return Response(
-        template.render(data),
+        'Service Unavailable', status=503, content_type='text/plain',
+        headers={'Retry-After': str(int(error.retry_after))})
+
+
+# Add the handlers
+@blueprint.route('/', methods=['GET'])
+def index() -> Optional[Union[str, Response]]:
+    """ Main page of the application """
+    digest, dates = get_dashboard_agenda(PAGE_COLUMNS)
+    return get_index_page(dates, digest).to_response(
+        request,
         content_type='text/html; charset=utf-8'
     )
 
 
-@flask_app.route('/style.css', methods=['GET'])
+@blueprint.route('/api/status', methods=['GET'])
+def api_status() -> Optional[Union[str, Response]]:
+    """ The status of the pregnancy as JSON """
+    return get_status_document().to_response(
+        request,
+        content_type='application/json'
+    )
+
+
+@blueprint.route('/api/agenda', methods=['GET'])
+def api_agenda() -> Optional[Union[str, Response]]:
+    """ The agendaitems of the dashboard as JSON """
+    digest, dates = get_dashboard_agenda()
+    return get_agenda_document(dates, digest).to_response(
+        request,
+        content_type='application/json'
+    )
+
+
+@blueprint.route('/agenda.ics', methods=['GET'])
+def agenda_feed() -> Optional[Union[str, Response]]:
+    """ The agenda as iCalendar feed, for calendar applications. The
+        feed is kept with the other agenda results, so a poll doesn't
+        retrieve the agendaitems. """
+    name = preg.name
+
+    def load() -> Tuple[str, FeedVersion]:
+        feed = calendar_feed.get(
+            name, get_agenda_rows(API_COLUMNS, ascending=True))
+        return feed.etag, feed
+
+    _, feed = agenda_results.get(('feed', name), load, get_agenda_version())
+    return calendar_feed.to_response(name, feed, request)
+
+
+@blueprint.route('/api/timeline', methods=['GET'])
+def api_timeline() -> Optional[Union[str, Response]]:
+    """ The progress of the pregnancy for every day in a range of days,
+        as JSON with a list per value. The range can be given with the
+        'start' and 'end' parameters (YYYY-MM-DD); the default range is
+        from the conception until the due date. """
+    try:
+        start = parse_date(request.args.get('start'))
+        end = parse_date(request.args.get('end'))
+        timeline_range = (
+            start or preg.conception_date,
+            end or preg.due_date
+        )
+    except ValueError:
+        abort(400, 'Dates should be formatted as YYYY-MM-DD')
+
+    days = (timeline_range[1] - timeline_range[0]).days + 1
+    if not 0 < days <= MAX_TIMELINE_DAYS:
+        abort(400, f'The range should be 1 to {MAX_TIMELINE_DAYS} days')
+
+    response = api_cache.get_or_render(
+        ('timeline', preg.conception_date) + timeline_range,
+        lambda: dumps(preg.timeline(*timeline_range).to_dict())
+    )
+    return response.to_response(
+        request,
+        content_type='application/json'
+    )
+
+
+@blueprint.route('/metrics', methods=['GET'])
+def metrics() -> Optional[Union[str, Response]]:
+    """ The metrics of all workers in the Prometheus format """
+    body, content_type = export_metrics()
+    return Response(body, content_type=content_type)
+
+
+@blueprint.route('/style.css', methods=['GET'])
 def style() -> Optional[Union[str, Response]]:
-    """ CSS File """
-    template = jinja_env.get_template('res/css/style.css')
-    return Response(
-        template.render(),
-        content_type='text/css; charset=utf-8'
+    """ CSS File; only used when the assets are not built """
+    return send_static(
+        os.path.abspath('res/css/style.css'),
+        mimetype='text/css'
     )
 
 
-@flask_app.route('/script.js', methods=['GET'])
+@blueprint.route('/script.js', methods=['GET'])
 def script() -> Optional[Union[str, Response]]:
-    """ JS File """
-    template = jinja_env.get_template('res/js/script.js')
-    return Response(
-        template.render(),
-        content_type='text/javascript; charset=utf-8'
+    """ JS File; only used when the assets are not built """
+    return send_static(
+        os.path.abspath('res/js/script.js'),
+        mimetype='text/javascript'
+    )
+
+
+@blueprint.route('/assets/<filename>', methods=['GET'])
+def asset(filename: str) -> Optional[Union[str, Response]]:
+    """ Built asset. The filename contains the hash of the content, so
+        the file can be cached forever. The precompressed variant that
+        fits the 'Accept-Encoding' of the client best is returned. """
+    encodings = [
+        encoding for encoding in ('br', 'gzip')
+        if request.accept_encodings.quality(encoding) > 0
+    ]
+    try:
+        path, encoding = assets.resolve(filename, encodings)
+    except AssetNotFoundError:
+        abort(404)
+
+    headers = {
+        'Vary': 'Accept-Encoding',
+        'Cache-Control': 'public, max-age=31536000, immutable'
+    }
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+    return send_static(
+        path,
+        mimetype=mimetypes.guess_type(filename)[0],
+        headers=headers
+    )
+
+
+def send_image(name: str) -> Response:
+    """ Sends a variant of an image. The format is negotiated using the
+        'Accept' header and the width can be requested with the 'w'
+        query parameter. """
+    accepted = [
+        mimetype for mimetype, quality in request.accept_mimetypes
+        if quality > 0
+    ]
+    try:
+        path, mimetype = images.get(
+            name,
+            request.args.get('w', type=int),
+            images.negotiate(accepted)
+        )
+    except AssetNotFoundError:
+        abort(404)
+
+    return send_static(
+        path,
+        mimetype=mimetype,
+        headers={
+            'Vary': 'Accept',
+            'Cache-Control': 'public, max-age=86400'
+        }
     )
 
 
-@flask_app.route('/boss-baby.png', methods=['GET'])
+@blueprint.route('/boss-baby.png', methods=['GET'])
 def avatar_male() -> Optional[Union[str, Response]]:
     """ Image """
-    return flask_app.send_static_file('boss-baby.png')
+    return send_image('boss-baby.png')
 
 
-@flask_app.route('/agnes.png', methods=['GET'])
+@blueprint.route('/agnes.png', methods=['GET'])
 def avatar_female() -> Optional[Union[str, Response]]:
     """ Image """
-    return flask_app.send_static_file('agnes.png')
+    return send_image('agnes.png')
 # ---------------------------------------------------------------------
@@ -0,0 +1,200 @@
+"""
+    The ASGI application for the dashboard. The pages that need the
+    database are served with async handlers that use the
+    `AsyncDatabase`, so one worker can handle a lot of requests that
+    are waiting for the database. All other requests are passed to the
+    Flask application.
+
+    Run it with an ASGI server, for example:
+
+    gunicorn 'dashboard.asgi:create_asgi_app()' \
+        -k uvicorn.workers.UvicornWorker
+"""
+# ---------------------------------------------------------------------
+# Imports
+import asyncio
+import time
+from typing import Any, Mapping, Optional
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.wsgi import WSGIMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+import jantje_database
+from config_loader import ConfigLoader
+from database import AsyncDatabase
+from dashboard import (API_COLUMNS, PAGE_COLUMNS, create_app,
+                       get_agenda_document, get_dashboard_agenda_async,
+                       get_index_page, get_status_document, logger,
+                       refresh_pool_metrics)
+from dashboard.exceptions import ServiceUnavailableError
+from dashboard.response_cache import CachedResponse
+from metrics import REQUEST_LATENCY
+# ---------------------------------------------------------------------
+
+# The event loop that uses the async engine; set when the worker starts
+event_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def to_response(cached: CachedResponse,
+                request: Request,
+                content_type: str,
+                cache_control: str = 'no-cache') -> Response:
+    """ Creates a Starlette response for a cached response. If the
+        client already has this version, a '304 Not Modified' is
+        returned. Starlette adds the charset to 'text/' content types.
+    """
+    headers = {
+        'ETag': f'"{cached.etag}"',
+        'Cache-Control': cache_control
+    }
+    if cached.matches(request.headers.get('if-none-match')):
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type=content_type, headers=headers)
+
+
+async def service_unavailable(request: Request,
+                              error: ServiceUnavailableError) -> Response:
+    """ Responds with '503 Service Unavailable' when there is no known
+        good result while the circuit breaker is open, or when it takes
+        too long to load it. """
+    return Response(
+        'Service Unavailable', status_code=503, media_type='text/plain',
+        headers={'Retry-After': str(int(error.retry_after))})
+
+
+async def index(request: Request) -> Response:
+    """ Main page of the application """
+    digest, dates = await get_dashboard_agenda_async(PAGE_COLUMNS)
+    return to_response(
+        get_index_page(dates, digest),
+        request,
+        content_type='text/html'
+    )
+
+
+async def api_status(request: Request) -> Response:
+    """ The status of the pregnancy as JSON """
+    return to_response(
+        get_status_document(),
+        request,
+        content_type='application/json'
+    )
+
+
+async def api_agenda(request: Request) -> Response:
+    """ The agendaitems of the dashboard as JSON """
+    digest, dates = await get_dashboard_agenda_async(API_COLUMNS)
+    return to_response(
+        get_agenda_document(dates, digest),
+        request,
+        content_type='application/json'
+    )
+
+
+async def observe_request(request: Request, call_next) -> Response:
+    """ Adds the duration of the requests that are handled by the async
+        handlers, and the state of the connection pools, to the
+        metrics. The other requests are measured by the Flask
+        application. """
+    start = time.perf_counter()
+    response = await call_next(request)
+    if request.url.path in ASYNC_ROUTES:
+        REQUEST_LATENCY.labels(
+            request.url.path, request.method, response.status_code
+        ).observe(time.perf_counter() - start)
+        refresh_pool_metrics()
+    return response
+
+
+async def startup() -> None:
+    """ Creates the async engine in the event loop of the worker. """
+    global event_loop
+    logger.debug('Creating async database engine')
+    event_loop = asyncio.get_running_loop()
+    jantje_database.connect_async()
+    ConfigLoader.subscribe(apply_config)
+
+
+async def shutdown() -> None:
+    """ Closes the connections of the async engine. """
+    ConfigLoader.unsubscribe(apply_config)
+    await AsyncDatabase.dispose()
+
+
+async def reconnect_async() -> None:
+    """ Replaces the async engines with engines for the current
+        settings. The old pools are closed; connections that are in
+        use are closed when they are returned. """
+    previous = AsyncDatabase.get_engines()
+    try:
+        jantje_database.connect_async()
+    except Exception as e:
+        logger.error(f'Couldn\'t reconnect the async database: {e!r}')
+        return
+    for engine in previous:
+        await engine.dispose()
+    logger.info('Reconnected the async database')
+
+
+def apply_config(previous: Mapping, config: Mapping) -> None:
+    """ Reconnects the async database when the database settings are
+        changed. Called on the thread that watches the configuration,
+        so the engines are replaced on the event loop of the worker.
+    """
+    if event_loop is not None and \
+            ConfigLoader.changed(previous, config, 'database'):
+        asyncio.run_coroutine_threadsafe(reconnect_async(), event_loop)
+
+
+# The routes that are handled by the async handlers
+ASYNC_ROUTES = {
+    '/': index,
+    '/api/status': api_status,
+    '/api/agenda': api_agenda
+}
+
+
+def create_asgi_app() -> Starlette:
+    """ Creates the ASGI application. The Flask application is created
+        for the requests that are not handled by the async handlers.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        Starlette
+            The ASGI application.
+    """
+    return Starlette(
+        routes=[
+            Route(path, handler, methods=['GET'])
+            for path, handler in ASYNC_ROUTES.items()
+        ] + [
+            Mount('/', WSGIMiddleware(create_app()))
+        ],
+        middleware=[
+            Middleware(BaseHTTPMiddleware, dispatch=observe_request)
+        ],
+        exception_handlers={
+            ServiceUnavailableError: service_unavailable
+        },
+        on_startup=[startup],
+        on_shutdown=[shutdown]
+    )
+
+
+def __getattr__(name: str) -> Any:
+    """ Creates the application when `asgi_app` is first used, so
+        `dashboard.asgi:asgi_app` can still be used to run the
+        application. """
+    if name == 'asgi_app':
+        global asgi_app
+        asgi_app = create_asgi_app()
+        return asgi_app
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+# ---------------------------------------------------------------------
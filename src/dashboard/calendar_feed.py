@@ -0,0 +1,214 @@
+"""
+    Module that contains the 'CalendarFeed' class. This class serves
+    the agenda as iCalendar feed, so calendar applications can
+    subscribe to it. The feed is encoded once per version of the
+    agenda and streamed while it is encoded.
+"""
+# ---------------------------------------------------------------------
+# Imports
+import hashlib
+from datetime import datetime, timezone
+from typing import Callable, Iterator, List, Optional
+from flask import Request, Response
+from cache import TTLCache
+from jantje_database.ical import iter_calendar
+from jantje_database_model import AgendaItem
+# ---------------------------------------------------------------------
+
+
+class FeedVersion:
+    """ Class that represents one version of the feed; the items, the
+        weak ETag, the creation time and, once it is encoded, the
+        body. """
+
+    __slots__ = ('items', 'etag', 'stamp', 'body')
+
+    def __init__(self,
+                 items: List[AgendaItem],
+                 etag: str,
+                 stamp: datetime) -> None:
+        """ Sets the default values.
+
+            Parameters
+            ----------
+            items : List[AgendaItem]
+                The agendaitems in the feed.
+
+            etag : str
+                The ETag of the contents of the feed.
+
+            stamp : datetime
+                The moment the contents last changed in this process,
+                in UTC; used as creation time of the events.
+
+            Returns
+            -------
+            None
+        """
+        self.items = items
+        self.etag = etag
+        self.stamp = stamp
+        self.body: Optional[bytes] = None
+
+
+class CalendarFeed:
+    """ Class that creates and caches the iCalendar feed. The ETag is
+        calculated from the agendaitems instead of the encoded feed,
+        so it is known before the feed is encoded and it is the same
+        in all workers. The agenda has no modification times, so no
+        'Last-Modified' header is sent: it would differ between the
+        workers. The creation time of the events does differ, which is
+        why the ETag is weak. """
+
+    def __init__(self,
+                 domain: str = 'jantje',
+                 chunk_size: int = 16384,
+                 observer: Optional[Callable[[bool], None]] = None
+                 ) -> None:
+        """ Sets the default values.
+
+            Parameters
+            ----------
+            domain : str
+                The domain for the unique IDs of the events.
+
+            chunk_size : int
+                The minimal size of the chunks that are streamed.
+
+            observer : Optional[Callable[[bool], None]]
+                Callable that is called for every lookup in the cache
+                with True for a hit and False for a miss.
+
+            Returns
+            -------
+            None
+        """
+        self.domain = domain
+        self.chunk_size = chunk_size
+        self._cache = TTLCache(ttl=86400, max_size=4, observer=observer)
+        self._last: Optional[FeedVersion] = None
+
+    def get(self, name: str, items: List[AgendaItem]) -> FeedVersion:
+        """ Method that returns the feed for the agendaitems. The feed
+            is cached on the digest of the agendaitems, so it is
+            created again when they are changed by any process.
+
+            Parameters
+            ----------
+            name : str
+                The name of the calendar.
+
+            items : List[AgendaItem]
+                The agendaitems in the feed.
+
+            Returns
+            -------
+            FeedVersion
+                The feed.
+        """
+        etag = self._digest(name, items)
+        return self._cache.get_or_load(
+            (name, etag), lambda: self._create(items, etag))
+
+    @staticmethod
+    def _digest(name: str, items: List[AgendaItem]) -> str:
+        """ Returns the digest of the contents of the feed; used as
+            ETag. """
+        digest = hashlib.sha1(name.encode())
+        for item in items:
+            digest.update(
+                f'\0{item.id}\0{item.datetime.isoformat()}\0'
+                f'{int(item.all_day)}\0{item.description}'.encode())
+        return digest.hexdigest()
+
+    def _create(self, items: List[AgendaItem], etag: str) -> FeedVersion:
+        """ Creates a version of the feed. When the contents didn't
+            change, the creation time of the previous version is
+            kept. """
+        last = self._last
+        if last is not None and last.etag == etag:
+            stamp = last.stamp
+        else:
+            stamp = datetime.now(timezone.utc).replace(microsecond=0)
+        self._last = FeedVersion(items, etag, stamp)
+        return self._last
+
+    def iter_body(self, name: str, feed: FeedVersion) -> Iterator[bytes]:
+        """ Method that yields the encoded feed in chunks. The first
+            time, the feed is encoded while it is streamed and stored
+            for the next requests.
+
+            Parameters
+            ----------
+            name : str
+                The name of the calendar.
+
+            feed : FeedVersion
+                The feed.
+
+            Returns
+            -------
+            Iterator[bytes]
+                The chunks of the feed.
+        """
+        if feed.body is not None:
+            yield feed.body
+            return
+
+        chunks = []
+        buffer = []
+        size = 0
+        for part in iter_calendar(feed.items, name, self.domain,
+                                  stamp=feed.stamp):
+            buffer.append(part.encode())
+            size += len(buffer[-1])
+            if size >= self.chunk_size:
+                chunks.append(b''.join(buffer))
+                yield chunks[-1]
+                buffer = []
+                size = 0
+        chunks.append(b''.join(buffer))
+        yield chunks[-1]
+        feed.body = b''.join(chunks)
+
+    def to_response(self,
+                    name: str,
+                    feed: FeedVersion,
+                    request: Request,
+                    cache_control: str = 'no-cache') -> Response:
+        """ Method that creates a streamed response for the feed. If the
+            client already has this version, a '304 Not Modified' is
+            returned and the feed is not encoded.
+
+            Parameters
+            ----------
+            name : str
+                The name of the calendar.
+
+            feed : FeedVersion
+                The feed.
+
+            request : Request
+                The request; used for the conditional headers.
+
+            cache_control : str
+                The value of the 'Cache-Control' header.
+
+            Returns
+            -------
+            Response
+                The response.
+        """
+        response = Response(
+            self.iter_body(name, feed),
+            content_type='text/calendar; charset=utf-8',
+            headers={'Cache-Control': cache_control}
+        )
+        response.set_etag(feed.etag, weak=True)
+
+        # Werkzeug would read the whole stream to set the length
+        response.automatically_set_content_length = False
+        if feed.body is not None:
+            response.content_length = len(feed.body)
+        return response.make_conditional(request)
+# ---------------------------------------------------------------------
@@ -0,0 +1,31 @@
+"""
+    Exceptions for the 'dashboard' package.
+"""
+# ---------------------------------------------------------------------
+
+
+class DashboardError(Exception):
+    """ Base exception for Dashboard-exceptions. """
+    pass
+
+
+class ServiceUnavailableError(DashboardError):
+    """ Base exception for requests that can't be served right now; the
+        client can try again after 'retry_after' seconds. """
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(ServiceUnavailableError):
+    """ Exception that occurs when a call is refused because the
+        circuit breaker is open. """
+    pass
+
+
+class LoadTimeoutError(ServiceUnavailableError):
+    """ Exception that occurs when loading a result takes longer than
+        the timeout. """
+    pass
+# ---------------------------------------------------------------------
@@ -0,0 +1,209 @@
+"""
+    Module with the profiler for single requests. A request is profiled
+    when it carries the configured token in the 'X-Profile' header, or
+    when it is picked by random sampling. The token is not accepted as
+    query parameter, because URLs end up in access logs. The profile
+    is written in the collapsed stack format, which can be opened with
+    speedscope or converted to a flamegraph with `flamegraph.pl`.
+"""
+# ---------------------------------------------------------------------
+# Imports
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from logging import getLogger
+from typing import Optional
+from flask import Request
+# ---------------------------------------------------------------------
+
+
+class SamplingProfiler:
+    """ Statistical profiler that samples the stack of one thread at a
+        fixed interval. """
+
+    def __init__(self, thread_id: int, interval: float = 0.005) -> None:
+        """ Sets the default values.
+
+            Parameters
+            ----------
+            thread_id : int
+                The ID of the thread to profile.
+
+            interval : float
+                The amount of seconds between the samples.
+
+            Returns
+            -------
+            None
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._running = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """ Starts sampling in a background thread. """
+        self._running.set()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        """ Stops sampling and returns the sampled stacks.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            Counter
+                The amount of samples per collapsed stack.
+        """
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+        return self.stacks
+
+    def _sample(self) -> None:
+        """ Takes samples until the profiler is stopped. """
+        while self._running.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f'{code.co_name} '
+                        f'({os.path.basename(code.co_filename)}'
+                        f':{code.co_firstlineno})')
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+
+class RequestProfiler:
+    """ Class that decides which requests are profiled and writes the
+        profiles to a directory. The directory is kept below a maximum
+        amount of files and bytes by removing the oldest profiles. """
+
+    def __init__(self, settings: dict) -> None:
+        """ Sets the default values.
+
+            Parameters
+            ----------
+            settings : dict
+                The settings with the keys 'token', 'sample_rate',
+                'interval', 'directory', 'max_files' and 'max_bytes'.
+
+            Returns
+            -------
+            None
+        """
+        self.token = settings.get('token')
+        self.sample_rate = settings.get('sample_rate', 0.0)
+        self.interval = settings.get('interval', 0.005)
+        self.directory = settings.get('directory', '/tmp/jantje/profiles')
+        self.max_files = settings.get('max_files', 50)
+        self.max_bytes = settings.get('max_bytes', 50 * 1024 * 1024)
+        self.logger = getLogger('dashboard.profiling')
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """ Returns True if requests can be profiled. """
+        return bool(self.token) or self.sample_rate > 0
+
+    def should_profile(self, request: Request) -> bool:
+        """ Method that decides if a request should be profiled.
+
+            Parameters
+            ----------
+            request : Request
+                The request.
+
+            Returns
+            -------
+            bool
+                True if the request should be profiled.
+        """
+        if self.token:
+            token = request.headers.get('X-Profile')
+            if token is not None and hmac.compare_digest(
+                    token.encode(), str(self.token).encode()):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self) -> SamplingProfiler:
+        """ Starts a profiler for the current thread.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            SamplingProfiler
+                The started profiler.
+        """
+        profiler = SamplingProfiler(threading.get_ident(), self.interval)
+        profiler.start()
+        return profiler
+
+    def finish(self, profiler: SamplingProfiler, name: str) -> None:
+        """ Stops a profiler and writes the profile.
+
+            Parameters
+            ----------
+            profiler : SamplingProfiler
+                The started profiler.
+
+            name : str
+                The name of the profile, for example the route.
+
+            Returns
+            -------
+            None
+        """
+        stacks = profiler.stop()
+        if not stacks:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        filename = os.path.join(
+            self.directory,
+            f'{time.strftime("%Y%m%d-%H%M%S")}-{time.time_ns() % 10**9:09d}-'
+            f'{os.getpid()}-'
+            f'{re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_")}'
+            f'.collapsed')
+        with open(filename, 'w') as file_stream:
+            for stack, count in stacks.items():
+                file_stream.write(f'{stack} {count}\n')
+        self.logger.info(f'Wrote profile {filename}')
+        self._rotate()
+
+    def _rotate(self) -> None:
+        """ Removes the oldest profiles when there are too many. """
+        with self._lock:
+            files = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith('.collapsed'):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+            files.sort()
+
+            total = sum(size for _, size, _ in files)
+            while files and (len(files) > self.max_files
+                             or total > self.max_bytes):
+                _, size, path = files.pop(0)
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+# ---------------------------------------------------------------------
@@ -0,0 +1,523 @@
+"""
+    Module that contains the 'CircuitBreaker' and 'StaleWhileRevalidate'
+    classes. Together they keep the latency of the dashboard within a
+    budget when the database is slow or unavailable: the last known
+    good result is served while it is refreshed in the background, and
+    the database is not called at all while the circuit breaker is
+    open.
+
+    Both classes can be used from threads and from an event loop; the
+    '_async' methods take coroutine functions instead of functions.
+"""
+# ---------------------------------------------------------------------
+# Imports
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from dashboard.exceptions import CircuitOpenError, LoadTimeoutError
+# ---------------------------------------------------------------------
+
+# Create a logger for the dashboard
+logger = logging.getLogger('dashboard')
+
+
+class CircuitBreaker:
+    """ Class that stops calls to a failing dependency. The breaker
+        opens after a number of consecutive failures; calls that take
+        longer than the latency budget count as failures as well. When
+        the breaker is open, calls are refused until the reset timeout
+        has passed. Then one trial call is let through: when it
+        succeeds, the breaker is closed again. """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self,
+                 name: str,
+                 failure_threshold: int = 5,
+                 latency_budget: Optional[float] = None,
+                 reset_timeout: float = 30.0,
+                 observer: Optional[Callable[[bool], None]] = None
+                 ) -> None:
+        """ Sets the default values.
+
+            Parameters
+            ----------
+            name : str
+                The name of the breaker; used in the logging.
+
+            failure_threshold : int
+                The amount of consecutive failures after which the
+                breaker opens.
+
+            latency_budget : Optional[float]
+                The amount of seconds a call may take. Slower calls
+                count as failures. When not given, only errors count.
+
+            reset_timeout : float
+                The amount of seconds the breaker stays open before a
+                trial call is let through.
+
+            observer : Optional[Callable[[bool], None]]
+                Callable that is called when the breaker opens (True)
+                or closes (False).
+
+            Returns
+            -------
+            None
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_budget = latency_budget
+        self.reset_timeout = reset_timeout
+        self.observer = observer
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        """ Returns the state of the breaker. """
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        """ Returns the state; an open breaker becomes half open after
+            the reset timeout. Should be called with the lock. """
+        if self._state == self.OPEN and \
+                time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial = False
+        return self._state
+
+    def allow(self) -> bool:
+        """ Method that returns if a call is allowed. When the breaker is
+            half open, only the first call is allowed.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            bool
+                True when the call is allowed.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self, duration: float) -> None:
+        """ Method that records a successful call. When the call took
+            longer than the latency budget, it is recorded as failure.
+
+            Parameters
+            ----------
+            duration : float
+                The amount of seconds the call took.
+
+            Returns
+            -------
+            None
+        """
+        if self.latency_budget is not None and \
+                duration > self.latency_budget:
+            self.record_failure(
+                f'took {duration:.3f}s, the budget is '
+                f'{self.latency_budget:.3f}s')
+            return
+
+        with self._lock:
+            self._failures = 0
+            self._trial = False
+            if self._state == self.CLOSED:
+                return
+            self._state = self.CLOSED
+        logger.info(f'Circuit breaker "{self.name}" closed')
+        if self.observer is not None:
+            self.observer(False)
+
+    def record_failure(self, reason: str) -> None:
+        """ Method that records a failed call.
+
+            Parameters
+            ----------
+            reason : str
+                The reason of the failure; used in the logging.
+
+            Returns
+            -------
+            None
+        """
+        with self._lock:
+            self._failures += 1
+            self._trial = False
+            state = self._current_state()
+            if state == self.OPEN or (
+                    state == self.CLOSED
+                    and self._failures < self.failure_threshold):
+                return
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+        logger.warning(
+            f'Circuit breaker "{self.name}" opened after '
+            f'{self._failures} failures; last failure: {reason}')
+        if self.observer is not None:
+            self.observer(True)
+
+    def call(self, function: Callable[[], Any]) -> Any:
+        """ Method that calls the function, if the breaker allows it,
+            and records the result.
+
+            Parameters
+            ----------
+            function : Callable[[], Any]
+                The function to call.
+
+            Returns
+            -------
+            Any
+                The result of the function.
+        """
+        self._check()
+        start = time.perf_counter()
+        try:
+            result = function()
+        except Exception as e:
+            self.record_failure(repr(e))
+            raise
+        self.record_success(time.perf_counter() - start)
+        return result
+
+    async def call_async(self, function: Callable[[], Awaitable]) -> Any:
+        """ The asyncio variant of `call`.
+
+            Parameters
+            ----------
+            function : Callable[[], Awaitable]
+                The coroutine function to call.
+
+            Returns
+            -------
+            Any
+                The result of the coroutine.
+        """
+        self._check()
+        start = time.perf_counter()
+        try:
+            result = await function()
+        except Exception as e:
+            self.record_failure(repr(e))
+            raise
+        self.record_success(time.perf_counter() - start)
+        return result
+
+    def _check(self) -> None:
+        """ Raises a 'CircuitOpenError' when a call is not allowed. """
+        if not self.allow():
+            raise CircuitOpenError(
+                f'Circuit breaker "{self.name}" is open',
+                retry_after=self.reset_timeout)
+
+
+class StaleResult:
+    """ Class that represents a result with the version it belongs to
+        and the moment it was loaded. """
+
+    __slots__ = ('value', 'version', 'loaded_at')
+
+    def __init__(self, value: Any, version: Hashable) -> None:
+        """ Sets the default values.
+
+            Parameters
+            ----------
+            value : Any
+                The result.
+
+            version : Hashable
+                The version of the source when the result was loaded.
+
+            Returns
+            -------
+            None
+        """
+        self.value = value
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+
+class StaleWhileRevalidate:
+    """ Class that keeps the last known good result per key. When a
+        result is outdated, it is still returned, while the new result
+        is loaded in the background. The first request for a key loads
+        the result itself, so the load is part of the request (its
+        query and session scope and its profile). A result is only
+        loaded once at a time per key; the other requests wait for the
+        same load, at most 'load_timeout' seconds. The refreshes don't
+        belong to a request, so they run without the request context.
+    """
+
+    def __init__(self,
+                 max_age: float = 5.0,
+                 breaker: Optional[CircuitBreaker] = None,
+                 observer: Optional[Callable[[], None]] = None,
+                 load_timeout: Optional[float] = None) -> None:
+        """ Sets the default values.
+
+            Parameters
+            ----------
+            max_age : float
+                The amount of seconds after which a result is refreshed.
+
+            breaker : Optional[CircuitBreaker]
+                The circuit breaker for loading the results. While the
+                breaker is open, the results are not refreshed.
+
+            observer : Optional[Callable[[], None]]
+                Callable that is called when an outdated result is
+                returned.
+
+            load_timeout : Optional[float]
+                The amount of seconds a request waits for a result that
+                is loaded by another request. When it takes longer, a
+                'LoadTimeoutError' is raised; the result is still
+                stored when it is loaded. When not given, the request
+                waits until the result is loaded. The request that
+                loads the result is bounded by the load itself, for
+                example by a statement timeout.
+
+            Returns
+            -------
+            None
+        """
+        self.max_age = max_age
+        self.breaker = breaker
+        self.observer = observer
+        self.load_timeout = load_timeout
+        self._lock = threading.Lock()
+        self._results: Dict[Hashable, StaleResult] = {}
+        self._loading: Dict[Hashable, Future] = {}
+        self._pid = os.getpid()
+
+    def get(self,
+            key: Hashable,
+            load: Callable[[], Any],
+            version: Hashable = None) -> Any:
+        """ Method that returns the result for the key. The result is
+            refreshed when it is older than 'max_age' or when the
+            version of the source changed.
+
+            Parameters
+            ----------
+            key : Hashable
+                The key of the result.
+
+            load : Callable[[], Any]
+                The function that loads the result.
+
+            version : Hashable
+                The current version of the source.
+
+            Returns
+            -------
+            Any
+                The result; outdated when it is being refreshed.
+        """
+        result = self._results.get(key)
+        if result is None:
+            own: Future = Future()
+            future = self._start(key, lambda: own)
+            if future is not own:
+                try:
+                    return future.result(self.load_timeout)
+                except TimeoutError:
+                    raise self._timeout_error(key) from None
+
+            # Load the result in this thread
+            try:
+                value = self._load(key, load, version)
+            except BaseException as e:
+                own.set_exception(e)
+                raise
+            own.set_result(value)
+            return value
+
+        if self._outdated(result, version):
+            self._refresh(key, lambda: self._run_load(
+                lambda: self._load(key, load, version)))
+        return result.value
+
+    async def get_async(self,
+                        key: Hashable,
+                        load: Callable[[], Awaitable],
+                        version: Hashable = None) -> Any:
+        """ The asyncio variant of `get`. The result is loaded in the
+            running event loop.
+
+            Parameters
+            ----------
+            key : Hashable
+                The key of the result.
+
+            load : Callable[[], Awaitable]
+                The coroutine function that loads the result.
+
+            version : Hashable
+                The current version of the source.
+
+            Returns
+            -------
+            Any
+                The result; outdated when it is being refreshed.
+        """
+        loop = asyncio.get_running_loop()
+
+        def start() -> Future:
+            return asyncio.run_coroutine_threadsafe(
+                self._load_async(key, load, version), loop)
+
+        def start_refresh() -> Future:
+            # The task copies the current context; use an empty one
+            return contextvars.Context().run(start)
+
+        result = self._results.get(key)
+        if result is None:
+            future = asyncio.wrap_future(self._start(key, start))
+            try:
+                # Shield the load, so it isn't cancelled on a timeout
+                return await asyncio.wait_for(
+                    asyncio.shield(future), self.load_timeout)
+            except asyncio.TimeoutError:
+                raise self._timeout_error(key) from None
+
+        if self._outdated(result, version):
+            self._refresh(key, start_refresh)
+        return result.value
+
+    def invalidate(self) -> None:
+        """ Method that removes all results.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+        with self._lock:
+            self._results.clear()
+
+    def _outdated(self, result: StaleResult, version: Hashable) -> bool:
+        """ Returns if the result should be refreshed, and calls the
+            observer when it should. """
+        if result.version == version and \
+                time.monotonic() - result.loaded_at < self.max_age:
+            return False
+        if self.observer is not None:
+            self.observer()
+        return True
+
+    def _timeout_error(self, key: Hashable) -> LoadTimeoutError:
+        """ Returns the error for a first load that takes too long. """
+        return LoadTimeoutError(
+            f'Loading {key!r} took longer than {self.load_timeout}s',
+            retry_after=self.load_timeout)
+
+    def _load(self,
+              key: Hashable,
+              load: Callable[[], Any],
+              version: Hashable) -> Any:
+        """ Loads the result, through the breaker, and stores it. """
+        value = self.breaker.call(load) if self.breaker is not None \
+            else load()
+        with self._lock:
+            self._results[key] = StaleResult(value, version)
+        return value
+
+    async def _load_async(self,
+                          key: Hashable,
+                          load: Callable[[], Awaitable],
+                          version: Hashable) -> Any:
+        """ The asyncio variant of `_load`. """
+        value = await self.breaker.call_async(load) \
+            if self.breaker is not None else await load()
+        with self._lock:
+            self._results[key] = StaleResult(value, version)
+        return value
+
+    @staticmethod
+    def _run_load(load: Callable[[], Any]) -> Future:
+        """ Calls the function in a thread and returns its future. The
+            thread starts with an empty context. """
+        future: Future = Future()
+
+        def run() -> None:
+            try:
+                future.set_result(load())
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(
+            target=run, name='stale-while-revalidate', daemon=True
+        ).start()
+        return future
+
+    def _start(self,
+               key: Hashable,
+               start: Callable[[], Future],
+               callback: Optional[Callable[[Future], None]] = None
+               ) -> Future:
+        """ Starts loading the result for the key, unless it is already
+            being loaded, and returns the future of the load. The
+            callback is only added to a new load. """
+        with self._lock:
+            # Threads don't survive a fork, so neither do the loads
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._loading.clear()
+            future = self._loading.get(key)
+            if future is not None:
+                return future
+            future = self._loading[key] = start()
+
+        def done(future: Future) -> None:
+            with self._lock:
+                if self._loading.get(key) is future:
+                    del self._loading[key]
+
+        future.add_done_callback(done)
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+    def _refresh(self, key: Hashable, start: Callable[[], Future]) -> None:
+        """ Starts loading the result in the background, unless the
+            breaker is open. Failures are logged; the outdated result
+            is kept. """
+        if self.breaker is not None and \
+                self.breaker.state == CircuitBreaker.OPEN:
+            return
+
+        def log(future: Future) -> None:
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None and \
+                    not isinstance(error, CircuitOpenError):
+                logger.warning(f'Couldn\'t refresh {key!r}: {error!r}')
+
+        self._start(key, start, log)
@@ -0,0 +1,161 @@
+"""
+    Module that contains the 'ResponseCache' class. This class caches
+    rendered responses of the dashboard so they don't have to be
+    rendered again on every request.
+"""
+# ---------------------------------------------------------------------
+# Imports
+import hashlib
+from typing import Callable, Hashable, Optional, Union
+from flask import Request, Response
+from cache import TTLCache
+# ---------------------------------------------------------------------
+
+
+class CachedResponse:
+    """ Class that represents a rendered response; the body and the
+        strong ETag for the body. """
+
+    __slots__ = ('body', 'etag')
+
+    def __init__(self, body: bytes) -> None:
+        """ Sets the default values and calculates the ETag.
+
+            Parameters
+            ----------
+            body : bytes
+                The rendered body.
+
+            Returns
+            -------
+            None
+        """
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """ Method that checks if the value of an 'If-None-Match' header
+            matches the ETag of this response.
+
+            Parameters
+            ----------
+            if_none_match : Optional[str]
+                The value of the 'If-None-Match' header.
+
+            Returns
+            -------
+            bool
+                True if the client already has this version.
+        """
+        if not if_none_match:
+            return False
+        for etag in if_none_match.split(','):
+            etag = etag.strip()
+            if etag.startswith('W/'):
+                etag = etag[2:]
+            if etag == '*' or etag.strip('"') == self.etag:
+                return True
+        return False
+
+    def to_response(self,
+                    request: Request,
+                    content_type: str,
+                    cache_control: str = 'no-cache') -> Response:
+        """ Method that creates a Flask response for the cached body.
+            If the client already has this version (the ETag matches
+            'If-None-Match'), a '304 Not Modified' is returned.
+
+            Parameters
+            ----------
+            request : Request
+                The request to respond to.
+
+            content_type : str
+                The content type of the response.
+
+            cache_control : str
+                The value for the 'Cache-Control' header.
+
+            Returns
+            -------
+            Response
+                The response to return to the client.
+        """
+        response = Response(self.body, content_type=content_type)
+        response.set_etag(self.etag)
+        response.headers['Cache-Control'] = cache_control
+        return response.make_conditional(request)
+
+
+class ResponseCache:
+    """ Class that caches rendered responses. The caller decides on the
+        key; everything the response depends on should be in the key.
+    """
+
+    def __init__(self,
+                 ttl: float = 86400,
+                 max_size: int = 16,
+                 observer: Optional[Callable[[bool], None]] = None
+                 ) -> None:
+        """ Sets the default values.
+
+            Parameters
+            ----------
+            ttl : float
+                The amount of seconds a response stays valid.
+
+            max_size : int
+                The maximum amount of cached responses.
+
+            observer : Optional[Callable[[bool], None]]
+                Callable that is called for every lookup with True for
+                a hit and False for a miss.
+
+            Returns
+            -------
+            None
+        """
+        self.cache = TTLCache(ttl=ttl, max_size=max_size, observer=observer)
+
+    def get_or_render(self,
+                      key: Hashable,
+                      render: Callable[[], Union[str, bytes]]
+                      ) -> CachedResponse:
+        """ Method that returns a cached response. If the response is
+            not cached yet, 'render' is called to create it.
+
+            Parameters
+            ----------
+            key : Hashable
+                The key for the response.
+
+            render : Callable[[], Union[str, bytes]]
+                Callable that renders the body of the response. A str
+                is encoded as UTF-8.
+
+            Returns
+            -------
+            CachedResponse
+                The cached response.
+        """
+        def load() -> CachedResponse:
+            body = render()
+            if isinstance(body, str):
+                body = body.encode('utf-8')
+            return CachedResponse(body)
+
+        return self.cache.get_or_load(key, load)
+
+    def invalidate(self) -> None:
+        """ Method to remove all cached responses.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+        self.cache.invalidate()
+# ---------------------------------------------------------------------
@@ -0,0 +1,67 @@
+"""
+    Module with the functions to serialize data for the JSON API of
+    the dashboard. orjson is used because it is a lot faster than the
+    'json' module and serializes dates and NumPy arrays natively.
+"""
+# ---------------------------------------------------------------------
+# Imports
+from typing import Any, Dict, List
+import orjson
+from jantje_database_model import AgendaItem
+# ---------------------------------------------------------------------
+
+
+def dumps(data: Any) -> bytes:
+    """ Method that serializes data to JSON.
+
+        Parameters
+        ----------
+        data : Any
+            The data to serialize.
+
+        Returns
+        -------
+        bytes
+            The UTF-8 encoded JSON.
+    """
+    return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def agenda_item_to_dict(item: AgendaItem) -> Dict[str, Any]:
+    """ Method that converts an agendaitem to a dict that can be
+        serialized.
+
+        Parameters
+        ----------
+        item : AgendaItem
+            The agendaitem to convert.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The converted agendaitem.
+    """
+    return {
+        'id': item.id,
+        'datetime': item.datetime,
+        'all_day': item.all_day,
+        'description': item.description
+    }
+
+
+def agenda_to_list(items: List[AgendaItem]) -> List[Dict[str, Any]]:
+    """ Method that converts a list of agendaitems to a list of dicts
+        that can be serialized.
+
+        Parameters
+        ----------
+        items : List[AgendaItem]
+            The agendaitems to convert.
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+            The converted agendaitems.
+    """
+    return [agenda_item_to_dict(item) for item in items or []]
+# ---------------------------------------------------------------------
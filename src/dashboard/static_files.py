@@ -0,0 +1,107 @@
+"""
+    Module with the functions to serve static files. By default, files
+    are sent with `wsgi.file_wrapper`, so gunicorn can use `sendfile`
+    to send them without copying them through Python. Range requests
+    and conditional requests (ETag and If-Modified-Since) are
+    supported.
+
+    The sending of the files can also be offloaded to a front proxy:
+
+    - 'x-sendfile': the 'X-Sendfile' header is used (Apache, lighttpd)
+    - 'x-accel-redirect': the 'X-Accel-Redirect' header is used
+      (nginx). Files in `root` are mapped to the internal `prefix`:
+
+      ```nginx
+      location /_static/ {
+          internal;
+          alias /app/res/;
+      }
+      ```
+"""
+# ---------------------------------------------------------------------
+# Imports
+import mimetypes
+import os
+from typing import Dict, Optional
+from flask import Flask, Response, request, send_file
+# ---------------------------------------------------------------------
+
+# The settings for offloading; set by `configure`
+offload_settings: Dict[str, str] = dict()
+
+
+def configure(flask_app: Flask, settings: dict) -> None:
+    """ Method to configure the offloading of static files.
+
+        Parameters
+        ----------
+        flask_app : Flask
+            The Flask application.
+
+        settings : dict
+            The settings with the keys 'offload' (None, 'x-sendfile'
+            or 'x-accel-redirect'), 'root' and 'prefix' (the last two
+            only for 'x-accel-redirect').
+
+        Returns
+        -------
+        None
+    """
+    offload_settings.clear()
+    offload_settings.update({
+        'offload': settings.get('offload'),
+        'root': os.path.abspath(settings.get('root', 'res')),
+        'prefix': settings.get('prefix', '/_static/')
+    })
+
+    # Flask has built-in support for 'X-Sendfile'
+    flask_app.config['USE_X_SENDFILE'] = \
+        offload_settings['offload'] == 'x-sendfile'
+
+
+def send_static(path: str,
+                mimetype: Optional[str] = None,
+                headers: Optional[Dict[str, str]] = None) -> Response:
+    """ Method that sends a static file.
+
+        Parameters
+        ----------
+        path : str
+            The absolute path of the file to send.
+
+        mimetype : Optional[str]
+            The mimetype of the file.
+
+        headers : Optional[Dict[str, str]]
+            Extra headers for the response.
+
+        Returns
+        -------
+        Response
+            The response with the file.
+    """
+    headers = headers or dict()
+
+    # nginx doesn't pass the 'Content-Encoding' and 'Vary' headers of
+    # the application, so encoded files are sent by the application
+    if offload_settings.get('offload') == 'x-accel-redirect' \
+            and 'Content-Encoding' not in headers \
+            and path.startswith(offload_settings['root'] + os.sep):
+        stat = os.stat(path)
+
+        # Create an empty response with the redirect; nginx sends the
+        # file and handles range requests
+        response = Response(
+            mimetype=mimetype or mimetypes.guess_type(path)[0])
+        response.last_modified = stat.st_mtime
+        response.set_etag(f'{stat.st_mtime}-{stat.st_size}')
+        response.headers['X-Accel-Redirect'] = \
+            offload_settings['prefix'] + os.path.relpath(
+                path, offload_settings['root']).replace(os.sep, '/')
+        response.headers.update(headers)
+        return response.make_conditional(request)
+
+    response = send_file(path, mimetype=mimetype, conditional=True)
+    response.headers.update(headers)
+    return response
+# ---------------------------------------------------------------------
@@ -19,6 +19,11 @@
 
     After that, you can use the created class like a normal
     SQLalchemy ORM object.
+
+    For asyncio applications, the `AsyncDatabase` and
+    `AsyncDatabaseSession` classes can be used in the same way.
 """
 from database.database import Database
 from database.database_session import DatabaseSession
+from database.async_database import AsyncDatabase
+from database.async_database_session import AsyncDatabaseSession
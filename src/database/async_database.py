@@ -0,0 +1,244 @@
+"""
+    Module that contains the static 'AsyncDatabase' class. This is the
+    asyncio variant of the 'Database' class and can be used to
+    communicate with the database without blocking the event loop.
+    The same `Database.base_class` is used for the models, so the ORM
+    classes work with both.
+"""
+import itertools
+from typing import List, Sequence
+
+import sqlalchemy
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    create_async_engine)
+from sqlalchemy.orm import sessionmaker
+
+from database.exceptions import DatabaseConnectionError
+from database.pool_statistics import (InstrumentedAsyncQueuePool,
+                                      PoolStatistics)
+
+
+class AsyncDatabase:
+    """ Main class for the AsyncDatabase object. Will be an static
+        class that cannot be initiated. """
+
+    # Static variables are used by the static class
+    _engine = None
+    _replicas: List[AsyncEngine] = []
+    _replica_counter = itertools.count()
+    replica_strategy: str = 'round_robin'
+    session = sessionmaker(class_=AsyncSession)
+
+    # Methods to make sure this class is used as it is suppoes to be
+    def __new__(cls) -> None:
+        """ When someone tries to create a instance of the AsyncDatabase
+            class, we give an TypeError. This is done because this
+            class should be a static class.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+
+        raise TypeError(
+            f'It is impossible to create a instance of class "{cls.__name__}"')
+
+    @classmethod
+    def connect(cls,
+                connection: str,
+                echo: bool = False,
+                pool_pre_ping: bool = True,
+                pool_recycle: int = 10,
+                pool_size: int = 5,
+                pool_overflow: int = 10,
+                replicas: Sequence[str] = (),
+                replica_strategy: str = 'round_robin') -> None:
+        """ Method to create a SQLAlchemy async engine. Uses the
+            database and credentials given by the user. The connection
+            string should use an async driver, like
+            'mysql+aiomysql://'. Tables are not created by this method;
+            use `Database.connect` for that.
+
+            Parameters
+            ----------
+            conncection : str
+                The connection string that can be used by SQLalchemy.
+
+            echo : bool
+                Can be used for debugging; writes the queries for
+                SQLAlchemy to the stdout buffer.
+
+            pool_pre_ping : bool
+                By default True. Determines if SQLAlchemy should
+                do a pre-check before using a connection that is
+                already in the pool.
+
+            pool_recycle : int
+                After how many seconds SQLAlchemy considers a
+                MySQL connection to be stale and therefore removed
+                from the database.
+
+            pool_size : int
+                The size the pool can get.
+
+            pool_overflow : int
+                How many connections SQLAlchemy can go over the
+                pool_size.
+
+            replicas : Sequence[str]
+                The connection strings of read replicas. The read-only
+                sessions use one of the replicas.
+
+            replica_strategy : str
+                How a replica is selected: 'round_robin' or
+                'least_checked_out' (the replica with the least
+                connections in use).
+
+            Returns
+            -------
+            None
+        """
+
+        if replica_strategy not in ('round_robin', 'least_checked_out'):
+            raise ValueError(
+                f'Replica strategy "{replica_strategy}" is not supported')
+
+        arguments = {
+            'echo': echo,
+            'pool_pre_ping': pool_pre_ping,
+            'pool_recycle': pool_recycle,
+            'pool_size': pool_size,
+            'max_overflow': pool_overflow
+        }
+        cls._engine = cls._create_engine(connection, 'async', arguments)
+        cls._replicas = [
+            cls._create_engine(
+                replica, f'async-replica-{index}', arguments)
+            for index, replica in enumerate(replicas)
+        ]
+        cls.replica_strategy = replica_strategy
+
+        # Bind the engine to the sessionmaker of the class
+        cls.session.configure(bind=cls._engine)
+
+    @staticmethod
+    def _create_engine(connection: str,
+                       name: str,
+                       arguments: dict) -> AsyncEngine:
+        """ Creates an engine with statistics about the connections in
+            the pool. """
+        try:
+            engine = create_async_engine(
+                connection,
+                poolclass=InstrumentedAsyncQueuePool,
+                **arguments
+            )
+        except sqlalchemy.exc.OperationalError as e:
+            raise DatabaseConnectionError(
+                f'Couldn\'t connect to database: {e}')
+
+        # Gather statistics about the connections in the pool
+        statistics = PoolStatistics(name)
+        statistics.listen(engine.sync_engine)
+        engine.sync_engine.pool.statistics = statistics
+        return engine
+
+    @classmethod
+    def get_engines(cls) -> List[AsyncEngine]:
+        """ Method that returns the engine of the primary database and
+            the engines of the replicas.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            List[AsyncEngine]
+                The engines; empty when the database isn't connected.
+        """
+        if cls._engine is None:
+            return []
+        return [cls._engine] + cls._replicas
+
+    @classmethod
+    def get_read_engine(cls) -> AsyncEngine:
+        """ Method that returns the engine for reading. This is one of
+            the replicas, selected with the replica strategy, or the
+            engine of the primary database when there are no replicas.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            AsyncEngine
+                The engine to read from.
+        """
+        replicas = cls._replicas
+        if not replicas:
+            return cls._engine
+        if cls.replica_strategy == 'least_checked_out':
+            return min(
+                replicas,
+                key=lambda engine: engine.sync_engine.pool.checkedout())
+        return replicas[next(cls._replica_counter) % len(replicas)]
+
+    @classmethod
+    async def dispose(cls) -> None:
+        """ Method that closes all connections in the pool. Should be
+            called when the event loop stops.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+        for engine in cls.get_engines():
+            await engine.dispose()
+
+    @classmethod
+    def get_pool_statistics(cls) -> dict:
+        """ Method that returns pool statistics, like the pool size,
+            the amount of checked-in connections, the overflow and the
+            checked out connections. Also contains the counters for the
+            lifecycle events of the connections and a histogram of the
+            time it took to check out connections. When there are
+            replicas, the statistics of their pools are added as a list
+            with the key 'replicas'.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            dict
+                The requested statistics
+        """
+
+        def get_statistics(engine: AsyncEngine) -> dict:
+            pool = engine.sync_engine.pool
+            statistics = {
+                'pool_size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'overflow': pool.overflow(),
+                'checked_out': pool.checkedout()
+            }
+            if getattr(pool, 'statistics', None) is not None:
+                statistics.update(pool.statistics.to_dict())
+            return statistics
+
+        statistics = get_statistics(cls._engine)
+        if cls._replicas:
+            statistics['replicas'] = [
+                get_statistics(engine) for engine in cls._replicas]
+        return statistics
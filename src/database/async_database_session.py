@@ -0,0 +1,147 @@
+"""
+    Module that contains the AsyncDatabaseSession class. Can be used as
+    async context manager to communicate with the database in a safe
+    manner without blocking the event loop.
+"""
+from types import TracebackType
+from typing import Optional, Type
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.async_database import AsyncDatabase
+
+
+class AsyncDatabaseSession:
+    """ Class for async database session. Can and should be used as
+        async context manager. """
+
+    def __init__(self,
+                 commit_on_end: bool = False,
+                 expire_on_commit: bool = True,
+                 read_only: bool = False) -> None:
+        """ The initiator creates an empty session to use with this
+            object. When 'expire_on_commit' is set, all objects that
+            were added during this session are expired after the
+            session is commited.
+
+            Parameters
+            ----------
+            commit_on_end : bool, default=False
+                Tells the object to commit when the context manager is
+                done.
+
+            expire_on_commit : bool, default=True
+                Tells the object to either expire or not expire created
+                objects after the context manager is done.
+
+            read_only : bool, default=False
+                Creates a session that reads from a replica, if there
+                are replicas. The session is never commited. Unlike
+                `DatabaseSession`, there is no scope that tracks the
+                writes, so changes that were just commited may not be
+                seen yet.
+
+            Returns
+            -------
+            None
+        """
+
+        if read_only:
+            self.session: AsyncSession = AsyncDatabase.session(
+                bind=AsyncDatabase.get_read_engine(),
+                expire_on_commit=expire_on_commit)
+        else:
+            self.session = AsyncDatabase.session(
+                expire_on_commit=expire_on_commit)
+        self.commit_on_end = commit_on_end and not read_only
+
+    async def close(self) -> None:
+        """ Closes the session.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+        await self.session.close()
+
+    async def commit(self) -> None:
+        """ Commits the session.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+        await self.session.commit()
+
+    async def rollback(self) -> None:
+        """ Rolls back the session.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+        await self.session.rollback()
+
+    async def __aenter__(self) -> AsyncSession:
+        """ Async context manager for the session. Makes sure you can
+            use the session as Context Manager and prevents errors.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            session
+                The database session
+        """
+        return self.session
+
+    async def __aexit__(self,
+                        exception_type: Optional[Type[BaseException]],
+                        exception_value: Optional[BaseException],
+                        traceback: Optional[TracebackType]) -> bool:
+        """ The end of the context manager. Commits the session (if the
+            user requested this) and closes the session.
+
+            Parameters
+            ----------
+            exception_type : Optional[Type[BaseException]]
+                The exception that happend during execution.
+
+            exception_value : Optional[BaseException]
+                The value of the exception.
+
+            traceback : Optional[TracebackType]
+                The traceback for the exception.
+
+            Returns
+            -------
+            bool
+            True is everything went fine, False if there was an
+            exception.
+        """
+
+        # Commit, if needed
+        if self.commit_on_end:
+            await self.commit()
+
+        # Close the session
+        await self.close()
+
+        # If 'type' is None, there was no error so we can return True.
+        # Otherwise, False is returned and the exception is passed
+        # through
+        return exception_type is None
@@ -2,12 +2,21 @@
     Module that contains the static 'Database' class. This class can
     and should be used to communicate with the database.
 """
+import itertools
+import os
+import threading
+from logging import getLogger
+from typing import List, Optional, Sequence
+
 import sqlalchemy
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-from database.exceptions import DatabaseConnectionError
+from database.exceptions import (DatabaseConnectionError,
+                                 DatabaseNotConnectedError)
+from database.pool_statistics import InstrumentedQueuePool, PoolStatistics
+from database.query_profiler import QueryProfiler
 
 
 class Database:
@@ -16,6 +25,18 @@ class Database:
 
     # Static variables are used by the static class
     _engine = None
+    _engine_pid: Optional[int] = None
+    _engine_arguments: Optional[dict] = None
+    _engine_lock = threading.Lock()
+    _pool_statistics = None
+    _replica_connections: List[str] = []
+    _replicas: List[sqlalchemy.engine.Engine] = []
+    _replicas_pid: Optional[int] = None
+    _replica_counter = itertools.count()
+    replica_strategy: str = 'round_robin'
+    read_your_writes: bool = True
+    statement_timeout: Optional[float] = None
+    profiler: Optional[QueryProfiler] = None
     base_class = declarative_base()
     session = sessionmaker()
 
@@ -45,7 +66,15 @@ class Database:
                 pool_recycle: int = 10,
                 pool_size: int = 5,
                 pool_overflow: int = 10,
-                create_tables: bool = False) -> None:
+                pool_timeout: int = 30,
+                pool_use_lifo: bool = False,
+                create_tables: bool = False,
+                lazy: bool = False,
+                replicas: Sequence[str] = (),
+                replica_strategy: str = 'round_robin',
+                read_your_writes: bool = True,
+                statement_timeout: Optional[float] = None,
+                connect_args: Optional[dict] = None) -> None:
         """ Method to create a SQLAlchemy engine. Uses the database and
             credentials given by the user. Since this is a static
             class, we set it in the class parameter. This way, the
@@ -53,6 +82,12 @@ class Database:
             creating the engine, it calls the command to create the
             tables in the database.
 
+            When 'lazy' is set, the engine is created when it is first
+            used. This should be used when the application is loaded
+            before the worker processes are forked (like with the
+            '--preload' option of gunicorn), so every worker gets its
+            own engine and connections.
+
             Parameters
             ----------
             conncection : str
@@ -80,42 +115,375 @@ class Database:
                 How many connections SQLAlchemy can go over the
                 pool_size.
 
+            pool_timeout : int
+                How many seconds to wait for a connection when the
+                pool is exhausted.
+
+            pool_use_lifo : bool
+                Use the most recently used connection first. Idle
+                connections are then closed by 'pool_recycle' instead
+                of being kept alive by round robin use.
+
             create_tables : bool
                 Specifies if the method should create tables.
 
+            lazy : bool
+                Specifies if the engine should be created when it is
+                first used instead of right away.
+
+            replicas : Sequence[str]
+                The connection strings of the read replicas. Read-only
+                sessions use a replica; the pool settings are the same
+                as for the primary database.
+
+            replica_strategy : str
+                How a replica is selected: 'round_robin' or
+                'least_checked_out' (the replica with the least
+                connections in use).
+
+            read_your_writes : bool
+                After changes are commited in a scope (like a web
+                request), the read-only sessions in that scope use the
+                primary database, so they see the changes.
+
+            statement_timeout : Optional[float]
+                The maximum amount of seconds the statements that ask
+                for it may run; see `listen_statement_timeouts`. Other
+                statements, like exports, are not limited.
+
+            connect_args : Optional[dict]
+                Extra arguments for the DBAPI driver, like a socket
+                timeout.
 
             Returns
             -------
             None
         """
 
+        if replica_strategy not in ('round_robin', 'least_checked_out'):
+            raise ValueError(
+                f'Replica strategy "{replica_strategy}" is not supported')
+
+        # Save the arguments, so the engine can be created later. The
+        # engines of this process that already exist are closed.
+        with cls._engine_lock:
+            previous = []
+            if cls._engine_pid == os.getpid() and cls._engine is not None:
+                previous.append(cls._engine)
+            if cls._replicas_pid == os.getpid():
+                previous.extend(cls._replicas)
+            cls._engine = None
+            cls._engine_pid = None
+            cls._replicas = []
+            cls._replicas_pid = None
+            cls._replica_connections = list(replicas)
+            cls.replica_strategy = replica_strategy
+            cls.read_your_writes = read_your_writes
+            cls.statement_timeout = statement_timeout
+            cls._engine_arguments = {
+                'url': connection,
+                'echo': echo,
+                'pool_pre_ping': pool_pre_ping,
+                'pool_recycle': pool_recycle,
+                'pool_size': pool_size,
+                'max_overflow': pool_overflow,
+                'pool_timeout': pool_timeout,
+                'pool_use_lifo': pool_use_lifo
+            }
+            if connect_args:
+                cls._engine_arguments['connect_args'] = dict(connect_args)
+        for engine in previous:
+            engine.dispose()
+
+        if not lazy:
+            cls.get_engine()
+
+        # Create the configured tables, if the user requested to do
+        # this
+        if create_tables:
+            cls.create_tables()
+
+    @classmethod
+    def get_engine(cls) -> sqlalchemy.engine.Engine:
+        """ Method that returns the engine. The engine is created when
+            it doesn't exist yet, or when it was created in another
+            process. The latter happens when the process is forked
+            after the engine was created; the connections of the
+            parent process can't be shared with the child process.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            Engine
+                The SQLAlchemy engine for this process.
+        """
+
+        pid = os.getpid()
+        if cls._engine is not None and cls._engine_pid == pid:
+            return cls._engine
+
+        with cls._engine_lock:
+            if cls._engine is not None and cls._engine_pid == pid:
+                return cls._engine
+            if cls._engine_arguments is None:
+                raise DatabaseNotConnectedError(
+                    'Database.connect should be called first')
+            if cls._engine is not None:
+                getLogger('database').debug(
+                    f'Engine was created in process {cls._engine_pid}; '
+                    f'creating a new engine for process {pid}')
+
+            engine = cls._create_engine(cls._engine_arguments, 'primary')
+            cls._pool_statistics = engine.pool.statistics
+
+            # Bind the engine to the sessionmaker of the class
+            cls.session.configure(bind=engine)
+            cls._engine = engine
+            cls._engine_pid = pid
+            return engine
+
+    @classmethod
+    def get_replica_engines(cls) -> List[sqlalchemy.engine.Engine]:
+        """ Method that returns the engines of the read replicas. Like
+            the engine of the primary database, the engines are created
+            when they are first used in a process.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            List[Engine]
+                The engines of the replicas; empty when there are no
+                replicas.
+        """
+
+        pid = os.getpid()
+        if cls._replicas_pid == pid:
+            return cls._replicas
+
+        with cls._engine_lock:
+            if cls._replicas_pid == pid:
+                return cls._replicas
+            if cls._engine_arguments is None:
+                raise DatabaseNotConnectedError(
+                    'Database.connect should be called first')
+            cls._replicas = [
+                cls._create_engine(
+                    dict(cls._engine_arguments, url=connection),
+                    f'replica-{index}')
+                for index, connection in enumerate(cls._replica_connections)
+            ]
+            cls._replicas_pid = pid
+            return cls._replicas
+
+    @classmethod
+    def get_read_engine(cls) -> sqlalchemy.engine.Engine:
+        """ Method that returns the engine for reading. This is one of
+            the replicas, selected with the replica strategy, or the
+            engine of the primary database when there are no replicas.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            Engine
+                The engine to read from.
+        """
+
+        replicas = cls.get_replica_engines()
+        if not replicas:
+            return cls.get_engine()
+        if cls.replica_strategy == 'least_checked_out':
+            return min(replicas, key=lambda engine: engine.pool.checkedout())
+        return replicas[next(cls._replica_counter) % len(replicas)]
+
+    @classmethod
+    def _create_engine(cls,
+                       arguments: dict,
+                       name: str) -> sqlalchemy.engine.Engine:
+        """ Creates an engine with statistics about the connections in
+            the pool and, if requested, a statement timeout and a
+            profiler. """
         try:
             # Create the engine
-            cls._engine = create_engine(
-                connection,
-                echo=echo,
-                pool_pre_ping=pool_pre_ping,
-                pool_recycle=pool_recycle,
-                pool_size=pool_size,
-                max_overflow=pool_overflow
+            engine = create_engine(
+                poolclass=InstrumentedQueuePool,
+                **arguments
             )
+        except sqlalchemy.exc.OperationalError as e:
+            raise DatabaseConnectionError(
+                f'Couldn\'t connect to database: {e}')
 
-            # Create the configured tables, if the user requested to do
-            # this
-            if create_tables:
-                cls.base_class.metadata.create_all(cls._engine)
+        # Gather statistics about the connections in the pool
+        statistics = PoolStatistics(name)
+        statistics.listen(engine)
+        engine.pool.statistics = statistics
 
-            # Bind the engine to the sessionmaker of the class
-            cls.session.configure(bind=cls._engine)
+        # Let the database server stop slow statements
+        cls.listen_statement_timeouts(engine)
+
+        # Profile the statements on the new engine, if requested
+        if cls.profiler is not None:
+            cls.profiler.listen(engine)
+        return engine
+
+    @classmethod
+    def listen_statement_timeouts(cls,
+                                  engine: sqlalchemy.engine.Engine) -> None:
+        """ Lets the database server stop the statements that have the
+            'statement_timeout' execution option (in seconds) when they
+            take longer. For MySQL, an optimizer hint is added to the
+            SELECT statements; other statements are not limited. For
+            PostgreSQL, the timeout is set for the transaction.
+
+            Parameters
+            ----------
+            engine : Engine
+                The engine; for an async engine, its 'sync_engine'.
+
+            Returns
+            -------
+            None
+        """
+        dialect = engine.dialect.name
+        if dialect not in ('mysql', 'postgresql'):
+            if cls.statement_timeout is not None:
+                getLogger('database').warning(
+                    f'Statement timeouts are not supported for {dialect}')
+            return
+
+        @event.listens_for(engine, 'before_cursor_execute', retval=True)
+        def set_timeout(connection, cursor, statement, parameters,
+                        context, executemany) -> tuple:
+            timeout = context.execution_options.get('statement_timeout') \
+                if context is not None else None
+            if timeout is None:
+                return statement, parameters
+
+            milliseconds = int(timeout * 1000)
+            if dialect == 'postgresql':
+                cursor.execute(
+                    f'SET LOCAL statement_timeout = {milliseconds}')
+            elif statement.lstrip()[:6].upper() == 'SELECT':
+                statement = f'SELECT /*+ MAX_EXECUTION_TIME(' \
+                    f'{milliseconds}) */' + statement.lstrip()[6:]
+            return statement, parameters
+
+    @classmethod
+    def create_tables(cls) -> None:
+        """ Method that creates the configured tables that don't exist
+            yet in the database. The indexes that are missing on the
+            existing tables are created as well, so new indexes reach
+            the existing databases.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+
+        try:
+            engine = cls.get_engine()
+            cls.base_class.metadata.create_all(engine)
+            for table in cls.base_class.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(engine, checkfirst=True)
         except sqlalchemy.exc.OperationalError as e:
             raise DatabaseConnectionError(
                 f'Couldn\'t connect to database: {e}')
 
+    @classmethod
+    def enable_profiling(cls,
+                         slow_query_threshold: float = 0.25,
+                         repeat_threshold: int = 3) -> QueryProfiler:
+        """ Method that enables the profiling of the statements that are
+            executed. Should be called after `connect`. The profiler
+            logs slow statements and statements that are executed
+            multiple times in one scope. Scopes can be started and
+            ended with `Database.profiler.start_scope` and
+            `Database.profiler.end_scope`.
+
+            Parameters
+            ----------
+            slow_query_threshold : float
+                Statements that take longer than this amount of seconds
+                are logged.
+
+            repeat_threshold : int
+                The amount of times an identical statement can be
+                executed in one scope before a warning is logged.
+
+            Returns
+            -------
+            QueryProfiler
+                The profiler.
+        """
+
+        cls.profiler = QueryProfiler(
+            slow_query_threshold=slow_query_threshold,
+            repeat_threshold=repeat_threshold
+        )
+
+        # When the engines are not created yet, the profiler is added
+        # when they are created
+        if cls._engine is not None and cls._engine_pid == os.getpid():
+            cls.profiler.listen(cls._engine)
+        if cls._replicas_pid == os.getpid():
+            for engine in cls._replicas:
+                cls.profiler.listen(engine)
+        return cls.profiler
+
+    @classmethod
+    def prewarm_pool(cls, connections: Optional[int] = None) -> None:
+        """ Method that opens connections in the pools of the primary
+            database and the replicas, so the first requests don't have
+            to wait for new connections. Should be called when the
+            worker starts.
+
+            Parameters
+            ----------
+            connections : Optional[int]
+                The amount of connections to open per pool. Defaults to
+                the size of the pool.
+
+            Returns
+            -------
+            None
+        """
+
+        for engine in [cls.get_engine()] + cls.get_replica_engines():
+            opened = []
+            try:
+                # Check out the connections at the same time, otherwise
+                # the pool hands out the same connection every time
+                for _ in range(connections or engine.pool.size()):
+                    opened.append(engine.connect())
+            except sqlalchemy.exc.OperationalError as e:
+                raise DatabaseConnectionError(
+                    f'Couldn\'t connect to database: {e}')
+            finally:
+                for connection in opened:
+                    connection.close()
+
     @classmethod
     def get_pool_statistics(cls) -> dict:
         """ Method that returns pool statistics, like the pool size,
             the amount of checked-in connections, the overflow and the
-            checked out connections.
+            checked out connections. Also contains the counters for the
+            lifecycle events of the connections and a histogram of the
+            time it took to check out connections. When there are
+            replicas, the statistics of their pools are added as a list
+            with the key 'replicas'.
 
             Parameters
             ----------
@@ -127,9 +495,21 @@ class Database:
                 The requested statistics
         """
 
-        return {
-            'pool_size': cls._engine.pool.size(),
-            'checked_in': cls._engine.pool.checkedin(),
-            'overflow': cls._engine.pool.overflow(),
-            'checked_out': cls._engine.pool.checkedout()
-        }
+        def get_statistics(engine: sqlalchemy.engine.Engine) -> dict:
+            pool = engine.pool
+            statistics = {
+                'pool_size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'overflow': pool.overflow(),
+                'checked_out': pool.checkedout()
+            }
+            if getattr(pool, 'statistics', None) is not None:
+                statistics.update(pool.statistics.to_dict())
+            return statistics
+
+        statistics = get_statistics(cls.get_engine())
+        replicas = cls.get_replica_engines()
+        if replicas:
+            statistics['replicas'] = [
+                get_statistics(engine) for engine in replicas]
+        return statistics
@@ -2,12 +2,72 @@
     Module that contains the DatabaseSession class. Can be used as
     context manager to communicate with the database in a safe manner.
 """
+from contextvars import ContextVar, Token
 from types import TracebackType
 from typing import Optional, Type
 
+from sqlalchemy import event
 from sqlalchemy.orm.session import Session
 
 from database import Database
+from database.exceptions import DatabaseReadOnlyError
+
+# The dialects that support 'SET TRANSACTION READ ONLY'
+READ_ONLY_DIALECTS = {'mysql', 'postgresql'}
+
+
+class SessionScope:
+    """ Class for a scope (like a web request) in which the read-only
+        sessions share one session, and so one connection. Keeps track
+        of changes that are commited in the scope, so the read-only
+        sessions can read them from the primary database. """
+
+    __slots__ = ('session', 'wrote')
+
+    def __init__(self) -> None:
+        """ Sets the default values. """
+        self.session: Optional[Session] = None
+        self.wrote = False
+
+
+# The scope of the current context
+_scope: ContextVar[Optional[SessionScope]] = ContextVar(
+    'database_session_scope', default=None)
+
+
+@event.listens_for(Database.session, 'after_begin')
+def _set_transaction_read_only(session: Session,
+                               transaction,
+                               connection) -> None:
+    """ Marks the transaction of a read-only session as read-only for
+        the database, so the database doesn't have to prepare for
+        changes. """
+    if session.info.get('read_only') and \
+            connection.dialect.name in READ_ONLY_DIALECTS:
+        connection.exec_driver_sql('SET TRANSACTION READ ONLY')
+
+
+@event.listens_for(Database.session, 'after_flush')
+def _mark_changes(session: Session, flush_context) -> None:
+    """ Marks a session that flushed changes. """
+    session.info['changed'] = True
+
+
+@event.listens_for(Database.session, 'after_commit')
+def _mark_scope(session: Session) -> None:
+    """ Marks the scope when changes are commited, so the read-only
+        sessions in the scope use the primary database. """
+    scope = _scope.get()
+    if session.info.pop('changed', False) and scope is not None:
+        scope.wrote = True
+
+
+@event.listens_for(Database.session, 'before_flush')
+def _prevent_flush(session: Session, flush_context, instances) -> None:
+    """ Prevents changes in read-only sessions. """
+    if session.info.get('read_only'):
+        raise DatabaseReadOnlyError(
+            'Changes can not be flushed in a read-only session')
 
 
 class DatabaseSession:
@@ -16,12 +76,27 @@ class DatabaseSession:
 
     def __init__(self,
                  commit_on_end: bool = False,
-                 expire_on_commit: bool = True) -> None:
+                 expire_on_commit: bool = True,
+                 read_only: bool = False,
+                 for_write: bool = False) -> None:
         """ The initiator creates an empty session to use with this
             object. When 'expire_on_commit' is set, all objects that
             were added during this session are expired after the
             session is commited.
 
+            A read-only session doesn't flush automatically, can't
+            flush changes and is never commited; the transaction is
+            rolled back at the end. On MySQL, the transaction is marked
+            as read-only. Within a scope (see `start_scope`), all
+            read-only sessions share one session that is closed when
+            the scope ends.
+
+            When read replicas are configured, read-only sessions use
+            a replica. Other sessions, sessions with 'for_write' and,
+            with `Database.read_your_writes`, read-only sessions after
+            changes were commited in the same scope use the primary
+            database.
+
             Parameters
             ----------
             commit_on_end : bool, default=False
@@ -32,17 +107,97 @@ class DatabaseSession:
                 Tells the object to either expire or not expire created
                 objects after the context manager is done.
 
+            read_only : bool, default=False
+                Creates a read-only session.
+
+            for_write : bool, default=False
+                Uses the primary database, also for a read-only
+                session.
+
             Returns
             -------
             None
         """
 
-        self.session: Session = Database.session(
-            expire_on_commit=expire_on_commit)
-        self.commit_on_end = commit_on_end
+        self.read_only = read_only
+        self.commit_on_end = commit_on_end and not read_only
+
+        # Read from the primary database after changes in this scope
+        scope = _scope.get()
+        use_replica = read_only and not for_write and not (
+            scope is not None and scope.wrote and Database.read_your_writes)
+
+        # Share the read-only session of the scope
+        self.scoped = read_only and not for_write and scope is not None
+        if self.scoped:
+            if scope.session is not None and not use_replica and \
+                    scope.session.info.get('replica'):
+                scope.session.close()
+                scope.session = None
+            if scope.session is None:
+                scope.session = self._create_session(
+                    expire_on_commit=expire_on_commit, read_only=True,
+                    use_replica=use_replica)
+            self.session: Session = scope.session
+        else:
+            self.session = self._create_session(
+                expire_on_commit=expire_on_commit, read_only=read_only,
+                use_replica=use_replica)
+
+    @staticmethod
+    def _create_session(expire_on_commit: bool,
+                        read_only: bool,
+                        use_replica: bool) -> Session:
+        """ Creates a new session. """
+        engine = Database.get_engine()
+        if use_replica:
+            engine = Database.get_read_engine()
+        session = Database.session(
+            bind=engine,
+            expire_on_commit=expire_on_commit,
+            autoflush=not read_only)
+        session.info['read_only'] = read_only
+        session.info['replica'] = engine is not Database.get_engine()
+        return session
+
+    @classmethod
+    def start_scope(cls) -> Token:
+        """ Method to start a scope, like a web request. Until the scope
+            ends, all read-only sessions in this context share one
+            session.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            Token
+                The token that should be given to `end_scope`.
+        """
+        return _scope.set(SessionScope())
+
+    @classmethod
+    def end_scope(cls, token: Token) -> None:
+        """ Method to end a scope. Closes the shared session.
+
+            Parameters
+            ----------
+            token : Token
+                The token that was returned by `start_scope`.
+
+            Returns
+            -------
+            None
+        """
+        scope = _scope.get()
+        _scope.reset(token)
+        if scope is not None and scope.session is not None:
+            scope.session.close()
 
     def close(self) -> None:
-        """ Closes the session.
+        """ Closes the session. The shared session of a scope is closed
+            when the scope ends.
 
             Parameters
             ----------
@@ -52,7 +207,8 @@ class DatabaseSession:
             -------
             None
         """
-        self.session.close()
+        if not self.scoped:
+            self.session.close()
 
     def commit(self) -> None:
         """ Commits the session.
@@ -124,6 +280,11 @@ class DatabaseSession:
         if self.commit_on_end:
             self.commit()
 
+        # Make sure the shared session can be used again after an
+        # error
+        if self.scoped and exception_type is not None:
+            self.rollback()
+
         # Close the session
         self.close()
 
@@ -18,3 +18,15 @@ class DatabaseConnectionError(DatabaseCriticalError):
     """ Error that happends when the database credentials are not
         correct """
     pass
+
+
+class DatabaseNotConnectedError(DatabaseError):
+    """ Error that happends when the database is used before `connect`
+        is called """
+    pass
+
+
+class DatabaseReadOnlyError(DatabaseError):
+    """ Error that happends when changes are flushed in a read-only
+        session """
+    pass
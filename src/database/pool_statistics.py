@@ -0,0 +1,246 @@
+"""
+    Module that contains the classes to gather statistics about the
+    connection pool of the 'Database' class.
+"""
+import bisect
+import threading
+import time
+from typing import Callable, Dict, List, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class Histogram:
+    """ Thread safe histogram with fixed buckets. """
+
+    # Default upper bounds of the buckets, in seconds
+    default_buckets = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                       1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets: Sequence[float] = default_buckets) -> None:
+        """ Sets the default values.
+
+            Parameters
+            ----------
+            buckets : Sequence[float]
+                The upper bounds of the buckets. A bucket for values
+                above the highest bound is added.
+
+            Returns
+            -------
+            None
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """ Adds a value to the histogram.
+
+            Parameters
+            ----------
+            value : float
+                The value to add.
+
+            Returns
+            -------
+            None
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def to_dict(self) -> dict:
+        """ Returns the histogram as a dict. The buckets are cumulative,
+            like Prometheus histograms.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            dict
+                The histogram.
+        """
+        with self._lock:
+            buckets: Dict[str, int] = dict()
+            total = 0
+            for bound, count in zip(self.buckets, self.counts):
+                total += count
+                buckets[str(bound)] = total
+            buckets['+Inf'] = self.count
+            return {'buckets': buckets, 'count': self.count, 'sum': self.sum}
+
+
+class PoolStatistics:
+    """ Class that gathers the lifecycle events of the connections in a
+        pool: new connections, checkouts, checkins, closed (recycled)
+        connections and invalidations. The time it takes to get a
+        connection from the pool is kept in a histogram. Observers (see
+        `add_observer`) are notified of every event, so the events can
+        be exported as metrics. """
+
+    # The observers of all pools; they are called with the name of the
+    # pool, the name of the counter (or 'checkout_wait') and the value
+    observers: List[Callable[[str, str, float], None]] = []
+
+    def __init__(self, name: str = 'primary') -> None:
+        """ Sets the default values.
+
+            Parameters
+            ----------
+            name : str
+                The name of the pool, for the observers.
+
+            Returns
+            -------
+            None
+        """
+        self.name = name
+        self.counters: Dict[str, int] = {
+            'connects': 0,
+            'checkouts': 0,
+            'checkins': 0,
+            'closes': 0,
+            'invalidations': 0
+        }
+        self.checkout_wait = Histogram()
+        self._lock = threading.Lock()
+
+    def increment(self, counter: str) -> None:
+        """ Raises a counter by one.
+
+            Parameters
+            ----------
+            counter : str
+                The name of the counter.
+
+            Returns
+            -------
+            None
+        """
+        with self._lock:
+            self.counters[counter] += 1
+        for observer in self.observers:
+            observer(self.name, counter, 1)
+
+    def observe_checkout_wait(self, seconds: float) -> None:
+        """ Adds the time it took to get a connection from the pool.
+
+            Parameters
+            ----------
+            seconds : float
+                The amount of seconds.
+
+            Returns
+            -------
+            None
+        """
+        self.checkout_wait.observe(seconds)
+        for observer in self.observers:
+            observer(self.name, 'checkout_wait', seconds)
+
+    @classmethod
+    def add_observer(cls,
+                     observer: Callable[[str, str, float], None]) -> None:
+        """ Adds an observer for the events of all pools. An observer is
+            only added once.
+
+            Parameters
+            ----------
+            observer : Callable[[str, str, float], None]
+                Callable that is called with the name of the pool, the
+                name of the counter (or 'checkout_wait') and the value
+                (1 for a counter, the amount of seconds for
+                'checkout_wait').
+
+            Returns
+            -------
+            None
+        """
+        if observer not in cls.observers:
+            cls.observers.append(observer)
+
+    def listen(self, engine: Engine) -> None:
+        """ Registers the pool events of an engine.
+
+            Parameters
+            ----------
+            engine : Engine
+                The engine to gather statistics for.
+
+            Returns
+            -------
+            None
+        """
+        events = {
+            'connect': 'connects',
+            'checkout': 'checkouts',
+            'checkin': 'checkins',
+            'close': 'closes',
+            'invalidate': 'invalidations'
+        }
+        for event_name, counter in events.items():
+            event.listen(
+                engine, event_name,
+                lambda *args, counter=counter: self.increment(counter))
+
+    def to_dict(self) -> dict:
+        """ Returns the statistics as a dict.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            dict
+                The statistics.
+        """
+        with self._lock:
+            statistics = dict(self.counters)
+        statistics['checkout_wait'] = self.checkout_wait.to_dict()
+        return statistics
+
+
+class CheckoutTimer:
+    """ Mixin for a pool that measures how long it takes to get a
+        connection from the pool. This includes the time to create a
+        new connection when the pool has no idle connections. """
+
+    statistics: PoolStatistics = None
+
+    def _do_get(self):
+        """ Gets a connection from the pool and measures the time. """
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.statistics is not None:
+                self.statistics.observe_checkout_wait(
+                    time.perf_counter() - start)
+
+    def recreate(self) -> QueuePool:
+        """ Recreates the pool and keeps the statistics. """
+        pool = super().recreate()
+        pool.statistics = self.statistics
+        return pool
+
+
+class InstrumentedQueuePool(CheckoutTimer, QueuePool):
+    """ QueuePool that measures how long it takes to get a connection
+        from the pool. """
+    pass
+
+
+class InstrumentedAsyncQueuePool(CheckoutTimer, AsyncAdaptedQueuePool):
+    """ The pool of the async engine that measures how long it takes to
+        get a connection from the pool. """
+    pass
@@ -0,0 +1,227 @@
+"""
+    Module that contains the 'QueryProfiler' class. The profiler uses
+    the cursor events of SQLAlchemy to measure every statement that is
+    executed. Statements are grouped on a fingerprint: the statement
+    with the literal values replaced by question marks.
+"""
+import contextvars
+import re
+import threading
+import time
+from functools import lru_cache
+from logging import getLogger
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Patterns to create the fingerprint of a statement
+_STRING_PATTERN = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_PATTERN = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LIST_PATTERN = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(statement: str) -> str:
+    """ Method that normalizes a statement, so statements that only
+        differ in their values get the same fingerprint.
+
+        Parameters
+        ----------
+        statement : str
+            The SQL statement.
+
+        Returns
+        -------
+        str
+            The fingerprint.
+    """
+    statement = _STRING_PATTERN.sub('?', statement)
+    statement = _NUMBER_PATTERN.sub('?', statement)
+    statement = _WHITESPACE_PATTERN.sub(' ', statement).strip()
+    statement = statement.replace('%s', '?')
+    return _LIST_PATTERN.sub('(...)', statement)
+
+
+class QueryScope:
+    """ Class that keeps track of the queries in a scope, for example a
+        request. """
+
+    __slots__ = ('name', 'count', 'duration', 'statements')
+
+    def __init__(self, name: str) -> None:
+        """ Sets the default values """
+        self.name = name
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Dict[tuple, int] = dict()
+
+
+class QueryProfiler:
+    """ Class that profiles the statements that are executed on an
+        engine. Keeps statistics per fingerprint, logs slow statements
+        and warns when a scope (like a request) executes the same
+        statement with the same parameters multiple times; this is
+        usually a N+1 pattern. """
+
+    def __init__(self,
+                 slow_query_threshold: float = 0.25,
+                 repeat_threshold: int = 3) -> None:
+        """ Sets the default values.
+
+            Parameters
+            ----------
+            slow_query_threshold : float
+                Statements that take longer than this amount of seconds
+                are logged.
+
+            repeat_threshold : int
+                The amount of times an identical statement can be
+                executed in one scope before a warning is logged.
+
+            Returns
+            -------
+            None
+        """
+        self.slow_query_threshold = slow_query_threshold
+        self.repeat_threshold = repeat_threshold
+        self.logger = getLogger('database.profiler')
+        self._statistics: Dict[str, dict] = dict()
+        self._lock = threading.Lock()
+        self._scope: contextvars.ContextVar = contextvars.ContextVar(
+            'query_scope', default=None)
+
+    def listen(self, engine: Engine) -> None:
+        """ Registers the cursor events of an engine.
+
+            Parameters
+            ----------
+            engine : Engine
+                The engine to profile.
+
+            Returns
+            -------
+            None
+        """
+        event.listen(engine, 'before_cursor_execute', self._before_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+
+    def start_scope(self, name: str) -> contextvars.Token:
+        """ Starts a new scope, for example for a request.
+
+            Parameters
+            ----------
+            name : str
+                The name of the scope; used in the logging.
+
+            Returns
+            -------
+            contextvars.Token
+                The token to end the scope with.
+        """
+        return self._scope.set(QueryScope(name))
+
+    def end_scope(self, token: contextvars.Token) -> Optional[QueryScope]:
+        """ Ends a scope and warns about statements that were executed
+            too often in the scope.
+
+            Parameters
+            ----------
+            token : contextvars.Token
+                The token returned by `start_scope`.
+
+            Returns
+            -------
+            Optional[QueryScope]
+                The ended scope.
+        """
+        scope = self._scope.get()
+        self._scope.reset(token)
+        if scope is None:
+            return None
+
+        for (statement, _), count in scope.statements.items():
+            if count >= self.repeat_threshold:
+                self.logger.warning(
+                    f'{scope.name}: identical statement executed {count} '
+                    f'times (possible N+1): {fingerprint(statement)}')
+        self.logger.debug(
+            f'{scope.name}: {scope.count} statements in '
+            f'{scope.duration * 1000:.1f} ms')
+        return scope
+
+    def get_scope(self) -> Optional[QueryScope]:
+        """ Returns the current scope.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            Optional[QueryScope]
+                The current scope, or None if there is no scope.
+        """
+        return self._scope.get()
+
+    def statistics(self) -> Dict[str, dict]:
+        """ Returns the statistics per fingerprint: the amount of
+            executions, the total and maximum duration and the total
+            amount of rows.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            Dict[str, dict]
+                The statistics.
+        """
+        with self._lock:
+            return {
+                statement: dict(values)
+                for statement, values in self._statistics.items()
+            }
+
+    def _before_execute(self, connection, cursor, statement, parameters,
+                        context, executemany) -> None:
+        """ Saves the start time of the statement on the execution
+            context, so nothing is left behind when the statement
+            fails. """
+        if context is not None:
+            context._query_profiler_start = time.perf_counter()
+
+    def _after_execute(self, connection, cursor, statement, parameters,
+                       context, executemany) -> None:
+        """ Calculates the duration of the statement and updates the
+            statistics. Statements without a start time (because the
+            profiler was enabled while they ran) are skipped. """
+        start = getattr(context, '_query_profiler_start', None)
+        if start is None:
+            return
+        duration = time.perf_counter() - start
+        rows = max(cursor.rowcount, 0)
+        statement_fingerprint = fingerprint(statement)
+
+        with self._lock:
+            values = self._statistics.setdefault(statement_fingerprint, {
+                'count': 0, 'total': 0.0, 'max': 0.0, 'rows': 0
+            })
+            values['count'] += 1
+            values['total'] += duration
+            values['max'] = max(values['max'], duration)
+            values['rows'] += rows
+
+        scope = self._scope.get()
+        if scope is not None:
+            scope.count += 1
+            scope.duration += duration
+            key = (statement, repr(parameters))
+            scope.statements[key] = scope.statements.get(key, 0) + 1
+
+        if duration >= self.slow_query_threshold:
+            self.logger.warning(
+                f'Slow statement ({duration * 1000:.1f} ms, {rows} rows): '
+                f'{statement_fingerprint}')
@@ -0,0 +1,19 @@
+"""
+    Configuration for gunicorn. Opens the connections of the database
+    pool when a worker starts and removes the metrics of stopped
+    workers when the metrics are stored for multiple processes.
+"""
+import os
+
+
+def post_worker_init(worker) -> None:
+    """ Opens the connections of the pool in the new worker. """
+    import jantje_database
+    jantje_database.prewarm()
+
+
+def child_exit(server, worker) -> None:
+    """ Marks the metrics of a stopped worker as dead. """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,2 +1,23 @@
 #!/bin/sh
-gunicorn --chdir /app dashboard:flask_app -w 2 --threads 2 -b 0.0.0.0:80
\ No newline at end of file
+
+# Store the metrics of all workers in one directory, so they can be
+# aggregated. The directory should be empty when the server starts.
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/jantje/metrics}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# Create the tables once, instead of in every worker
+if [ "$INIT_DB" != "false" ]; then
+    python3 -m jantje_database init-db || exit 1
+fi
+
+# The application is loaded once and the workers are forked from it;
+# the database engine is created in the workers
+if [ "$SERVER_MODE" = "asgi" ]; then
+    gunicorn --chdir /app -c /app/gunicorn.conf.py \
+        'dashboard.asgi:create_asgi_app()' --preload \
+        -w 2 -k uvicorn.workers.UvicornWorker -b 0.0.0.0:80
+else
+    gunicorn --chdir /app -c /app/gunicorn.conf.py 'dashboard:create_app()' \
+        --preload -w 2 --threads 2 -b 0.0.0.0:80
+fi
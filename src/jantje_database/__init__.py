@@ -1,33 +1,239 @@
 """
     The `jantje_database` package does all the database handling for
     the 'Jantje' application.
+
+    Importing the package doesn't connect to the database. The
+    application should call `connect` when it starts; the engine is
+    created when it is first used, so this can safely be done before
+    the worker processes are forked. The tables are created with a
+    separate command:
+
+    python -m jantje_database init-db
 """
 from logging import getLogger
+from typing import Optional
 from config_loader import ConfigLoader
-from database import Database
+from database import AsyncDatabase, Database
+from jantje_database.cache import (agenda_mirror, configure_agenda_cache,
+                                   configure_agenda_mirror)
 from jantje_database.exceptions import ConfigNotLoadedError
 from jantje_database_model import *
 
-# Load the settings
-if not ConfigLoader.load_settings():
-    raise ConfigNotLoadedError(
-        f'Configuration was not yet loaded.')
-
 # Create a Logger
 logger = getLogger('jantje_database')
 
-# Get the database credentials
-# TODO: retrieve this from the configuration
-username = ConfigLoader.config['database']['username']
-password = ConfigLoader.config['database']['password']
-server = ConfigLoader.config['database']['server']
-database = ConfigLoader.config['database']['database']
-
-# Connect to the database and create the needed tables
-connection_string = \
-    f'mysql+pymysql://{username}:{password}@{server}/{database}'
-
-Database.connect(
-    connection=connection_string,
-    create_tables=True
-)
+
+def load_settings() -> dict:
+    """ Method that loads the configuration and returns the settings
+        for the database.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            The 'database' section of the configuration.
+    """
+    if not ConfigLoader.load_settings():
+        raise ConfigNotLoadedError(
+            f'Configuration was not yet loaded.')
+    return ConfigLoader.config['database']
+
+
+def get_connection_string(driver: str = 'pymysql',
+                          replica: Optional[dict] = None) -> str:
+    """ Method that returns the connection string for the database.
+
+        Parameters
+        ----------
+        driver : str
+            The DBAPI driver to use, for example 'pymysql' or
+            'aiomysql'.
+
+        replica : Optional[dict]
+            The settings of a read replica. The 'server' is required;
+            the 'username', 'password' and 'database' of the primary
+            database are used when they are not given.
+
+        Returns
+        -------
+        str
+            The connection string.
+    """
+    settings = load_settings()
+    if replica is not None:
+        settings = dict(settings, **replica)
+    username = settings['username']
+    password = settings['password']
+    server = settings['server']
+    database = settings['database']
+    return f'mysql+{driver}://{username}:{password}@{server}/{database}'
+
+
+def get_pool_arguments() -> dict:
+    """ Method that returns the settings for the connection pool as
+        arguments for `Database.connect`.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            The arguments for the connection pool.
+    """
+    pool_settings = load_settings().get('pool', {})
+    return {
+        'pool_pre_ping': pool_settings.get('pre_ping', True),
+        'pool_recycle': pool_settings.get('recycle', 3600),
+        'pool_size': pool_settings.get('size', 5),
+        'pool_overflow': pool_settings.get('overflow', 10),
+        'pool_timeout': pool_settings.get('timeout', 30),
+        'pool_use_lifo': pool_settings.get('use_lifo', False)
+    }
+
+
+def get_connect_arguments() -> dict:
+    """ Method that returns the arguments for the DBAPI driver. The
+        socket timeouts make sure a query doesn't wait forever on a
+        database server that doesn't respond. They apply to every
+        connection, so also to exports and to the synchronisation of
+        the agenda mirror; slow queries of the dashboard are stopped by
+        the 'statement_timeout' instead.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            The arguments for PyMySQL.
+    """
+    settings = load_settings()
+    return {
+        argument: settings[argument]
+        for argument in ('connect_timeout', 'read_timeout', 'write_timeout')
+        if settings.get(argument) is not None
+    }
+
+
+def connect() -> None:
+    """ Method that configures the database. The engine is created when
+        it is first used, in the process that uses it. The tables are
+        not created; use `init_db` for that. Can be called again when
+        the configuration changes; the current engine is then closed.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+    """
+    settings = load_settings()
+    Database.connect(
+        connection=get_connection_string(),
+        lazy=True,
+        replicas=[
+            get_connection_string(replica=replica)
+            for replica in settings.get('replicas', ())
+        ],
+        replica_strategy=settings.get('replica_strategy', 'round_robin'),
+        read_your_writes=settings.get('read_your_writes', True),
+        statement_timeout=settings.get('statement_timeout'),
+        connect_args=get_connect_arguments(),
+        **get_pool_arguments()
+    )
+
+    # Configure the cache for the agendaitems
+    configure_agenda_cache(
+        ConfigLoader.config.get('cache', {}).get('agenda', {}))
+
+    # Configure the local mirror of the agenda
+    configure_agenda_mirror(settings.get('mirror', {}))
+
+    # Profile the statements, if requested
+    profiling_settings = settings.get('profiling', {})
+    if profiling_settings.get('enabled', False):
+        Database.enable_profiling(
+            slow_query_threshold=profiling_settings.get(
+                'slow_query_threshold', 0.25),
+            repeat_threshold=profiling_settings.get('repeat_threshold', 3)
+        )
+    else:
+        Database.profiler = None
+
+
+def prewarm() -> None:
+    """ Method that opens the connections in the pool, if this is
+        configured, and starts the agenda mirror, if it is enabled.
+        Should be called in the worker process, after it is forked.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+    """
+    if load_settings().get('pool', {}).get('prewarm', False):
+        logger.debug('Prewarming the connection pool')
+        Database.prewarm_pool()
+    if agenda_mirror.enabled:
+        logger.debug('Starting the agenda mirror')
+        agenda_mirror.start()
+
+
+def init_db() -> None:
+    """ Method that creates the tables in the database, and the indexes
+        that are missing on existing tables. Should be run when the
+        application is deployed, not in every worker.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+    """
+    connect()
+    Database.create_tables()
+
+
+def connect_async() -> None:
+    """ Method that creates the async engine for the database. Should be
+        called from the event loop that is going to use it.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+    """
+    settings = load_settings()
+    pool_arguments = get_pool_arguments()
+    AsyncDatabase.connect(
+        connection=get_connection_string('aiomysql'),
+        pool_pre_ping=pool_arguments['pool_pre_ping'],
+        pool_recycle=pool_arguments['pool_recycle'],
+        pool_size=pool_arguments['pool_size'],
+        pool_overflow=pool_arguments['pool_overflow'],
+        replicas=[
+            get_connection_string('aiomysql', replica=replica)
+            for replica in settings.get('replicas', ())
+        ],
+        replica_strategy=settings.get('replica_strategy', 'round_robin')
+    )
+    for engine in AsyncDatabase.get_engines():
+        Database.listen_statement_timeouts(engine.sync_engine)
+        if Database.profiler is not None:
+            Database.profiler.listen(engine.sync_engine)
@@ -0,0 +1,86 @@
+"""
+    Command line interface for the 'jantje_database' package. Examples:
+
+    python -m jantje_database init-db
+    python -m jantje_database import --upsert agenda.ics
+    python -m jantje_database export agenda.csv
+"""
+# ---------------------------------------------------------------------
+# Imports
+import io
+import logging
+import click
+import jantje_database
+from jantje_database import bulk
+from jantje_database.exceptions import JantjeDatabaseError
+# ---------------------------------------------------------------------
+
+
+@click.group()
+def cli() -> None:
+    """ Maintains the database. """
+    logging.basicConfig(level=logging.INFO, format='%(name)s: %(message)s')
+
+
+@cli.command('init-db')
+def init_db() -> None:
+    """ Creates the tables that don't exist yet. """
+    jantje_database.init_db()
+    jantje_database.logger.info('Created the tables')
+
+
+@cli.command('import')
+@click.option('--format', 'file_format', type=click.Choice(list(bulk.READERS)),
+              help='The format of the file. Default is the extension.')
+@click.option('--batch-size', default=1000, show_default=True,
+              help='The amount of items per transaction.')
+@click.option('--upsert', is_flag=True,
+              help='Update items with the same date/time and description.')
+@click.argument('file', type=click.Path(exists=True, dir_okay=False,
+                                        allow_dash=True))
+def import_items(file_format: str,
+                 batch_size: int,
+                 upsert: bool,
+                 file: str) -> None:
+    """ Imports agendaitems from a CSV, JSON Lines or iCalendar file. """
+    jantje_database.connect()
+    try:
+        file_format = file_format or bulk.get_format(file)
+
+        # The csv module handles the line endings itself, so quoted
+        # fields can contain line breaks
+        if file == '-':
+            stream = io.TextIOWrapper(click.get_binary_stream('stdin'),
+                                      encoding='utf-8', newline='')
+        else:
+            stream = open(file, 'r', encoding='utf-8', newline='')
+        with stream:
+            counts = bulk.import_agenda_items(
+                stream, file_format, batch_size, upsert)
+    except JantjeDatabaseError as err:
+        raise click.ClickException(str(err))
+    jantje_database.logger.info(
+        f'Inserted {counts["inserted"]} and updated {counts["updated"]} '
+        'agendaitems')
+
+
+@cli.command('export')
+@click.option('--format', 'file_format', type=click.Choice(list(bulk.WRITERS)),
+              help='The format of the file. Default is the extension.')
+@click.option('--batch-size', default=1000, show_default=True,
+              help='The amount of items that is fetched at a time.')
+@click.argument('file', type=click.File('w', encoding='utf-8', lazy=True))
+def export_items(file_format: str, batch_size: int, file) -> None:
+    """ Exports all agendaitems to a CSV, JSON Lines or iCalendar file. """
+    jantje_database.connect()
+    try:
+        count = bulk.export_agenda_items(
+            file, file_format or bulk.get_format(file.name), batch_size)
+    except JantjeDatabaseError as err:
+        raise click.ClickException(str(err))
+    jantje_database.logger.info(f'Exported {count} agendaitems')
+
+
+if __name__ == '__main__':
+    cli()
+# ---------------------------------------------------------------------
@@ -1,59 +1,548 @@
 """
     Module to maintain agendaitems
 """
-from typing import List, Optional, Type
-from database import DatabaseSession
+import asyncio
+from collections import namedtuple
+from datetime import date, datetime, time
+from functools import lru_cache
+from typing import (Any, Dict, List, Optional, Sequence, Tuple, Type,
+                    Union)
+from database import AsyncDatabaseSession, Database, DatabaseSession
 from jantje_database_model import AgendaItem
-from sqlalchemy.orm.query import Query
+from sqlalchemy import and_, or_, select
+from sqlalchemy.sql import Select
 from jantje_database import logger
+from jantje_database.cache import agenda_cache, agenda_mirror
 from jantje_database.exceptions import FilterNotValidError
+from metrics import AGENDA_QUERY_ROWS, AGENDA_QUERY_TIME
 
 
 def get_agenda_items(
-    flt_id: Optional[int] = None
+    flt_id: Optional[int] = None,
+    flt_from: Optional[Union[date, datetime]] = None,
+    flt_until: Optional[Union[date, datetime]] = None,
+    upcoming: bool = False,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    ascending: bool = False
 ) -> Optional[List[AgendaItem]]:
     """ Method that retrieves all, or a subset of, the agendaitems in
-        the database.
+        the database. The results are cached in the agenda cache; the
+        cache is keyed on the given filters.
 
         Parameters
         ----------
         flt_id : Optional[int]
             Filter on a specific user ID.
 
+        flt_from : Optional[Union[date, datetime]]
+            Only return items on or after this moment.
+
+        flt_until : Optional[Union[date, datetime]]
+            Only return items before this moment.
+
+        upcoming : bool
+            Only return items from today and onwards.
+
+        limit : Optional[int]
+            The maximum amount of items to return.
+
+        after : Optional[Tuple[datetime, int]]
+            The (datetime, id) of the last item of the previous page.
+            When given, only the items after this item (in the
+            requested order) are returned.
+
+        ascending : bool
+            Sort the items in ascending order instead of descending
+            order.
+
         Returns
         -------
         List[AgendaItem]
             A list with the resulting agendaitems sorty in descending
-            order on DateTime.
+            (or ascending) order on DateTime and ID.
 
         None
             No users are found.
     """
 
-    # Empty data list
-    data_list: Optional[Query] = None
+    filters = _validate_filters(
+        flt_id=flt_id, flt_from=flt_from, flt_until=flt_until,
+        upcoming=upcoming, limit=limit, after=after, ascending=ascending)
 
-    # Get the token
-    with DatabaseSession(commit_on_end=False, expire_on_commit=False) \
-            as session:
-        # First, we get all users
-        data_list = session.query(AgendaItem)
+    # Retrieve the items from the cache, or from the database if they
+    # are not cached
+    data_list = agenda_cache.get_or_load(
+        _cache_key(filters),
+        lambda: _query_agenda_items(filters)
+    )
 
-        # Now, we can apply the correct filters
-        try:
-            if flt_id:
-                flt_id = int(flt_id)
-                data_list = data_list.filter(AgendaItem.id == flt_id)
-        except (ValueError, TypeError):
-            logger.error(
-                f'User id should be of type {int}, not {type(flt_id)}.')
-            raise FilterNotValidError(
-                f'User id should be of type {int}, not {type(flt_id)}.')
+    # Return a copy of the list so the cached list cannot be changed
+    if data_list is not None:
+        return list(data_list)
+    return None
+
+
+async def get_agenda_items_async(
+    flt_id: Optional[int] = None,
+    flt_from: Optional[Union[date, datetime]] = None,
+    flt_until: Optional[Union[date, datetime]] = None,
+    upcoming: bool = False,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    ascending: bool = False
+) -> Optional[List[AgendaItem]]:
+    """ The asyncio variant of `get_agenda_items`. Uses the same cache,
+        but retrieves the items with the `AsyncDatabase` so the event
+        loop is not blocked while waiting for the database.
+
+        Parameters
+        ----------
+        See `get_agenda_items`.
+
+        Returns
+        -------
+        List[AgendaItem]
+            A list with the resulting agendaitems.
+
+        None
+            No users are found.
+    """
 
-        # Add a sort to the list
-        data_list = data_list.order_by(AgendaItem.datetime.desc())
+    filters = _validate_filters(
+        flt_id=flt_id, flt_from=flt_from, flt_until=flt_until,
+        upcoming=upcoming, limit=limit, after=after, ascending=ascending)
 
-    # Return the token
+    # Retrieve the items from the cache, or from the database if they
+    # are not cached
+    key = _cache_key(filters)
+    version = agenda_cache.version
+    found, data_list = agenda_cache.get(key)
+    if not found:
+        if agenda_mirror.available():
+            # SQLite has no async driver; read the mirror in a thread so
+            # the event loop isn't blocked
+            data_list = await asyncio.to_thread(_query_agenda_items, filters)
+        else:
+            with AGENDA_QUERY_TIME.time():
+                async with AsyncDatabaseSession(
+                        expire_on_commit=False,
+                        read_only=True) as session:
+                    result = await session.execute(_build_query(filters))
+                    data_list = result.scalars().all()
+            AGENDA_QUERY_ROWS.observe(len(data_list))
+        agenda_cache.set(key, data_list, version)
+
+    # Return a copy of the list so the cached list cannot be changed
     if data_list is not None:
-        return data_list.all()
+        return list(data_list)
     return None
+
+
+def get_agenda_rows(
+    columns: Sequence[str] = ('datetime', 'description'),
+    flt_id: Optional[int] = None,
+    flt_from: Optional[Union[date, datetime]] = None,
+    flt_until: Optional[Union[date, datetime]] = None,
+    upcoming: bool = False,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    ascending: bool = False
+) -> List[tuple]:
+    """ Method that retrieves only the requested columns of all, or a
+        subset of, the agendaitems. The rows are retrieved with a Core
+        query and returned as named tuples, so there is no overhead of
+        the ORM. Should be used when the agendaitems are only read.
+        The results are cached in the agenda cache.
+
+        Parameters
+        ----------
+        columns : Sequence[str]
+            The columns to retrieve; one or more of 'id', 'datetime',
+            'all_day' and 'description'.
+
+        Other parameters
+        ----------------
+        See `get_agenda_items`.
+
+        Returns
+        -------
+        List[tuple]
+            A list with a named tuple per agendaitem, with the requested
+            columns as fields.
+    """
+
+    columns = _validate_columns(columns)
+    filters = _validate_filters(
+        flt_id=flt_id, flt_from=flt_from, flt_until=flt_until,
+        upcoming=upcoming, limit=limit, after=after, ascending=ascending)
+
+    # Retrieve the rows from the cache, or from the database if they
+    # are not cached. The rows are immutable, so the list is the only
+    # thing that has to be copied.
+    return list(agenda_cache.get_or_load(
+        ('get_agenda_rows', columns) + _cache_key(filters)[1:],
+        lambda: _query_agenda_rows(filters, columns)
+    ))
+
+
+async def get_agenda_rows_async(
+    columns: Sequence[str] = ('datetime', 'description'),
+    flt_id: Optional[int] = None,
+    flt_from: Optional[Union[date, datetime]] = None,
+    flt_until: Optional[Union[date, datetime]] = None,
+    upcoming: bool = False,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    ascending: bool = False
+) -> List[tuple]:
+    """ The asyncio variant of `get_agenda_rows`. Uses the same cache,
+        but retrieves the rows with the `AsyncDatabase` so the event
+        loop is not blocked while waiting for the database.
+
+        Parameters
+        ----------
+        See `get_agenda_rows`.
+
+        Returns
+        -------
+        List[tuple]
+            A list with a named tuple per agendaitem, with the requested
+            columns as fields.
+    """
+
+    columns = _validate_columns(columns)
+    filters = _validate_filters(
+        flt_id=flt_id, flt_from=flt_from, flt_until=flt_until,
+        upcoming=upcoming, limit=limit, after=after, ascending=ascending)
+
+    # Retrieve the rows from the cache, or from the database if they
+    # are not cached
+    key = ('get_agenda_rows', columns) + _cache_key(filters)[1:]
+    version = agenda_cache.version
+    found, data_list = agenda_cache.get(key)
+    if not found:
+        if agenda_mirror.available():
+            # SQLite has no async driver; read the mirror in a thread so
+            # the event loop isn't blocked
+            data_list = await asyncio.to_thread(
+                _query_agenda_rows, filters, columns)
+        else:
+            row_class = _row_class(columns)
+            with AGENDA_QUERY_TIME.time():
+                async with AsyncDatabaseSession(
+                        read_only=True) as session:
+                    result = await session.execute(
+                        _build_query(filters, columns))
+                    data_list = [row_class._make(row) for row in result]
+            AGENDA_QUERY_ROWS.observe(len(data_list))
+        agenda_cache.set(key, data_list, version)
+    return list(data_list)
+
+
+def get_agenda_cache_statistics() -> dict:
+    """ Method that returns the statistics of the agenda cache, like
+        the amount of hits and misses.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            The statistics of the cache.
+    """
+    return agenda_cache.statistics()
+
+
+def get_agenda_version() -> int:
+    """ Method that returns the version of the agenda cache. The
+        version changes every time the cache is invalidated, so it can
+        be used to key caches that depend on the agenda. Changes that
+        are made by other processes don't change the version, unless
+        the agenda mirror picks them up; they are seen when the cached
+        values expire.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        int
+            The version of the agenda cache.
+    """
+    return agenda_cache.version
+
+
+def _to_datetime(value: Optional[Union[date, datetime]],
+                 name: str) -> Optional[datetime]:
+    """ Method that converts a date to a datetime at the start of that
+        day. Datetimes are returned as is.
+
+        Parameters
+        ----------
+        value : Optional[Union[date, datetime]]
+            The value to convert.
+
+        name : str
+            The name of the filter; used in the error message.
+
+        Returns
+        -------
+        Optional[datetime]
+            The converted value.
+    """
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, time())
+    logger.error(f'{name} should be of type {date}, not {type(value)}.')
+    raise FilterNotValidError(
+        f'{name} should be of type {date}, not {type(value)}.')
+
+
+def _validate_filters(
+    flt_id: Optional[int],
+    flt_from: Optional[Union[date, datetime]],
+    flt_until: Optional[Union[date, datetime]],
+    upcoming: bool,
+    limit: Optional[int],
+    after: Optional[Tuple[datetime, int]],
+    ascending: bool
+) -> Dict[str, Any]:
+    """ Method that validates and normalizes the filters for the
+        agendaitems, so they can be used as cache key and to build the
+        query.
+
+        Parameters
+        ----------
+        See `get_agenda_items`.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The normalized filters. 'upcoming' is converted into
+            'flt_from'.
+    """
+    try:
+        if flt_id:
+            flt_id = int(flt_id)
+    except (ValueError, TypeError):
+        logger.error(
+            f'User id should be of type {int}, not {type(flt_id)}.')
+        raise FilterNotValidError(
+            f'User id should be of type {int}, not {type(flt_id)}.')
+
+    flt_from = _to_datetime(flt_from, 'flt_from')
+    flt_until = _to_datetime(flt_until, 'flt_until')
+
+    # 'Upcoming' means everything from the start of today, so all day
+    # items of today are included as well
+    if upcoming:
+        today = datetime.combine(date.today(), time())
+        if flt_from is None or flt_from < today:
+            flt_from = today
+
+    if limit is not None:
+        if type(limit) is not int or limit < 1:
+            logger.error(f'Limit should be a positive {int}, not {limit}.')
+            raise FilterNotValidError(
+                f'Limit should be a positive {int}, not {limit}.')
+
+    if after is not None:
+        try:
+            after = (_to_datetime(after[0], 'after'), int(after[1]))
+        except (ValueError, TypeError, IndexError):
+            logger.error(f'After should be a (datetime, id), not {after}.')
+            raise FilterNotValidError(
+                f'After should be a (datetime, id), not {after}.')
+
+    return {
+        'flt_id': flt_id,
+        'flt_from': flt_from,
+        'flt_until': flt_until,
+        'limit': limit,
+        'after': after,
+        'ascending': bool(ascending)
+    }
+
+
+def _validate_columns(columns: Sequence[str]) -> Tuple[str, ...]:
+    """ Method that validates the columns for a projection.
+
+        Parameters
+        ----------
+        columns : Sequence[str]
+            The names of the columns.
+
+        Returns
+        -------
+        Tuple[str, ...]
+            The names of the columns.
+    """
+    columns = tuple(columns)
+    unknown = [
+        column for column in columns
+        if column not in AgendaItem.__table__.c
+    ]
+    if not columns or unknown:
+        logger.error(f'Columns should be columns of the agenda, not '
+                     f'{columns}.')
+        raise FilterNotValidError(
+            f'Columns should be columns of the agenda, not {columns}.')
+    return columns
+
+
+@lru_cache(maxsize=None)
+def _row_class(columns: Tuple[str, ...]) -> Type[tuple]:
+    """ Method that returns the named tuple class for a projection. """
+    return namedtuple('AgendaRow', columns)
+
+
+def _cache_key(filters: Dict[str, Any]) -> tuple:
+    """ Method that returns the cache key for validated filters. """
+    return ('get_agenda_items', ) + tuple(filters.items())
+
+
+def _build_query(filters: Dict[str, Any],
+                 columns: Optional[Tuple[str, ...]] = None) -> Select:
+    """ Method that creates the query for the agendaitems. The query
+        can be used with both the sync and the async sessions. The
+        query has the statement timeout of the database, so a slow
+        database can't hold up the dashboard.
+
+        Parameters
+        ----------
+        filters : Dict[str, Any]
+            The validated filters.
+
+        columns : Optional[Tuple[str, ...]]
+            The columns for a Core query. When not given, the query
+            returns AgendaItem objects.
+
+        Returns
+        -------
+        Select
+            The query.
+    """
+    if columns is None:
+        table = AgendaItem
+        query = select(AgendaItem)
+    else:
+        # Only use the columns of the table, so the query doesn't use
+        # the ORM at all
+        table = AgendaItem.__table__.c
+        query = select(*(table[column] for column in columns))
+
+    # Now, we can apply the correct filters
+    if filters['flt_id']:
+        query = query.where(table.id == filters['flt_id'])
+    if filters['flt_from'] is not None:
+        query = query.where(table.datetime >= filters['flt_from'])
+    if filters['flt_until'] is not None:
+        query = query.where(table.datetime < filters['flt_until'])
+
+    # Keyset pagination; we continue after the given (datetime, id).
+    # The comparison is written out so MySQL can use the index on
+    # (datetime, id).
+    if filters['after'] is not None:
+        after_datetime, after_id = filters['after']
+        if filters['ascending']:
+            query = query.where(or_(
+                table.datetime > after_datetime,
+                and_(table.datetime == after_datetime,
+                     table.id > after_id)))
+        else:
+            query = query.where(or_(
+                table.datetime < after_datetime,
+                and_(table.datetime == after_datetime,
+                     table.id < after_id)))
+
+    # Add a sort to the list
+    if filters['ascending']:
+        query = query.order_by(table.datetime.asc(), table.id.asc())
+    else:
+        query = query.order_by(table.datetime.desc(), table.id.desc())
+
+    # Limit the amount of items
+    if filters['limit'] is not None:
+        query = query.limit(filters['limit'])
+
+    # Let the database server stop the query when it takes too long
+    if Database.statement_timeout is not None:
+        query = query.execution_options(
+            statement_timeout=Database.statement_timeout)
+
+    return query
+
+
+def _query_agenda_items(
+    filters: Dict[str, Any]
+) -> Optional[List[AgendaItem]]:
+    """ Method that retrieves the agendaitems from the database,
+        bypassing the cache. When the agenda mirror is available, the
+        agendaitems are read from the mirror.
+
+        Parameters
+        ----------
+        filters : Dict[str, Any]
+            The validated filters.
+
+        Returns
+        -------
+        List[AgendaItem]
+            A list with the resulting agendaitems.
+
+        None
+            No users are found.
+    """
+    with AGENDA_QUERY_TIME.time():
+        if agenda_mirror.available():
+            session_context = agenda_mirror.session()
+        else:
+            session_context = DatabaseSession(
+                read_only=True, expire_on_commit=False)
+        with session_context as session:
+            data_list = session.execute(_build_query(filters)).scalars().all()
+
+            # The items are cached for all requests, so they shouldn't
+            # be expired when the shared session of this request is
+            # rolled back
+            for item in data_list:
+                session.expunge(item)
+    AGENDA_QUERY_ROWS.observe(len(data_list))
+    return data_list
+
+
+def _query_agenda_rows(filters: Dict[str, Any],
+                       columns: Tuple[str, ...]) -> List[tuple]:
+    """ Method that retrieves the columns of the agendaitems from the
+        database, bypassing the cache. When the agenda mirror is
+        available, the agendaitems are read from the mirror.
+
+        Parameters
+        ----------
+        filters : Dict[str, Any]
+            The validated filters.
+
+        columns : Tuple[str, ...]
+            The validated columns.
+
+        Returns
+        -------
+        List[tuple]
+            A list with a named tuple per agendaitem.
+    """
+    row_class = _row_class(columns)
+    with AGENDA_QUERY_TIME.time():
+        if agenda_mirror.available():
+            connection_context = agenda_mirror.connect()
+        else:
+            connection_context = DatabaseSession(read_only=True)
+        with connection_context as connection:
+            result = connection.execute(_build_query(filters, columns))
+            data_list = [row_class._make(row) for row in result]
+    AGENDA_QUERY_ROWS.observe(len(data_list))
+    return data_list
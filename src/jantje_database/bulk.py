@@ -0,0 +1,353 @@
+"""
+    Module to import and export agendaitems in bulk. The supported
+    formats are CSV, JSON Lines and iCalendar. Imports are read as a
+    stream and inserted in batches with one `executemany` per batch;
+    exports are read from the database with a server-side cursor and
+    without the ORM. The memory use doesn't depend on the size of the
+    file.
+"""
+import csv
+import json
+from datetime import date, datetime
+from itertools import islice
+from typing import (Any, Callable, Dict, IO, Iterable, Iterator, List,
+                    Tuple)
+from sqlalchemy import bindparam, insert, select, tuple_, update
+from sqlalchemy.engine import Connection
+from database import Database, DatabaseSession
+from jantje_database_model import AgendaItem
+from jantje_database import logger
+from jantje_database.cache import invalidate_agenda_cache
+from jantje_database.exceptions import (FormatNotSupportedError,
+                                        RecordNotValidError)
+from jantje_database.ical import iter_calendar, parse_events
+
+# The columns of the agendaitems in the CSV and JSON Lines formats
+FIELDS = ('id', 'datetime', 'all_day', 'description')
+
+# The values of 'all_day' that mean True
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'ja', 'j'}
+
+
+def read_csv(stream: IO[str]) -> Iterator[Dict[str, Any]]:
+    """ Reads the records from a CSV file with a header. """
+    return csv.DictReader(stream)
+
+
+def read_jsonl(stream: IO[str]) -> Iterator[Dict[str, Any]]:
+    """ Reads the records from a JSON Lines file. """
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_ics(stream: IO[str]) -> Iterator[Dict[str, Any]]:
+    """ Reads the events from an iCalendar file. """
+    return parse_events(stream)
+
+
+def write_csv(items: Iterable[Any], stream: IO[str]) -> None:
+    """ Writes the agendaitems to a CSV file with a header. """
+    writer = csv.writer(stream)
+    writer.writerow(FIELDS)
+    for item in items:
+        writer.writerow((item.id, item.datetime.isoformat(),
+                         int(item.all_day), item.description))
+
+
+def write_jsonl(items: Iterable[Any], stream: IO[str]) -> None:
+    """ Writes the agendaitems to a JSON Lines file. """
+    for item in items:
+        stream.write(json.dumps({
+            'id': item.id,
+            'datetime': item.datetime.isoformat(),
+            'all_day': item.all_day,
+            'description': item.description
+        }, ensure_ascii=False) + '\n')
+
+
+def write_ics(items: Iterable[Any], stream: IO[str]) -> None:
+    """ Writes the agendaitems to an iCalendar file. """
+    stream.writelines(iter_calendar(items, name='Agenda', domain='jantje'))
+
+
+# The readers and writers per format
+READERS: Dict[str, Callable[[IO[str]], Iterator[Dict[str, Any]]]] = {
+    'csv': read_csv,
+    'jsonl': read_jsonl,
+    'ics': read_ics
+}
+WRITERS: Dict[str, Callable[[Iterable[Any], IO[str]], None]] = {
+    'csv': write_csv,
+    'jsonl': write_jsonl,
+    'ics': write_ics
+}
+
+
+def get_format(filename: str) -> str:
+    """ Method that returns the format of a file, based on the
+        extension.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the file.
+
+        Returns
+        -------
+        str
+            The format; 'csv', 'jsonl' or 'ics'.
+    """
+    extension = filename.rsplit('.', 1)[-1].lower()
+    extension = {'json': 'jsonl', 'ical': 'ics'}.get(extension, extension)
+    if extension not in READERS:
+        raise FormatNotSupportedError(
+            f'Format of "{filename}" is not supported; use one of '
+            f'{", ".join(READERS)}')
+    return extension
+
+
+def import_agenda_items(stream: IO[str],
+                        file_format: str,
+                        batch_size: int = 1000,
+                        upsert: bool = False) -> Dict[str, int]:
+    """ Method that imports agendaitems from a file. Every batch is
+        inserted in its own transaction. When 'upsert' is set, items
+        with the same date/time and description as an existing item
+        update that item instead of creating a new one.
+
+        Parameters
+        ----------
+        stream : IO[str]
+            The opened file.
+
+        file_format : str
+            The format of the file; 'csv', 'jsonl' or 'ics'.
+
+        batch_size : int
+            The amount of items per batch.
+
+        upsert : bool
+            Update existing items with the same date/time and
+            description.
+
+        Returns
+        -------
+        Dict[str, int]
+            The amount of 'inserted' and 'updated' items.
+    """
+    if file_format not in READERS:
+        raise FormatNotSupportedError(
+            f'Format "{file_format}" is not supported')
+    return bulk_insert(READERS[file_format](stream), batch_size, upsert)
+
+
+def bulk_insert(records: Iterable[Dict[str, Any]],
+                batch_size: int = 1000,
+                upsert: bool = False) -> Dict[str, int]:
+    """ Method that inserts agendaitems in batches. See
+        `import_agenda_items`.
+
+        Parameters
+        ----------
+        records : Iterable[Dict[str, Any]]
+            The agendaitems, as dicts with the keys 'datetime',
+            'all_day' and 'description'.
+
+        batch_size : int
+            The amount of items per batch.
+
+        upsert : bool
+            Update existing items with the same date/time and
+            description.
+
+        Returns
+        -------
+        Dict[str, int]
+            The amount of 'inserted' and 'updated' items.
+    """
+    table = AgendaItem.__table__
+    counts = {'inserted': 0, 'updated': 0}
+    statements = {
+        'insert': insert(table),
+        'update': update(table)
+        .where(table.c.id == bindparam('b_id'))
+        .values(all_day=bindparam('b_all_day'))
+    }
+
+    engine = Database.get_engine()
+    records = _read_records(records)
+    try:
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+
+            with engine.begin() as connection:
+                if upsert:
+                    batch, updates = _split_existing(connection, batch)
+                    if updates:
+                        connection.execute(statements['update'], updates)
+                        counts['updated'] += len(updates)
+                if batch:
+                    connection.execute(statements['insert'], batch)
+                    counts['inserted'] += len(batch)
+            logger.debug(f'Imported {sum(counts.values())} agendaitems')
+    except RecordNotValidError as err:
+        # The previous batches are already commited
+        raise RecordNotValidError(
+            f'{err} ({counts["inserted"]} agendaitems were inserted and '
+            f'{counts["updated"]} were updated before this record)')
+    finally:
+        # The cache is not invalidated automatically, because the ORM
+        # is not used
+        invalidate_agenda_cache()
+    return counts
+
+
+def iter_agenda_items(batch_size: int = 1000) -> Iterator[tuple]:
+    """ Method that yields all agendaitems in ascending order. The
+        items are fetched with a server-side cursor, 'batch_size' items
+        at a time, as rows with the columns of the agendaitems instead
+        of ORM objects.
+
+        Parameters
+        ----------
+        batch_size : int
+            The amount of items that is fetched at a time.
+
+        Returns
+        -------
+        Iterator[tuple]
+            The agendaitems, as rows with the fields 'id', 'datetime',
+            'all_day' and 'description'.
+    """
+    table = AgendaItem.__table__
+    query = select(table) \
+        .order_by(table.c.datetime, table.c.id) \
+        .execution_options(stream_results=True, max_row_buffer=batch_size)
+    with DatabaseSession(read_only=True) as session:
+        for partition in session.execute(query).partitions(batch_size):
+            yield from partition
+
+
+def export_agenda_items(stream: IO[str],
+                        file_format: str,
+                        batch_size: int = 1000) -> int:
+    """ Method that exports all agendaitems to a file.
+
+        Parameters
+        ----------
+        stream : IO[str]
+            The opened file.
+
+        file_format : str
+            The format of the file; 'csv', 'jsonl' or 'ics'.
+
+        batch_size : int
+            The amount of items that is fetched at a time.
+
+        Returns
+        -------
+        int
+            The amount of exported items.
+    """
+    if file_format not in WRITERS:
+        raise FormatNotSupportedError(
+            f'Format "{file_format}" is not supported')
+
+    count = 0
+
+    def counted() -> Iterator[tuple]:
+        nonlocal count
+        for item in iter_agenda_items(batch_size):
+            count += 1
+            yield item
+
+    WRITERS[file_format](counted(), stream)
+    return count
+
+
+def _read_records(records: Iterable[Dict[str, Any]]
+                  ) -> Iterator[Dict[str, Any]]:
+    """ Method that converts the records from a file to the values of
+        the columns. Errors of the readers, like a line that is not
+        valid JSON, are raised as RecordNotValidError with the number
+        of the record. """
+    iterator = iter(records)
+    number = 0
+    while True:
+        number += 1
+        try:
+            record = next(iterator)
+        except StopIteration:
+            return
+        except (ValueError, csv.Error) as err:
+            raise RecordNotValidError(f'Record {number} is not valid: {err}')
+        yield _to_record(record, number)
+
+
+def _to_record(record: Dict[str, Any], number: int) -> Dict[str, Any]:
+    """ Method that converts a record from a file to the values of the
+        columns. Raises a RecordNotValidError when the record is not
+        valid. """
+    try:
+        value = record['datetime']
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        elif isinstance(value, date) and not isinstance(value, datetime):
+            value = datetime.combine(value, datetime.min.time())
+        elif not isinstance(value, datetime):
+            raise ValueError(f'datetime should be a string, not {value!r}')
+
+        all_day = record.get('all_day') or False
+        if isinstance(all_day, str):
+            all_day = all_day.strip().lower() in TRUE_VALUES
+
+        description = record['description']
+        if not isinstance(description, str) or not description:
+            raise ValueError('description is empty')
+        if len(description) > AgendaItem.description.type.length:
+            raise ValueError(
+                f'description is longer than '
+                f'{AgendaItem.description.type.length} characters')
+    except (KeyError, TypeError, ValueError) as err:
+        raise RecordNotValidError(f'Record {number} is not valid: {err}')
+
+    return {
+        'datetime': value,
+        'all_day': bool(all_day),
+        'description': description
+    }
+
+
+def _split_existing(connection: Connection,
+                    batch: List[Dict[str, Any]]
+                    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """ Method that splits a batch in new items and items that already
+        exist, based on the date/time and the description. Items with
+        the same key in the batch are merged; the last one wins. """
+    table = AgendaItem.__table__
+    records = {
+        (record['datetime'], record['description']): record
+        for record in batch
+    }
+    existing = {
+        (row.datetime, row.description): row.id
+        for row in connection.execute(
+            select(table.c.id, table.c.datetime, table.c.description)
+            .where(tuple_(table.c.datetime, table.c.description)
+                   .in_(list(records))))
+    }
+
+    inserts = []
+    updates = []
+    for key, record in records.items():
+        if key in existing:
+            updates.append({
+                'b_id': existing[key],
+                'b_all_day': record['all_day']
+            })
+        else:
+            inserts.append(record)
+    return inserts, updates
@@ -0,0 +1,100 @@
+"""
+    Module that contains the cache and the local mirror for the
+    agendaitems. The cache is invalidated, and the mirror is updated,
+    automatically when agendaitems are written using the ORM. Code that
+    writes agendaitems without the ORM should call
+    `invalidate_agenda_cache` itself.
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from cache import TTLCache
+from jantje_database.mirror import AgendaMirror
+from jantje_database_model import AgendaItem
+from metrics import cache_observer
+
+# Create the cache; the settings are set by `configure_agenda_cache`
+agenda_cache = TTLCache(
+    ttl=300,
+    max_size=64,
+    observer=cache_observer('agenda')
+)
+
+# Create the mirror; it is enabled by `configure_agenda_mirror`. When
+# the mirror changes, the cached agendaitems are outdated.
+agenda_mirror = AgendaMirror(on_change=agenda_cache.invalidate)
+
+
+def configure_agenda_cache(settings: dict) -> None:
+    """ Method to configure the agenda cache. Clears the cache.
+
+        Parameters
+        ----------
+        settings : dict
+            The settings with the keys 'ttl' and 'max_size'.
+
+        Returns
+        -------
+        None
+    """
+    agenda_cache.ttl = settings.get('ttl', 300)
+    agenda_cache.max_size = settings.get('max_size', 64)
+    agenda_cache.invalidate()
+
+
+def configure_agenda_mirror(settings: dict) -> None:
+    """ Method to configure the agenda mirror. The mirror is stopped;
+        when it is enabled, it is started again when it is first used.
+
+        Parameters
+        ----------
+        settings : dict
+            The settings with the keys 'enabled', 'path', 'interval'
+            and 'full_sync_interval'.
+
+        Returns
+        -------
+        None
+    """
+    agenda_mirror.stop()
+    agenda_mirror.path = None
+    if settings.get('enabled', False):
+        agenda_mirror.path = settings.get(
+            'path', '/tmp/jantje/agenda-{pid}.sqlite3')
+        agenda_mirror.interval = settings.get('interval', 5.0)
+        agenda_mirror.full_sync_interval = settings.get(
+            'full_sync_interval', 300.0)
+
+
+def invalidate_agenda_cache() -> None:
+    """ Method to clear the agenda cache and to update the agenda
+        mirror. Should be called after the agendaitems are changed.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+    """
+    agenda_cache.invalidate()
+    agenda_mirror.request_full_sync()
+
+
+@event.listens_for(AgendaItem, 'after_insert')
+@event.listens_for(AgendaItem, 'after_update')
+@event.listens_for(AgendaItem, 'after_delete')
+def _mark_session(mapper, connection, target) -> None:
+    """ Marks the session of a changed agendaitem so the cache gets
+        invalidated when that session is commited. """
+    session = object_session(target)
+    if session is not None:
+        session.info['agenda_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session: Session) -> None:
+    """ Invalidates the cache when a session with changed agendaitems
+        is commited. """
+    if session.info.pop('agenda_changed', False):
+        invalidate_agenda_cache()
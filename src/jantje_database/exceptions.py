@@ -17,3 +17,14 @@ class FilterNotValidError(JantjeDatabaseError):
 class ConfigNotLoadedError(JantjeDatabaseError):
     """ Exception when the configuration couldn't be loaded. """
     pass
+
+
+class RecordNotValidError(JantjeDatabaseError):
+    """ Exception when a record that is imported is not valid. """
+    pass
+
+
+class FormatNotSupportedError(JantjeDatabaseError):
+    """ Exception when a file format for import or export is not
+        supported. """
+    pass
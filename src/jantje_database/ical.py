@@ -0,0 +1,254 @@
+"""
+    Module to read and write agendaitems in the iCalendar format
+    (RFC 5545). Only the properties that are stored for agendaitems
+    are used: the start (DTSTART, a date for all-day items) and the
+    summary (SUMMARY). Times without a timezone are 'floating' times,
+    which is how the agendaitems are stored. Times in UTC are
+    converted to the local time; TZID parameters are ignored, so these
+    times are read as floating times.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, Optional
+from jantje_database.exceptions import RecordNotValidError
+
+# The line ending and the maximum length of a line in octets
+CRLF = '\r\n'
+MAX_LINE_LENGTH = 75
+
+# The formats of dates and times
+DATE_FORMAT = '%Y%m%d'
+DATETIME_FORMAT = '%Y%m%dT%H%M%S'
+
+
+def escape(text: str) -> str:
+    """ Method that escapes a text value.
+
+        Parameters
+        ----------
+        text : str
+            The text to escape.
+
+        Returns
+        -------
+        str
+            The escaped text.
+    """
+    return text.replace('\\', '\\\\').replace(';', '\\;') \
+        .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def unescape(text: str) -> str:
+    """ Method that unescapes a text value.
+
+        Parameters
+        ----------
+        text : str
+            The escaped text.
+
+        Returns
+        -------
+        str
+            The text.
+    """
+    result = []
+    characters = iter(text)
+    for character in characters:
+        if character == '\\':
+            character = next(characters, '')
+            result.append('\n' if character in 'nN' else character)
+        else:
+            result.append(character)
+    return ''.join(result)
+
+
+def fold(line: str) -> str:
+    """ Method that folds a content line into lines of at most 75
+        octets. A multi-octet character is never split.
+
+        Parameters
+        ----------
+        line : str
+            The content line, without line ending.
+
+        Returns
+        -------
+        str
+            The folded line, with line ending.
+    """
+    if len(line.encode()) <= MAX_LINE_LENGTH:
+        return line + CRLF
+
+    parts = []
+    current = []
+    length = 0
+    for character in line:
+        size = len(character.encode())
+        if length + size > MAX_LINE_LENGTH:
+            parts.append(''.join(current))
+            # Continuation lines start with a space
+            current = [' ']
+            length = 1
+        current.append(character)
+        length += size
+    parts.append(''.join(current))
+    return CRLF.join(parts) + CRLF
+
+
+def format_event(item: Any, domain: str, stamp: datetime) -> str:
+    """ Method that formats an agendaitem as VEVENT.
+
+        Parameters
+        ----------
+        item : Any
+            The agendaitem; an object with the attributes 'id',
+            'datetime', 'all_day' and 'description'.
+
+        domain : str
+            The domain for the unique ID of the event.
+
+        stamp : datetime
+            The moment the calendar is created, in UTC.
+
+        Returns
+        -------
+        str
+            The event, with line endings.
+    """
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:agenda-{item.id}@{domain}',
+        f'DTSTAMP:{stamp.strftime(DATETIME_FORMAT)}Z'
+    ]
+    if item.all_day:
+        start = item.datetime.date()
+        lines += [
+            f'DTSTART;VALUE=DATE:{start.strftime(DATE_FORMAT)}',
+            'DTEND;VALUE=DATE:'
+            f'{(start + timedelta(days=1)).strftime(DATE_FORMAT)}'
+        ]
+    else:
+        lines.append(f'DTSTART:{item.datetime.strftime(DATETIME_FORMAT)}')
+    lines += [
+        f'SUMMARY:{escape(item.description)}',
+        'END:VEVENT'
+    ]
+    return ''.join(fold(line) for line in lines)
+
+
+def iter_calendar(items: Iterable[Any],
+                  name: str,
+                  domain: str,
+                  stamp: Optional[datetime] = None) -> Iterator[str]:
+    """ Method that generates a calendar with the given agendaitems.
+        The calendar is generated per event, so it can be streamed.
+
+        Parameters
+        ----------
+        items : Iterable[Any]
+            The agendaitems.
+
+        name : str
+            The name of the calendar.
+
+        domain : str
+            The domain for the unique IDs of the events.
+
+        stamp : Optional[datetime]
+            The moment the calendar is created, in UTC. Default is
+            now.
+
+        Returns
+        -------
+        Iterator[str]
+            The parts of the calendar.
+    """
+    if stamp is None:
+        stamp = datetime.now(timezone.utc)
+    yield ''.join(fold(line) for line in (
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:-//{domain}//{name}//NL',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{escape(name)}'
+    ))
+    for item in items:
+        yield format_event(item, domain, stamp)
+    yield fold('END:VCALENDAR')
+
+
+def _parse_start(parameters: Dict[str, str], value: str) -> tuple:
+    """ Method that parses the value of DTSTART. Returns the start and
+        if the event lasts all day. Times in UTC are converted to the
+        local time. A TZID parameter is ignored. """
+    if parameters.get('VALUE', '').upper() == 'DATE' or len(value) == 8:
+        return datetime.strptime(value[:8], DATE_FORMAT), True
+    if value.endswith('Z'):
+        start = datetime.strptime(value[:-1], DATETIME_FORMAT)
+        return start.replace(tzinfo=timezone.utc).astimezone() \
+            .replace(tzinfo=None), False
+    return datetime.strptime(value, DATETIME_FORMAT), False
+
+
+def _unfold(lines: Iterable[str]) -> Iterator[str]:
+    """ Method that joins folded lines. """
+    current: Optional[str] = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def parse_events(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """ Method that reads the events of a calendar. The calendar is
+        read line by line, so large calendars can be streamed. Raises a
+        RecordNotValidError when an event has no DTSTART or when the
+        DTSTART is not valid.
+
+        Parameters
+        ----------
+        lines : Iterable[str]
+            The lines of the calendar, for example an open file.
+
+        Returns
+        -------
+        Iterator[Dict[str, Any]]
+            A dict per event with the keys 'datetime', 'all_day' and
+            'description'.
+    """
+    event: Optional[Dict[str, Any]] = None
+    number = 0
+    for line in _unfold(lines):
+        name, _, value = line.partition(':')
+        name, *parameters = name.split(';')
+        name = name.upper()
+
+        if name == 'BEGIN' and value.upper() == 'VEVENT':
+            event = {'description': ''}
+            number += 1
+        elif name == 'END' and value.upper() == 'VEVENT':
+            if event is not None:
+                if 'datetime' not in event:
+                    raise RecordNotValidError(
+                        f'Record {number} is not valid: no DTSTART')
+                yield event
+            event = None
+        elif event is not None and name == 'DTSTART':
+            try:
+                event['datetime'], event['all_day'] = _parse_start(
+                    {key.upper(): parameter_value
+                     for key, _, parameter_value
+                     in (parameter.partition('=')
+                         for parameter in parameters)},
+                    value)
+            except ValueError as err:
+                raise RecordNotValidError(
+                    f'Record {number} is not valid: DTSTART {value!r}: '
+                    f'{err}')
+        elif event is not None and name == 'SUMMARY':
+            event['description'] = unescape(value)
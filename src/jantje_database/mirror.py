@@ -0,0 +1,385 @@
+"""
+    Module that contains a local mirror of the agenda. The mirror is a
+    SQLite database with a copy of the 'agenda' table, so agendaitems
+    can be read without a round trip to the database server and while
+    the database server is briefly unavailable.
+
+    A thread in every process polls a change marker in the database:
+    the amount of agendaitems and the highest ID. New agendaitems are
+    copied incrementally; when agendaitems were removed, the complete
+    table is copied again. Changes to existing agendaitems don't change
+    the marker, so the complete table is also copied every
+    'full_sync_interval' seconds and after agendaitems are changed in
+    the same process (see `request_full_sync`). A full copy is only
+    written, and only counts as a change, when the checksum of the
+    rows differs from the checksum of the mirror.
+"""
+import hashlib
+import os
+import threading
+import time
+from logging import getLogger
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import sqlalchemy
+from sqlalchemy import create_engine, delete, event, func, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+from database import DatabaseSession
+from jantje_database_model import AgendaItem
+
+# Create a Logger
+logger = getLogger('jantje_database')
+
+# The table that is mirrored
+agenda_table = AgendaItem.__table__
+
+
+class AgendaMirror:
+    """ Class for a local SQLite copy of the agenda table. The copy is
+        created and kept up to date by a thread in the process that
+        uses it. """
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 interval: float = 5.0,
+                 full_sync_interval: float = 300.0,
+                 on_change: Optional[Callable[[], None]] = None) -> None:
+        """ Initializes the mirror. The mirror is not used until the
+            path is set.
+
+            Parameters
+            ----------
+            path : Optional[str]
+                The path of the SQLite database. '{pid}' is replaced
+                by the ID of the process, so every worker can get its
+                own file. Without '{pid}', the workers on a host share
+                the file.
+
+            interval : float
+                The amount of seconds between the checks for changes.
+
+            full_sync_interval : float
+                The amount of seconds after which the complete table is
+                copied again, so changes to existing agendaitems are
+                mirrored as well.
+
+            on_change : Optional[Callable[[], None]]
+                Called after the mirror is changed, for example to clear
+                the caches of the agendaitems.
+
+            Returns
+            -------
+            None
+        """
+        self.path = path
+        self.interval = interval
+        self.full_sync_interval = full_sync_interval
+        self.on_change = on_change
+
+        # The state of this process; everything is created again when
+        # the mirror is used in a forked process
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._engine: Optional[sqlalchemy.engine.Engine] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._reset()
+
+    def _reset(self) -> None:
+        """ Resets the synchronisation state. """
+        self._marker: Optional[Tuple[int, int]] = None
+        self._checksum: Optional[int] = None
+        self._last_full_sync = 0.0
+        self._full_sync_requested = False
+        self._synced = False
+        self.last_sync: Optional[float] = None
+        self.failures = 0
+
+    @property
+    def enabled(self) -> bool:
+        """ Returns if the mirror is configured. """
+        return self.path is not None
+
+    def get_engine(self) -> sqlalchemy.engine.Engine:
+        """ Method that returns the engine of the SQLite database. The
+            engine and the table are created when they don't exist yet
+            in this process.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            Engine
+                The engine of the mirror.
+        """
+        pid = os.getpid()
+        if self._engine is not None and self._pid == pid:
+            return self._engine
+
+        with self._lock:
+            if self._engine is not None and self._pid == pid:
+                return self._engine
+
+            path = self.path.format(pid=pid)
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            engine = create_engine(
+                f'sqlite:///{path}',
+                poolclass=QueuePool,
+                connect_args={'check_same_thread': False, 'timeout': 30})
+
+            # Readers don't block the writer, and the other way around
+            @event.listens_for(engine, 'connect')
+            def set_pragmas(connection, record) -> None:
+                cursor = connection.cursor()
+                cursor.execute('PRAGMA journal_mode=WAL')
+                cursor.execute('PRAGMA synchronous=NORMAL')
+                cursor.close()
+
+            agenda_table.create(engine, checkfirst=True)
+            self._engine = engine
+            self._pid = pid
+            self._thread = None
+            self._stop = threading.Event()
+            self._wake = threading.Event()
+            self._reset()
+            return engine
+
+    def start(self) -> None:
+        """ Method that starts the thread that keeps the mirror up to
+            date, if it doesn't run yet in this process.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+        self.get_engine()
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name='agenda-mirror', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """ Method that stops the thread and closes the engine. The
+            mirror is not used anymore until it is started again.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+        self._stop.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        with self._lock:
+            if self._engine is not None and self._pid == os.getpid():
+                self._engine.dispose()
+            self._engine = None
+            self._pid = None
+            self._thread = None
+            self._reset()
+
+    def available(self) -> bool:
+        """ Method that returns if the agendaitems can be read from the
+            mirror. Starts the mirror when it doesn't run yet in this
+            process; it can be used after it is synchronised once.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            bool
+                True when the mirror can be used.
+        """
+        if not self.enabled:
+            return False
+        if self._thread is None or self._pid != os.getpid():
+            self.start()
+        return self._synced
+
+    def request_full_sync(self) -> None:
+        """ Method that requests to copy the complete table right away.
+            Should be called after agendaitems are changed.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            None
+        """
+        self._full_sync_requested = True
+        self._wake.set()
+
+    def session(self) -> Session:
+        """ Method that returns a session to read from the mirror.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            Session
+                The session. Should be closed by the caller.
+        """
+        return Session(bind=self.get_engine(), expire_on_commit=False)
+
+    def connect(self) -> sqlalchemy.engine.Connection:
+        """ Method that returns a connection to read from the mirror.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            Connection
+                The connection. Should be closed by the caller.
+        """
+        return self.get_engine().connect()
+
+    def sync(self) -> bool:
+        """ Method that synchronises the mirror with the database. Only
+            the new agendaitems are copied, unless a full copy is
+            needed.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            bool
+                True when the mirror was changed.
+        """
+        full = self._full_sync_requested or self._marker is None or \
+            time.monotonic() - self._last_full_sync >= \
+            self.full_sync_interval
+        self._full_sync_requested = False
+
+        # Read the marker and the rows in one transaction, so they are
+        # consistent with each other
+        try:
+            with DatabaseSession(read_only=True) as session:
+                count, max_id = session.execute(select(
+                    func.count(agenda_table.c.id),
+                    func.max(agenda_table.c.id))).one()
+                marker = (count, max_id or 0)
+
+                rows: Optional[List[Dict[str, Any]]] = None
+                if not full and marker == self._marker:
+                    rows = []
+                elif not full and marker[1] > self._marker[1]:
+                    rows = self._fetch(session, self._marker[1])
+                    if self._marker[0] + len(rows) != marker[0]:
+                        rows = None
+                if rows is None:
+                    full = True
+                    rows = self._fetch(session)
+        except Exception:
+            if full:
+                self._full_sync_requested = True
+            raise
+
+        # The checksum is the sum of the checksums of the rows, so it
+        # can be updated with the new rows
+        checksum = sum(map(self._row_checksum, rows)) % 2 ** 64
+        if full:
+            changed = checksum != self._checksum
+        else:
+            changed = bool(rows)
+            checksum = (self._checksum + checksum) % 2 ** 64
+
+        if changed:
+            with self.get_engine().begin() as connection:
+                if full:
+                    connection.execute(delete(agenda_table))
+                if rows:
+                    connection.execute(insert(agenda_table), rows)
+        if full:
+            self._last_full_sync = time.monotonic()
+
+        self._checksum = checksum
+        self._marker = marker
+        self._synced = True
+        self.last_sync = time.time()
+        self.failures = 0
+        if changed and self.on_change is not None:
+            self.on_change()
+        return changed
+
+    @staticmethod
+    def _row_checksum(row: Dict[str, Any]) -> int:
+        """ Returns the checksum of the values of a row. """
+        return int.from_bytes(hashlib.sha1(
+            repr(sorted(row.items())).encode()).digest()[:8], 'big')
+
+    @staticmethod
+    def _fetch(session: Session,
+               after_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """ Retrieves the agendaitems from the database, optionally
+            only the ones after the given ID. """
+        query = select(agenda_table)
+        if after_id is not None:
+            query = query.where(agenda_table.c.id > after_id)
+        return [dict(row._mapping) for row in session.execute(query)]
+
+    def _run(self) -> None:
+        """ Synchronises the mirror until the mirror is stopped. When
+            the database is unavailable, the mirror keeps its current
+            contents. """
+        stop, wake = self._stop, self._wake
+        while not stop.is_set():
+            try:
+                if self.sync():
+                    logger.debug('Agenda mirror updated')
+            except Exception as e:
+                self.failures += 1
+                logger.warning(
+                    f'Couldn\'t update the agenda mirror '
+                    f'({self.failures} failures): {e}')
+            wake.wait(self.interval)
+            wake.clear()
+
+    def statistics(self) -> dict:
+        """ Method that returns the state of the mirror.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            dict
+                The state of the mirror: if it is enabled and
+                synchronised, the amount of agendaitems, the time of
+                the last synchronisation (as timestamp) and the amount
+                of failed synchronisations since then.
+        """
+        return {
+            'enabled': self.enabled,
+            'synced': self._synced and self._pid == os.getpid(),
+            'rows': self._marker[0] if self._marker else None,
+            'last_sync': self.last_sync,
+            'failures': self.failures
+        }
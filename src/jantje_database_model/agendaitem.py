@@ -5,7 +5,7 @@
 import datetime
 import enum
 from database import Database
-from sqlalchemy import (Column, DateTime, Boolean, Integer, String)
+from sqlalchemy import (Column, DateTime, Boolean, Index, Integer, String)
 
 
 class AgendaItem(Database.base_class):
@@ -14,6 +14,12 @@ class AgendaItem(Database.base_class):
     # Mandatory argument for Database objects within SQLAlchemy
     __tablename__ = 'agenda'
 
+    # Composite index to make sure the agenda can be retrieved in order
+    # of date and paginated on (datetime, id) without sorting the table
+    __table_args__ = (
+        Index('ix_agenda_datetime_id', 'datetime', 'id'),
+    )
+
     # Database columns for this table
     id = Column(Integer, primary_key=True)
     datetime = Column(DateTime, nullable=False)
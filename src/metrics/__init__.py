@@ -0,0 +1,18 @@
+"""
+    Package that contains the Prometheus metrics for the application.
+    When the `PROMETHEUS_MULTIPROC_DIR` environment variable is set
+    (which should be done before the application starts), the metrics
+    of all worker processes are stored in that directory and
+    aggregated when they are exported.
+"""
+# ---------------------------------------------------------------------
+# Imports
+from metrics.metrics import (AGENDA_QUERY_ROWS, AGENDA_QUERY_TIME,
+                             CACHE_REQUESTS, CIRCUIT_BREAKER_OPEN,
+                             POOL_CHECKOUT_WAIT, POOL_CONNECTIONS,
+                             POOL_EVENTS, RENDER_TIME, REQUEST_LATENCY,
+                             STALE_RESULTS, cache_observer,
+                             circuit_breaker_observer, export_metrics,
+                             observe_pool_event, stale_observer,
+                             update_pool_metrics)
+# ---------------------------------------------------------------------
@@ -0,0 +1,205 @@
+"""
+    Module that defines the Prometheus metrics and the functions to
+    update and export them.
+"""
+# ---------------------------------------------------------------------
+# Imports
+import os
+from typing import Callable, Tuple
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest)
+from prometheus_client import multiprocess
+# ---------------------------------------------------------------------
+
+# Requests
+REQUEST_LATENCY = Histogram(
+    'jantje_request_duration_seconds',
+    'Time spent handling a request',
+    ['route', 'method', 'status']
+)
+
+# Templates
+RENDER_TIME = Histogram(
+    'jantje_template_render_seconds',
+    'Time spent rendering a template',
+    ['template']
+)
+
+# Database
+AGENDA_QUERY_TIME = Histogram(
+    'jantje_agenda_query_seconds',
+    'Time spent retrieving agendaitems from the database'
+)
+AGENDA_QUERY_ROWS = Histogram(
+    'jantje_agenda_query_rows',
+    'Number of agendaitems returned by the database',
+    buckets=(0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+)
+POOL_CONNECTIONS = Gauge(
+    'jantje_db_pool_connections',
+    'Connections in the database pool',
+    ['pool', 'state'],
+    multiprocess_mode='livesum'
+)
+POOL_EVENTS = Counter(
+    'jantje_db_pool_events',
+    'Lifecycle events of the connections in the database pool',
+    ['pool', 'event']
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    'jantje_db_pool_checkout_wait_seconds',
+    'Time spent waiting for a connection from the database pool',
+    ['pool'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+             5.0, 10.0)
+)
+
+# Caches
+CACHE_REQUESTS = Counter(
+    'jantje_cache_requests_total',
+    'Lookups in the caches',
+    ['cache', 'result']
+)
+
+# Circuit breakers
+CIRCUIT_BREAKER_OPEN = Gauge(
+    'jantje_circuit_breaker_open',
+    'Whether a circuit breaker is open (1) or closed (0)',
+    ['breaker'],
+    multiprocess_mode='max'
+)
+STALE_RESULTS = Counter(
+    'jantje_stale_results_total',
+    'Results that were served while they were refreshed',
+    ['cache']
+)
+
+
+def cache_observer(cache: str) -> Callable[[bool], None]:
+    """ Method that returns an observer for a TTLCache that counts the
+        hits and misses of the cache.
+
+        Parameters
+        ----------
+        cache : str
+            The name of the cache.
+
+        Returns
+        -------
+        Callable[[bool], None]
+            The observer.
+    """
+    hit = CACHE_REQUESTS.labels(cache, 'hit')
+    miss = CACHE_REQUESTS.labels(cache, 'miss')
+    return lambda found: (hit if found else miss).inc()
+
+
+def circuit_breaker_observer(breaker: str) -> Callable[[bool], None]:
+    """ Method that returns an observer for a CircuitBreaker that sets
+        the state of the breaker.
+
+        Parameters
+        ----------
+        breaker : str
+            The name of the circuit breaker.
+
+        Returns
+        -------
+        Callable[[bool], None]
+            The observer.
+    """
+    gauge = CIRCUIT_BREAKER_OPEN.labels(breaker)
+    gauge.set(0)
+    return lambda is_open: gauge.set(1 if is_open else 0)
+
+
+def stale_observer(cache: str) -> Callable[[], None]:
+    """ Method that returns an observer for a StaleWhileRevalidate that
+        counts the stale results.
+
+        Parameters
+        ----------
+        cache : str
+            The name of the cache.
+
+        Returns
+        -------
+        Callable[[], None]
+            The observer.
+    """
+    return STALE_RESULTS.labels(cache).inc
+
+
+def observe_pool_event(pool: str, pool_event: str, value: float) -> None:
+    """ Method that adds an event of a connection pool to the metrics.
+        Should be added as observer with `PoolStatistics.add_observer`.
+
+        Parameters
+        ----------
+        pool : str
+            The name of the pool.
+
+        pool_event : str
+            The name of the event, or 'checkout_wait'.
+
+        value : float
+            1 for an event, the amount of seconds for 'checkout_wait'.
+
+        Returns
+        -------
+        None
+    """
+    if pool_event == 'checkout_wait':
+        POOL_CHECKOUT_WAIT.labels(pool).observe(value)
+    else:
+        POOL_EVENTS.labels(pool, pool_event).inc(value)
+
+
+def update_pool_metrics(statistics: dict, pool: str = 'primary') -> None:
+    """ Method that updates the connection metrics with the statistics
+        of `Database.get_pool_statistics` or
+        `AsyncDatabase.get_pool_statistics`. The statistics of the
+        replicas are added as well.
+
+        Parameters
+        ----------
+        statistics : dict
+            The statistics of the pool.
+
+        pool : str
+            The name of the pool.
+
+        Returns
+        -------
+        None
+    """
+    for state in ('checked_in', 'checked_out', 'overflow'):
+        POOL_CONNECTIONS.labels(pool, state).set(statistics[state])
+    for index, replica in enumerate(statistics.get('replicas', ())):
+        update_pool_metrics(
+            replica, f'replica-{index}' if pool == 'primary'
+            else f'{pool}-replica-{index}')
+
+
+def export_metrics() -> Tuple[bytes, str]:
+    """ Method that exports the metrics in the Prometheus text format.
+        In multiprocess mode, the metrics of all processes are
+        aggregated.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        Tuple[bytes, str]
+            The metrics and the content type.
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return (generate_latest(registry), CONTENT_TYPE_LATEST)
+# ---------------------------------------------------------------------
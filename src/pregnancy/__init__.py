@@ -5,4 +5,6 @@
 # ---------------------------------------------------------------------
 # Imports
 from pregnancy.pregnancy import Pregnancy
+from pregnancy.pregnancy_snapshot import PregnancySnapshot
+from pregnancy.pregnancy_timeline import PregnancyTimeline
 # ---------------------------------------------------------------------
@@ -9,6 +9,8 @@ from datetime import date
 from datetime import timedelta
 from rich.console import Console
 from rich.progress import Progress
+from pregnancy.pregnancy_snapshot import PregnancySnapshot
+from pregnancy.pregnancy_timeline import PregnancyTimeline
 # ---------------------------------------------------------------------
 
 
@@ -21,27 +23,82 @@ class Pregnancy:
         self.conception_date = datetime.strptime(
             self.conception, '%Y-%m-%d').date()
         self.name = None
+        self._snapshot: Optional[PregnancySnapshot] = None
+
+    def snapshot(self, on: Optional[date] = None) -> PregnancySnapshot:
+        """ Returns a snapshot with all values of the pregnancy for a
+            specific day. The snapshot for today is cached; when the
+            day changes, a new snapshot is created.
+
+            Parameters
+            ----------
+            on : Optional[date]
+                The day to create the snapshot for. Default is today.
+
+            Returns
+            -------
+            PregnancySnapshot
+                The snapshot for the requested day.
+        """
+        today = date.today()
+        if on is None:
+            on = today
+
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.date == on \
+                and snapshot.conception_date == self.conception_date:
+            return snapshot
+
+        snapshot = PregnancySnapshot(self.conception_date, on)
+        if on == today:
+            self._snapshot = snapshot
+        return snapshot
+
+    def timeline(self,
+                 start: Optional[date] = None,
+                 end: Optional[date] = None) -> PregnancyTimeline:
+        """ Returns the progress of the pregnancy for every day in a
+            range of days.
+
+            Parameters
+            ----------
+            start : Optional[date]
+                The first day. Default is the conception date.
+
+            end : Optional[date]
+                The last day (inclusive). Default is the due date.
+
+            Returns
+            -------
+            PregnancyTimeline
+                The timeline with a column for every value.
+        """
+        return PregnancyTimeline(
+            self.conception_date,
+            start or self.conception_date,
+            end or self.due_date
+        )
 
     @property
     def age_in_days(self) -> int:
         """ Returns the progress of the pregnancy in days. """
-        return (date.today() - self.conception_date).days
+        return self.snapshot().age_in_days
 
     @property
     def age_in_weeks(self) -> int:
         """ Returns the progress of the pregnancy in weeks. """
-        return (date.today() - self.conception_date).days // 7
+        return self.snapshot().age_in_weeks
 
     @property
     def age(self) -> str:
         """ Returns the progress of the pregnancy in a human readable
             format. """
-        return f'{self.age_in_weeks} weeks and {self.age_in_days % 7} days'
+        return self.snapshot().age
 
     @property
     def percentage(self) -> float:
         """ Returns the procentage of the pregnancy. """
-        return (self.age_in_days / (40 * 7)) * 100
+        return self.snapshot().percentage
 
     @property
     def trimester(self) -> int:
@@ -52,35 +109,14 @@ class Pregnancy:
             Trimester 2: week 13 - 26
             Trimester 3: week 26 and onwards
         """
-        if self.age_in_weeks <= 12:
-            return 1
-        if self.age_in_weeks <= 26:
-            return 2
-        return 3
+        return self.snapshot().trimester
 
     @property
     def trimester_days(self) -> Tuple[int, int]:
         """ Returns the amount of days that you're in the trimester and
             the number of days in this trimester. It assumes that the
             third trimester takes till week 40 """
-
-        # Get the trimester
-        trimester = self.trimester
-
-        # Calculate the days before the trimester
-        days_before = (trimester - 1) * 7 * 12
-
-        # Get the days within this trimester
-        try:
-            trimester_length = (7 * 12, 7 * 12, 7 * 16)[trimester - 1]
-        except IndexError:
-            return (-1, -1)
-
-        # Get the length of the current trimester
-        length = self.age_in_days - days_before
-
-        # Return the value
-        return (length, trimester_length)
+        return self.snapshot().trimester_days
 
     @property
     def due_date(self) -> date:
@@ -90,10 +126,10 @@ class Pregnancy:
     @property
     def days_till_due_date(self) -> int:
         """ Returns the days till due date. """
-        return (self.due_date - date.today()).days
+        return self.snapshot().days_till_due_date
 
     @property
     def week(self) -> int:
         """ Returns in which week of the pregnancy you are. """
-        return self.age_in_weeks + 1
+        return self.snapshot().week
 # ---------------------------------------------------------------------
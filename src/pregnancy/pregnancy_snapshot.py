@@ -0,0 +1,97 @@
+"""
+    Module that contains the 'PregnancySnapshot' class.
+"""
+# ---------------------------------------------------------------------
+# Imports
+from datetime import date, timedelta
+from typing import Any
+# ---------------------------------------------------------------------
+
+
+class PregnancySnapshot:
+    """ Immutable class that contains the progress of a pregnancy on a
+        specific day. All values are calculated once, when the object
+        is created. """
+
+    __slots__ = (
+        'date', 'conception_date', 'age_in_days', 'age_in_weeks',
+        'percentage', 'trimester', 'trimester_days', 'due_date',
+        'days_till_due_date', 'week'
+    )
+
+    def __init__(self, conception_date: date, on: date) -> None:
+        """ Calculates all values.
+
+            Parameters
+            ----------
+            conception_date : date
+                The date of the conception.
+
+            on : date
+                The day to calculate the values for.
+
+            Returns
+            -------
+            None
+        """
+        age_in_days = (on - conception_date).days
+        age_in_weeks = age_in_days // 7
+
+        # Calculate the trimester. The pregnancy is divided as follows:
+        #
+        # Trimester 1: week 0 - 12
+        # Trimester 2: week 13 - 26
+        # Trimester 3: week 26 and onwards
+        if age_in_weeks <= 12:
+            trimester = 1
+        elif age_in_weeks <= 26:
+            trimester = 2
+        else:
+            trimester = 3
+
+        # Calculate the days in the trimester and the length of the
+        # trimester. It assumes that the third trimester takes till
+        # week 40.
+        days_before = (trimester - 1) * 7 * 12
+        trimester_length = (7 * 12, 7 * 12, 7 * 16)[trimester - 1]
+
+        due_date = conception_date + timedelta(days=280)
+
+        set_value = super().__setattr__
+        set_value('date', on)
+        set_value('conception_date', conception_date)
+        set_value('age_in_days', age_in_days)
+        set_value('age_in_weeks', age_in_weeks)
+        set_value('percentage', (age_in_days / (40 * 7)) * 100)
+        set_value('trimester', trimester)
+        set_value('trimester_days',
+                  (age_in_days - days_before, trimester_length))
+        set_value('due_date', due_date)
+        set_value('days_till_due_date', (due_date - on).days)
+        set_value('week', age_in_weeks + 1)
+
+    @property
+    def age(self) -> str:
+        """ Returns the progress of the pregnancy in a human readable
+            format. """
+        return f'{self.age_in_weeks} weeks and {self.age_in_days % 7} days'
+
+    @property
+    def trimester_percentage(self) -> int:
+        """ Returns the percentage of the current trimester. """
+        return int((self.trimester_days[0] / self.trimester_days[1]) * 100)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """ Prevents changing the values. """
+        raise AttributeError(
+            f'"{type(self).__name__}" objects are immutable')
+
+    def __delattr__(self, name: str) -> None:
+        """ Prevents removing the values. """
+        raise AttributeError(
+            f'"{type(self).__name__}" objects are immutable')
+
+    def __repr__(self) -> str:
+        """ Represents objects of this class. """
+        return f'<PregnancySnapshot for {self.date}: {self.age}>'
+# ---------------------------------------------------------------------
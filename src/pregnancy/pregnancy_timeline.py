@@ -0,0 +1,103 @@
+"""
+    Module that contains the 'PregnancyTimeline' class.
+"""
+# ---------------------------------------------------------------------
+# Imports
+from datetime import date
+import numpy as np
+# ---------------------------------------------------------------------
+
+# The number of days before each trimester and the length of each
+# trimester. Index 0 is not used, so the trimester can be used as
+# index.
+TRIMESTER_START = np.array([0, 0, 7 * 12, 7 * 24])
+TRIMESTER_LENGTH = np.array([0, 7 * 12, 7 * 12, 7 * 16])
+
+
+class PregnancyTimeline:
+    """ Class that contains the progress of a pregnancy for a range of
+        days. Every value is stored as a column (a NumPy array) with
+        one element per day. All columns are calculated in one
+        vectorized pass. """
+
+    __slots__ = (
+        'dates', 'age_in_days', 'age_in_weeks', 'week', 'trimester',
+        'trimester_days', 'trimester_length', 'trimester_percentage',
+        'percentage'
+    )
+
+    def __init__(self,
+                 conception_date: date,
+                 start: date,
+                 end: date) -> None:
+        """ Calculates all columns.
+
+            Parameters
+            ----------
+            conception_date : date
+                The date of the conception.
+
+            start : date
+                The first day of the timeline.
+
+            end : date
+                The last day of the timeline (inclusive).
+
+            Returns
+            -------
+            None
+        """
+        if end < start:
+            raise ValueError('The end of the timeline is before the start')
+
+        self.dates = np.arange(
+            np.datetime64(start, 'D'),
+            np.datetime64(end, 'D') + 1)
+        self.age_in_days = (
+            self.dates - np.datetime64(conception_date, 'D')
+        ).astype(np.int64)
+        self.age_in_weeks = self.age_in_days // 7
+        self.week = self.age_in_weeks + 1
+
+        # Trimester 1: week 0 - 12, trimester 2: week 13 - 26 and
+        # trimester 3: week 26 and onwards
+        self.trimester = np.where(
+            self.age_in_weeks <= 12, 1,
+            np.where(self.age_in_weeks <= 26, 2, 3))
+        self.trimester_days = \
+            self.age_in_days - TRIMESTER_START[self.trimester]
+        self.trimester_length = TRIMESTER_LENGTH[self.trimester]
+        self.trimester_percentage = np.trunc(
+            self.trimester_days / self.trimester_length * 100
+        ).astype(np.int64)
+        self.percentage = self.age_in_days / (40 * 7) * 100
+
+    def __len__(self) -> int:
+        """ Returns the number of days in the timeline. """
+        return len(self.dates)
+
+    def to_dict(self) -> dict:
+        """ Returns the timeline as a dict with a list for every
+            column. The dates are formatted as ISO 8601 strings.
+
+            Parameters
+            ----------
+            None
+
+            Returns
+            -------
+            dict
+                The columns of the timeline.
+        """
+        return {
+            'dates': np.datetime_as_string(self.dates).tolist(),
+            'age_in_days': self.age_in_days.tolist(),
+            'age_in_weeks': self.age_in_weeks.tolist(),
+            'week': self.week.tolist(),
+            'trimester': self.trimester.tolist(),
+            'trimester_days': self.trimester_days.tolist(),
+            'trimester_length': self.trimester_length.tolist(),
+            'trimester_percentage': self.trimester_percentage.tolist(),
+            'percentage': np.round(self.percentage, 2).tolist()
+        }
+# ---------------------------------------------------------------------
@@ -0,0 +1,11 @@
+"""
+    Configuration for the tests. The packages are in the parent
+    directory, which is the working directory of the applications.
+"""
+# ---------------------------------------------------------------------
+# Imports
+import os
+import sys
+# ---------------------------------------------------------------------
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
@@ -0,0 +1,159 @@
+"""
+    Tests for the readers and writers of the bulk import and export,
+    and for the iCalendar format.
+"""
+# ---------------------------------------------------------------------
+# Imports
+import io
+from collections import namedtuple
+from datetime import date, datetime
+import pytest
+from jantje_database import bulk
+from jantje_database.exceptions import (FormatNotSupportedError,
+                                        RecordNotValidError)
+from jantje_database.ical import escape, fold, parse_events, unescape
+# ---------------------------------------------------------------------
+
+Item = namedtuple('Item', ('id', 'datetime', 'all_day', 'description'))
+
+ITEMS = [
+    Item(1, datetime(2021, 3, 1, 9, 30), False, 'Echo'),
+    Item(2, datetime(2021, 3, 2), True, 'Verjaardag; taart, koffie'),
+    Item(3, datetime(2021, 3, 3, 14), False,
+         'Eerste regel\nTweede regel met een \\ erin'),
+    Item(4, datetime(2021, 3, 4, 8, 15), False,
+         'Een lange omschrijving met één, twee en drie accenten die '
+         'zeker over meerdere regels wordt gevouwen: ééééééééééééé')
+]
+
+
+def records(items: list) -> list:
+    """ Returns the values that are imported for the items. """
+    return [
+        {
+            'datetime': item.datetime,
+            'all_day': item.all_day,
+            'description': item.description
+        }
+        for item in items
+    ]
+
+
+@pytest.mark.parametrize('file_format', ['csv', 'jsonl', 'ics'])
+def test_export_import_round_trip(file_format: str) -> None:
+    stream = io.StringIO(newline='')
+    bulk.WRITERS[file_format](ITEMS, stream)
+    stream.seek(0)
+    result = list(bulk._read_records(bulk.READERS[file_format](stream)))
+    assert result == records(ITEMS)
+
+
+def test_ics_lines_are_folded() -> None:
+    stream = io.StringIO(newline='')
+    bulk.write_ics(ITEMS, stream)
+    lines = stream.getvalue().split('\r\n')
+    assert lines[-1] == ''
+    assert all(len(line.encode()) <= 75 for line in lines)
+    assert any(line.startswith(' ') for line in lines)
+
+
+def test_escape_unescape() -> None:
+    text = 'a\\b;c,d\ne'
+    assert escape(text) == r'a\\b\;c\,d\ne'
+    assert unescape(escape(text)) == text
+
+
+def test_fold_doesnt_split_characters() -> None:
+    line = 'SUMMARY:' + 'é' * 100
+    folded = fold(line)
+    parts = folded.split('\r\n')[:-1]
+    assert ''.join(part[1:] if index else part
+                   for index, part in enumerate(parts)) == line
+    assert all(len(part.encode()) <= 75 for part in parts)
+
+
+def test_ics_utc_and_date_values() -> None:
+    events = list(parse_events([
+        'BEGIN:VCALENDAR',
+        'BEGIN:VEVENT',
+        'DTSTART;VALUE=DATE:20210301',
+        'SUMMARY:Hele dag',
+        'END:VEVENT',
+        'BEGIN:VEVENT',
+        'DTSTART;TZID=Europe/Amsterdam:20210302T101500',
+        'END:VEVENT',
+        'END:VCALENDAR'
+    ]))
+    assert events == [
+        {'datetime': datetime(2021, 3, 1), 'all_day': True,
+         'description': 'Hele dag'},
+        {'datetime': datetime(2021, 3, 2, 10, 15), 'all_day': False,
+         'description': ''}
+    ]
+
+
+def test_ics_invalid_start() -> None:
+    lines = ['BEGIN:VEVENT', 'DTSTART:morgen', 'END:VEVENT']
+    with pytest.raises(RecordNotValidError, match='Record 1'):
+        list(parse_events(lines))
+
+
+def test_ics_missing_start() -> None:
+    lines = ['BEGIN:VEVENT', 'SUMMARY:Test', 'END:VEVENT']
+    with pytest.raises(RecordNotValidError, match='no DTSTART'):
+        list(parse_events(lines))
+
+
+def test_csv_values_are_converted() -> None:
+    stream = io.StringIO(
+        'datetime,all_day,description\n'
+        '2021-03-01T09:30:00,Ja,Echo\n'
+        '2021-03-02,,Verjaardag\n')
+    assert list(bulk._read_records(bulk.read_csv(stream))) == [
+        {'datetime': datetime(2021, 3, 1, 9, 30), 'all_day': True,
+         'description': 'Echo'},
+        {'datetime': datetime(2021, 3, 2), 'all_day': False,
+         'description': 'Verjaardag'}
+    ]
+
+
+def test_date_values_are_converted() -> None:
+    result = list(bulk._read_records([
+        {'datetime': date(2021, 3, 1), 'all_day': 1,
+         'description': 'Verjaardag'}
+    ]))
+    assert result == [
+        {'datetime': datetime(2021, 3, 1), 'all_day': True,
+         'description': 'Verjaardag'}
+    ]
+
+
+@pytest.mark.parametrize('line', [
+    '{"datetime": "morgen", "description": "Echo"}',
+    '{"datetime": 20210301, "description": "Echo"}',
+    '{"datetime": "2021-03-01"}',
+    '{"datetime": "2021-03-01", "description": ""}',
+    '{"datetime": "2021-03-01", "description": "' + 'x' * 1000 + '"}',
+    '{"datetime": "2021-03-01", "description": '
+])
+def test_invalid_jsonl_records(line: str) -> None:
+    stream = io.StringIO(
+        '{"datetime": "2021-03-01", "description": "Echo"}\n' + line)
+    with pytest.raises(RecordNotValidError, match='Record 2'):
+        list(bulk._read_records(bulk.read_jsonl(stream)))
+
+
+@pytest.mark.parametrize('filename, file_format', [
+    ('agenda.csv', 'csv'),
+    ('agenda.JSON', 'jsonl'),
+    ('agenda.jsonl', 'jsonl'),
+    ('agenda.ical', 'ics'),
+    ('agenda.ics', 'ics')
+])
+def test_get_format(filename: str, file_format: str) -> None:
+    assert bulk.get_format(filename) == file_format
+
+
+def test_get_format_not_supported() -> None:
+    with pytest.raises(FormatNotSupportedError):
+        bulk.get_format('agenda.xlsx')
@@ -0,0 +1,66 @@
+"""
+    Tests for the 'Pregnancy', 'PregnancySnapshot' and
+    'PregnancyTimeline' classes.
+"""
+# ---------------------------------------------------------------------
+# Imports
+from datetime import date, timedelta
+import pytest
+from pregnancy import Pregnancy, PregnancyTimeline
+# ---------------------------------------------------------------------
+
+CONCEPTION = '2021-01-10'
+
+
+def test_timeline_defaults_to_the_pregnancy() -> None:
+    pregnancy = Pregnancy(CONCEPTION)
+    timeline = pregnancy.timeline()
+    assert len(timeline) == 281
+    assert timeline.dates[0] == pregnancy.conception_date
+    assert timeline.dates[-1] == pregnancy.due_date
+
+
+def test_timeline_matches_snapshots() -> None:
+    pregnancy = Pregnancy(CONCEPTION)
+    start = pregnancy.conception_date - timedelta(days=10)
+    end = pregnancy.due_date + timedelta(days=30)
+    timeline = pregnancy.timeline(start, end)
+    assert len(timeline) == (end - start).days + 1
+
+    for index in range(len(timeline)):
+        day = start + timedelta(days=index)
+        snapshot = pregnancy.snapshot(day)
+        assert timeline.dates[index] == day
+        assert timeline.age_in_days[index] == snapshot.age_in_days
+        assert timeline.age_in_weeks[index] == snapshot.age_in_weeks
+        assert timeline.week[index] == snapshot.week
+        assert timeline.trimester[index] == snapshot.trimester
+        assert (timeline.trimester_days[index],
+                timeline.trimester_length[index]) == \
+            snapshot.trimester_days
+        assert timeline.trimester_percentage[index] == \
+            snapshot.trimester_percentage
+        assert timeline.percentage[index] == \
+            pytest.approx(snapshot.percentage)
+
+
+def test_timeline_to_dict() -> None:
+    timeline = Pregnancy(CONCEPTION).timeline(
+        date(2021, 4, 10), date(2021, 4, 11))
+    assert timeline.to_dict() == {
+        'dates': ['2021-04-10', '2021-04-11'],
+        'age_in_days': [90, 91],
+        'age_in_weeks': [12, 13],
+        'week': [13, 14],
+        'trimester': [1, 2],
+        'trimester_days': [90, 7],
+        'trimester_length': [84, 84],
+        'trimester_percentage': [107, 8],
+        'percentage': [32.14, 32.5]
+    }
+
+
+def test_timeline_end_before_start() -> None:
+    with pytest.raises(ValueError):
+        PregnancyTimeline(date(2021, 1, 10), date(2021, 2, 1),
+                          date(2021, 1, 1))
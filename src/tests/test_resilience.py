@@ -0,0 +1,133 @@
+"""
+    Tests for the 'CircuitBreaker' and 'StaleWhileRevalidate' classes.
+"""
+# ---------------------------------------------------------------------
+# Imports
+import threading
+import time
+import pytest
+from dashboard.exceptions import CircuitOpenError
+from dashboard.resilience import CircuitBreaker, StaleWhileRevalidate
+# ---------------------------------------------------------------------
+
+
+def open_breaker(breaker: CircuitBreaker) -> None:
+    """ Records failures till the breaker opens. """
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure('test')
+
+
+def test_breaker_opens_after_threshold() -> None:
+    events = []
+    breaker = CircuitBreaker('test', failure_threshold=3,
+                             observer=events.append)
+    breaker.record_failure('test')
+    breaker.record_failure('test')
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+    breaker.record_failure('test')
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert events == [True]
+
+
+def test_success_resets_failures() -> None:
+    breaker = CircuitBreaker('test', failure_threshold=2)
+    breaker.record_failure('test')
+    breaker.record_success(0)
+    breaker.record_failure('test')
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_slow_call_counts_as_failure() -> None:
+    breaker = CircuitBreaker('test', failure_threshold=1,
+                             latency_budget=0.1)
+    breaker.record_success(0.05)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_success(0.2)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_allows_one_trial() -> None:
+    breaker = CircuitBreaker('test', failure_threshold=1,
+                             reset_timeout=0.01)
+    open_breaker(breaker)
+    time.sleep(0.02)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_half_open_trial_success_closes() -> None:
+    events = []
+    breaker = CircuitBreaker('test', failure_threshold=1,
+                             reset_timeout=0.01, observer=events.append)
+    open_breaker(breaker)
+    time.sleep(0.02)
+    assert breaker.call(lambda: 'result') == 'result'
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+    assert events == [True, False]
+
+
+def test_half_open_trial_failure_reopens() -> None:
+    breaker = CircuitBreaker('test', failure_threshold=3,
+                             reset_timeout=0.05)
+    open_breaker(breaker)
+    time.sleep(0.06)
+
+    def fail() -> None:
+        raise RuntimeError('database unavailable')
+
+    # One failure is enough to open a half open breaker again
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: 'result')
+
+
+def test_stale_result_is_returned_while_refreshing() -> None:
+    swr = StaleWhileRevalidate(max_age=60)
+    loading = threading.Event()
+    release = threading.Event()
+
+    def load_new() -> str:
+        loading.set()
+        release.wait(1)
+        return 'new'
+
+    assert swr.get('key', lambda: 'old', version=1) == 'old'
+    assert swr.get('key', load_new, version=2) == 'old'
+    assert loading.wait(1)
+    # The refresh is already running, so it isn't started again
+    assert swr.get('key', load_new, version=2) == 'old'
+    release.set()
+
+    deadline = time.monotonic() + 1
+    while swr.get('key', load_new, version=2) != 'new':
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_failed_refresh_keeps_stale_result() -> None:
+    swr = StaleWhileRevalidate(max_age=0)
+    assert swr.get('key', lambda: 'old') == 'old'
+
+    def fail() -> str:
+        raise RuntimeError('database unavailable')
+
+    assert swr.get('key', fail) == 'old'
+    time.sleep(0.05)
+    assert swr.get('key', lambda: 'old') == 'old'
+
+
+def test_first_load_error_is_raised() -> None:
+    swr = StaleWhileRevalidate()
+
+    def fail() -> str:
+        raise RuntimeError('database unavailable')
+
+    with pytest.raises(RuntimeError):
+        swr.get('key', fail)
+    assert swr.get('key', lambda: 'result') == 'result'
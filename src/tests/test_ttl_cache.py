@@ -0,0 +1,74 @@
+"""
+    Tests for the 'TTLCache' class.
+"""
+# ---------------------------------------------------------------------
+# Imports
+import time
+from cache import TTLCache
+# ---------------------------------------------------------------------
+
+
+def test_set_and_get() -> None:
+    cache = TTLCache(ttl=60)
+    assert cache.get('key') == (False, None)
+    assert cache.set('key', 'value')
+    assert cache.get('key') == (True, 'value')
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire() -> None:
+    cache = TTLCache(ttl=0.01)
+    cache.set('key', 'value')
+    time.sleep(0.02)
+    assert cache.get('key') == (False, None)
+
+
+def test_least_recently_used_entry_is_removed() -> None:
+    cache = TTLCache(max_size=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('a') == (True, 1)
+    assert cache.get('b') == (False, None)
+    assert cache.get('c') == (True, 3)
+
+
+def test_set_with_version_from_before_invalidate_is_ignored() -> None:
+    cache = TTLCache()
+    version = cache.version
+    cache.invalidate()
+    assert not cache.set('key', 'outdated', version)
+    assert cache.get('key') == (False, None)
+
+
+def test_set_with_current_version_after_invalidate() -> None:
+    cache = TTLCache()
+    cache.set('key', 'old')
+    cache.invalidate()
+    assert cache.set('key', 'new', cache.version)
+    assert cache.get('key') == (True, 'new')
+
+
+def test_invalidate_one_key() -> None:
+    cache = TTLCache()
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.invalidate('a')
+    assert cache.get('a') == (False, None)
+    assert cache.get('b') == (True, 2)
+    assert cache.version == 1
+
+
+def test_get_or_load_ignores_load_during_invalidate() -> None:
+    cache = TTLCache()
+
+    def load() -> str:
+        # Another thread writes to the source while this one loads
+        cache.invalidate()
+        return 'outdated'
+
+    assert cache.get_or_load('key', load) == 'outdated'
+    assert cache.get('key') == (False, None)
+    assert cache.get_or_load('key', lambda: 'new') == 'new'
+    assert cache.get('key') == (True, 'new')